@@ -0,0 +1,129 @@
+"""
+Seeded generators of synthetic inputs for the benchmark suite.
+
+Every generator writes `rows` lines to a file and is fully determined by its
+keyword arguments, so a workload always produces the same bytes. dirty_ratio is the share
+of lines (or tokens, for text) replaced by values the tools must reject. Text
+is drawn a batch of lines at a time, so large corpora generate quickly.
+"""
+
+import itertools
+import random
+import string
+
+# Bump whenever a generator writes different bytes for the same arguments:
+# cached inputs and saved baselines are tied to this version.
+VERSION = 1
+
+BATCH_ROWS = 10_000
+WORDS_PER_LINE = 10
+
+DIRTY_NUMBERS = ["", "abc", "1.2.3", "inf", "-", "nan?", "12,5"]
+DIRTY_INTEGERS = ["", "abc", "3.5", "12a", "--4", "0x1f"]
+DIRTY_WORDS = ["hi,", "123", "a1b", "end.", "x-y", "42nd"]
+
+
+def _write_batches(file_path: str, rows: int, make_batch):
+    with open(file_path, "w", encoding="utf-8") as f:
+        for start in range(0, rows, BATCH_ROWS):
+            f.write("\n".join(make_batch(min(BATCH_ROWS, rows - start))))
+            f.write("\n")
+
+
+def _write_lines(file_path: str, rows: int, make_line):
+    _write_batches(file_path, rows, lambda count: (make_line() for _ in range(count)))
+
+
+def generate_numeric(file_path: str, rows: int, *, seed: int = 0,
+                     dirty_ratio: float = 0.0, big: bool = False):
+    """
+    Writes one float per line for compute_statistics.
+
+    :param file_path: destination file
+    :type file_path: str
+    :param rows: number of lines
+    :type rows: int
+    :param seed: random seed
+    :type seed: int
+    :param dirty_ratio: share of invalid lines
+    :type dirty_ratio: float
+    :param big: use magnitudes around 1e20 instead of 0..1000
+    :type big: bool
+    """
+    rng = random.Random(seed)
+    scale = 1e21 if big else 1000.0
+
+    def make_line():
+        if rng.random() < dirty_ratio:
+            return rng.choice(DIRTY_NUMBERS)
+        return repr(round(rng.uniform(-scale, scale), 3))
+
+    _write_lines(file_path, rows, make_line)
+
+
+def generate_integers(file_path: str, rows: int, *, seed: int = 0,
+                      dirty_ratio: float = 0.0, big: bool = False):
+    """
+    Writes one integer per line for convert_numbers.
+
+    :param file_path: destination file
+    :type file_path: str
+    :param rows: number of lines
+    :type rows: int
+    :param seed: random seed
+    :type seed: int
+    :param dirty_ratio: share of invalid lines
+    :type dirty_ratio: float
+    :param big: use integers of up to 128 bits instead of up to 10^7
+    :type big: bool
+    """
+    rng = random.Random(seed)
+    limit = 1 << 128 if big else 10_000_000
+
+    def make_line():
+        if rng.random() < dirty_ratio:
+            return rng.choice(DIRTY_INTEGERS)
+        return str(rng.randint(-limit, limit))
+
+    _write_lines(file_path, rows, make_line)
+
+
+def generate_text(file_path: str, rows: int, *, seed: int = 0,
+                  dirty_ratio: float = 0.0, cardinality: int = 5_000):
+    """
+    Writes lines of WORDS_PER_LINE words for count_words.
+
+    Words are drawn from a vocabulary of `cardinality` distinct random words
+    with a Zipf-like skew, so a few words are frequent and most are rare.
+    Each batch of lines gets round(dirty_ratio * tokens) invalid tokens at
+    random positions.
+
+    :param file_path: destination file
+    :type file_path: str
+    :param rows: number of lines
+    :type rows: int
+    :param seed: random seed
+    :type seed: int
+    :param dirty_ratio: share of invalid tokens
+    :type dirty_ratio: float
+    :param cardinality: number of distinct words
+    :type cardinality: int
+    """
+    rng = random.Random(seed)
+    vocab = sorted({
+        "".join(rng.choices(string.ascii_letters, k=rng.randint(2, 12)))
+        for _ in range(cardinality)
+    })
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(vocab))))
+    rng.shuffle(vocab)
+
+    def make_batch(count):
+        tokens = rng.choices(vocab, cum_weights=cum_weights, k=count * WORDS_PER_LINE)
+        dirty = round(dirty_ratio * len(tokens))
+        for position, token in zip(rng.sample(range(len(tokens)), dirty),
+                                   rng.choices(DIRTY_WORDS, k=dirty)):
+            tokens[position] = token
+        return (" ".join(tokens[i:i + WORDS_PER_LINE])
+                for i in range(0, len(tokens), WORDS_PER_LINE))
+
+    _write_batches(file_path, rows, make_batch)
@@ -0,0 +1,290 @@
+"""
+Benchmark suite for compute_statistics, convert_numbers and count_words.
+
+Each workload generates a seeded input (cached in --data-dir), runs the tool's
+CLI in a fresh process and records wall time, rows per second and peak RSS.
+Results can be saved as a JSON baseline and later runs compared against it,
+flagging any throughput or memory regression beyond --threshold.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import generators
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+TOOLS = {
+    "compute_statistics": os.path.join(ROOT, "compute_statistics", "compute_statistics.py"),
+    "convert_numbers": os.path.join(ROOT, "converter", "convert_numbers.py"),
+    "count_words": os.path.join(ROOT, "count_words", "count_words.py"),
+}
+
+WORKLOADS = {
+    "stats-numeric": ("compute_statistics", generators.generate_numeric, {}),
+    "stats-dirty": ("compute_statistics", generators.generate_numeric, {"dirty_ratio": 0.1}),
+    "stats-big": ("compute_statistics", generators.generate_numeric, {"big": True}),
+    "convert-int": ("convert_numbers", generators.generate_integers, {}),
+    "convert-dirty": ("convert_numbers", generators.generate_integers, {"dirty_ratio": 0.1}),
+    "convert-bigint": ("convert_numbers", generators.generate_integers, {"big": True}),
+    "words-text": ("count_words", generators.generate_text, {}),
+    "words-dirty": ("count_words", generators.generate_text, {"dirty_ratio": 0.1}),
+    "words-highcard": ("count_words", generators.generate_text, {"cardinality": 1_000_000}),
+}
+
+
+def initilize_parser():
+    """
+    Initializes argparser to accept params in file execution.
+    """
+    parser = argparse.ArgumentParser(
+        prog="run_benchmarks",
+        description="Benchmarks the three tools on synthetic inputs"
+    )
+
+    parser.add_argument(
+        "--sizes", nargs="+", type=float, default=[1e3, 1e4, 1e5],
+        help="Rows per input, e.g. 1e3 1e6 1e8."
+    )
+    parser.add_argument(
+        "--workloads", nargs="+", choices=sorted(WORKLOADS), default=sorted(WORKLOADS),
+        help="Workloads to run (default: all)."
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generators.")
+    parser.add_argument(
+        "--repeat", type=int, default=1,
+        help="Runs per workload; the fastest one is kept."
+    )
+    parser.add_argument(
+        "--data-dir", default=os.path.join(tempfile.gettempdir(), "tc4017_bench"),
+        help="Directory caching generated inputs."
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file.")
+    parser.add_argument(
+        "--save-baseline", action="store_true",
+        help="Store these results as the new baseline."
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.2,
+        help="Relative slowdown or memory growth reported as a regression."
+    )
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+    return args
+
+
+def workload_input(name: str, rows: int, seed: int, data_dir: str) -> str:
+    """
+    Returns the input file of a workload, generating it if not cached.
+
+    The cached file is named after the generators' VERSION, so inputs of an
+    older generator are never reused.
+
+    :param name: workload name
+    :type name: str
+    :param rows: number of rows
+    :type rows: int
+    :param seed: generator seed
+    :type seed: int
+    :param data_dir: cache directory
+    :type data_dir: str
+    :return: input file path
+    :rtype: str
+    """
+    _, generate, options = WORKLOADS[name]
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"{name}-{rows}-{seed}-v{generators.VERSION}.txt")
+
+    if not os.path.exists(path):
+        # Generate in a fresh process: on Linux a child's peak RSS includes
+        # the parent's RSS at fork time, so the runner itself must stay small.
+        tmp_path = path + ".tmp"
+        proc = multiprocessing.get_context("spawn").Process(
+            target=generate, args=(tmp_path, rows), kwargs={"seed": seed, **options}
+        )
+        proc.start()
+        proc.join()
+        if proc.exitcode != 0:
+            raise RuntimeError(f"generating {name} with {rows} rows failed")
+        os.replace(tmp_path, path)
+
+    return path
+
+
+def run_tool(tool: str, input_path: str) -> dict:
+    """
+    Runs a tool's CLI in a child process and measures it.
+
+    The child writes its result file into a scratch directory and its
+    console output is discarded.
+
+    :param tool: tool name
+    :type tool: str
+    :param input_path: input file
+    :type input_path: str
+    :return: wall seconds and peak RSS in KiB
+    :rtype: dict
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        start = time.perf_counter()
+        with subprocess.Popen(
+            [sys.executable, TOOLS[tool], input_path],
+            cwd=scratch,
+            stdout=subprocess.DEVNULL,
+        ) as proc:
+            _, status, usage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+        seconds = time.perf_counter() - start
+
+    if proc.returncode != 0:
+        raise RuntimeError(f"{tool} failed on {input_path} with exit code {proc.returncode}")
+
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    peak_rss_kib = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return {"seconds": seconds, "peak_rss_kib": peak_rss_kib}
+
+
+def run_workload(name: str, rows: int, seed: int, data_dir: str, repeat: int = 1) -> dict:
+    """
+    Runs one workload and returns its measurements.
+
+    :param name: workload name
+    :type name: str
+    :param rows: number of rows
+    :type rows: int
+    :param seed: generator seed
+    :type seed: int
+    :param data_dir: input cache directory
+    :type data_dir: str
+    :param repeat: runs to make; the fastest is kept
+    :type repeat: int
+    :return: measurements
+    :rtype: dict
+    """
+    tool = WORKLOADS[name][0]
+    input_path = workload_input(name, rows, seed, data_dir)
+    runs = [run_tool(tool, input_path) for _ in range(repeat)]
+    best = min(runs, key=lambda r: r["seconds"])
+
+    return {
+        "workload": name,
+        "tool": tool,
+        "rows": rows,
+        "input_bytes": os.path.getsize(input_path),
+        "seconds": best["seconds"],
+        "rows_per_sec": rows / best["seconds"],
+        "peak_rss_kib": max(r["peak_rss_kib"] for r in runs),
+    }
+
+
+def compare_results(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Compares results with a baseline.
+
+    A result regresses when its throughput drops, or its peak RSS grows, by
+    more than threshold relative to the baseline entry with the same key.
+
+    :param results: key -> measurements
+    :type results: dict
+    :param baseline: key -> measurements
+    :type baseline: dict
+    :param threshold: allowed relative change, e.g. 0.2
+    :type threshold: float
+    :return: description of each regression
+    :rtype: list[str]
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+
+        if result["rows_per_sec"] < base["rows_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{key}: throughput {result['rows_per_sec']:.0f} rows/s "
+                f"vs baseline {base['rows_per_sec']:.0f} rows/s"
+            )
+        if result["peak_rss_kib"] > base["peak_rss_kib"] * (1 + threshold):
+            regressions.append(
+                f"{key}: peak RSS {result['peak_rss_kib']} KiB "
+                f"vs baseline {base['peak_rss_kib']} KiB"
+            )
+    return regressions
+
+
+def _load_json(file_path: str) -> dict:
+    if not os.path.exists(file_path):
+        return {}
+    with open(file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _dump_json(data: dict, file_path: str):
+    with open(file_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    """
+    Program entry point.
+
+    Runs the selected workloads at every size, prints a table of results,
+    compares them with the baseline and exits with status 1 if any
+    regression is found. A baseline saved with another generator VERSION is
+    ignored, and replaced by --save-baseline.
+    """
+    args = initilize_parser()
+
+    results = {}
+    print(f"{'Workload':<16}  {'Rows':>10}  {'Seconds':>9}  {'Rows/s':>12}  {'Peak RSS KiB':>12}")
+    print(f"{'-'*16}  {'-'*10}  {'-'*9}  {'-'*12}  {'-'*12}")
+
+    for size in args.sizes:
+        for name in args.workloads:
+            result = run_workload(name, int(size), args.seed, args.data_dir, args.repeat)
+            results[f"{name}-{int(size)}"] = result
+            print(f"{name:<16}  {result['rows']:>10}  {result['seconds']:>9.3f}  "
+                  f"{result['rows_per_sec']:>12.0f}  {result['peak_rss_kib']:>12}")
+
+    report = {
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "generator_version": generators.VERSION,
+        "results": results,
+    }
+    if args.output:
+        _dump_json(report, args.output)
+
+    saved = _load_json(args.baseline)
+    if saved.get("generator_version") != generators.VERSION:
+        # A baseline measured on other inputs cannot flag regressions.
+        saved = {}
+    regressions = compare_results(results, saved.get("results", {}), args.threshold)
+
+    if args.save_baseline:
+        saved = saved or report
+        saved["machine"] = report["machine"]
+        saved.setdefault("results", {}).update(results)
+        _dump_json(saved, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+
+    for regression in regressions:
+        print(f"[REGRESSION] {regression}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
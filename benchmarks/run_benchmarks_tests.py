@@ -0,0 +1,128 @@
+"""
+Tests for run_benchmarks.py and generators.py
+"""
+
+import json
+import os
+import sys
+
+import generators
+from run_benchmarks import compare_results, main, run_workload, workload_input
+
+
+def test_generators_are_deterministic(tmp_path):
+    """
+    Verifies the same seed produces the same bytes and rows.
+    """
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    c = tmp_path / "c.txt"
+    generators.generate_text(str(a), 50, seed=3, cardinality=100)
+    generators.generate_text(str(b), 50, seed=3, cardinality=100)
+    generators.generate_text(str(c), 50, seed=4, cardinality=100)
+
+    assert a.read_bytes() == b.read_bytes()
+    assert a.read_bytes() != c.read_bytes()
+    assert len(a.read_text(encoding="utf-8").splitlines()) == 50
+
+
+def test_generators_dirty_ratio_and_big_values(tmp_path):
+    """
+    Verifies dirty lines are mixed in and big integers exceed 64 bits.
+    """
+    p = tmp_path / "ints.txt"
+    generators.generate_integers(str(p), 2000, dirty_ratio=0.25, big=True)
+    lines = p.read_text(encoding="utf-8").splitlines()
+
+    ints = []
+    for line in lines:
+        try:
+            ints.append(int(line))
+        except ValueError:
+            pass
+
+    assert len(lines) == 2000
+    assert 300 < 2000 - len(ints) < 700
+    assert max(abs(i) for i in ints) > 2**64
+
+
+def test_generate_text_dirty_ratio_per_batch(tmp_path):
+    """
+    Verifies text gets the requested share of invalid tokens in every batch.
+    """
+    p = tmp_path / "words.txt"
+    rows = generators.BATCH_ROWS + 10
+    generators.generate_text(str(p), rows, dirty_ratio=0.1, cardinality=50)
+    lines = p.read_text(encoding="utf-8").splitlines()
+    tokens = [token for line in lines for token in line.split()]
+
+    assert len(lines) == rows
+    assert all(len(line.split()) == generators.WORDS_PER_LINE for line in lines)
+    assert sum(not token.isalpha() for token in tokens) == len(tokens) // 10
+
+
+def test_compare_results_flags_regressions():
+    """
+    Verifies slowdowns and memory growth past the threshold are flagged.
+    """
+    baseline = {
+        "a-1000": {"rows_per_sec": 1000.0, "peak_rss_kib": 100},
+        "b-1000": {"rows_per_sec": 1000.0, "peak_rss_kib": 100},
+    }
+    results = {
+        "a-1000": {"rows_per_sec": 850.0, "peak_rss_kib": 115},
+        "b-1000": {"rows_per_sec": 700.0, "peak_rss_kib": 200},
+        "c-1000": {"rows_per_sec": 1.0, "peak_rss_kib": 1},
+    }
+
+    regressions = compare_results(results, baseline, threshold=0.2)
+
+    assert len(regressions) == 2
+    assert all(r.startswith("b-1000") for r in regressions)
+
+
+def test_run_workload_measures_each_tool(tmp_path):
+    """
+    Verifies a small workload of each tool runs and is measured.
+    """
+    for name in ["stats-dirty", "convert-bigint", "words-dirty"]:
+        result = run_workload(name, 500, seed=1, data_dir=str(tmp_path))
+
+        assert result["rows"] == 500
+        assert result["rows_per_sec"] > 0
+        assert result["peak_rss_kib"] > 0
+
+
+def test_workload_input_is_regenerated_for_a_new_generator_version(tmp_path, monkeypatch):
+    """
+    Verifies inputs cached by an older generator version are not reused.
+    """
+    old = workload_input("stats-dirty", 100, 0, str(tmp_path))
+    monkeypatch.setattr(generators, "VERSION", generators.VERSION + 1)
+    new = workload_input("stats-dirty", 100, 0, str(tmp_path))
+
+    assert old != new
+    assert f"-v{generators.VERSION}" in new
+    assert os.path.exists(old) and os.path.exists(new)
+
+
+def test_main_ignores_baseline_of_another_generator_version(tmp_path, monkeypatch):
+    """
+    Verifies a baseline measured on older inputs flags nothing and is
+    replaced by --save-baseline.
+    """
+    baseline = tmp_path / "baselines.json"
+    baseline.write_text(json.dumps({
+        "generator_version": generators.VERSION - 1,
+        "results": {"stats-dirty-100": {"rows_per_sec": 1e12, "peak_rss_kib": 1}},
+    }), encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", [
+        "run_benchmarks", "--sizes", "100", "--workloads", "stats-dirty",
+        "--data-dir", str(tmp_path / "data"), "--baseline", str(baseline), "--save-baseline",
+    ])
+
+    main()
+
+    saved = json.loads(baseline.read_text(encoding="utf-8"))
+    assert saved["generator_version"] == generators.VERSION
+    assert saved["results"]["stats-dirty-100"]["rows_per_sec"] < 1e12
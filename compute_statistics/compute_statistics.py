@@ -4,22 +4,142 @@ standard deviation.
 """
 
 import argparse
+import heapq
+import itertools
+import os
+import sys
 import time
+from array import array
+from dataclasses import dataclass, field
+
+# Helpers shared by the three tools live in ../shared.
+SHARED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared")
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
+
+# pylint: disable=wrong-import-position,import-error
+from execution_planner import is_small, log_plan, sample_inputs, stat_inputs
+from input_stream import STDIN, open_input, open_source
+from result_cache import DEFAULT_MAX_BYTES, ResultCache
+from result_writers import (
+    FORMATS,
+    STDOUT,
+    open_result,
+    open_writer,
+    output_path,
+    redirect_to_stdout,
+)
+from stage_profiler import StageProfiler, write_report
+# pylint: enable=wrong-import-position,import-error
+
+ENGINES = ("auto", "memory", "stream")
+
+# Planner estimate of the bytes the memory engine holds per input line: the
+# float and its list slots, plus its share of the mode's frequency table.
+MEMORY_ROW_BYTES = 96
+SORT_RUN_VALUES = 1 << 20
+
+RESULTS_FILE = "StatisticsResults.txt"
+STATISTICS_COLUMNS = (
+    "valid_count", "invalid_count", "mean", "median", "mode", "variance", "std_dev"
+)
+STATISTICS_TYPES = ("int", "int", "float", "float", "string", "float", "float")
 
 
 def initilize_parser():
     """
     Initializes argparser to accept params in file execution.
 
-    file: name of the file.
+    file: name of the file, '-' for stdin.
+    --engine: memory or stream engine, picked from the input size by default.
+    --explain-plan: print the chosen engine and why to stderr.
+    --memory-budget: MiB the run may use, half the available memory by default.
+    --format: text, csv, jsonl or columnar results.
+    --output: results file, StatisticsResults with the format's extension by
+        default; '-' writes results to stdout and messages to stderr.
+    --profile: emit a per-stage JSON profile to a file, or stderr unless
+      --output - is given.
+    --cprofile: also dump cProfile stats to a file.
+    --cache: replay results of inputs already seen from the result cache.
+    --cache-dir: directory of the result cache, implies --cache.
+    --cache-size: maximum size of the result cache in MiB.
     """
     parser = argparse.ArgumentParser(
         prog="compute_statistics",
         description="Computes descriptive statistics from a file with numbers"
     )
 
-    parser.add_argument("file", help="The name of the file to process.")
+    parser.add_argument("file", help="The name of the file to process, '-' for stdin.")
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="auto",
+        help="Engine; 'auto' picks one from the input size and memory."
+    )
+    parser.add_argument(
+        "--explain-plan",
+        action="store_true",
+        help="Print the chosen engine and why to stderr."
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        metavar="MIB",
+        help="MiB the run may use when picking the engine."
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        help="Format of the results file."
+    )
+    parser.add_argument(
+        "--output",
+        metavar="PATH",
+        help="Results file, '-' for stdout (default: StatisticsResults with the "
+             "format's extension)."
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="PATH",
+        help="Emit a per-stage JSON profile to PATH (stderr if omitted, which "
+             "--output - does not allow)."
+    )
+    parser.add_argument(
+        "--cprofile",
+        metavar="PATH",
+        help="Also dump cProfile stats of the run to PATH."
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Replay results of an input already seen from the result cache."
+    )
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="Directory of the result cache (implies --cache)."
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=DEFAULT_MAX_BYTES / 2**20,
+        metavar="MIB",
+        help="Maximum size of the result cache in MiB."
+    )
     args = parser.parse_args()
+
+    if args.cache_dir:
+        args.cache = True
+    if args.output is None:
+        args.output = output_path(RESULTS_FILE, args.format)
+    if args.memory_budget is not None and args.memory_budget <= 0:
+        parser.error("--memory-budget must be positive")
+    if args.output == STDOUT and args.profile == "":
+        parser.error("--profile needs a PATH with --output -, as stderr holds the "
+                     "console output")
     return args
 
 
@@ -32,34 +152,118 @@ def file_to_list(file_path: str):
     :return: (numbers_list, invalid_count)
     :rtype: tuple[list, int]
     """
-    lines_list = []
+    with open_input(file_path) as f:
+        return lines_to_list(f)
+
+
+def file_to_array(file_path: str):
+    """
+    Returns the valid numbers in file packed in an array of doubles.
+
+    Invalid lines are reported and counted like in file_to_list(), but no
+    placeholder is kept for them.
+
+    :param file_path: file route
+    :type file_path: str
+    :return: (values, invalid_count)
+    :rtype: tuple[array, int]
+    """
+    with open_input(file_path) as f:
+        return lines_to_array(f)
+
+
+def lines_to_array(lines, invalid: list = None):
+    """
+    Parses an iterable of lines, packing the valid numbers in an array.
+
+    :param lines: lines of text, e.g. an open file
+    :param invalid: if given, collects (line_no, line) of invalid lines
+        instead of reporting them
+    :type invalid: list
+    :return: (values, invalid_count)
+    :rtype: tuple[array, int]
+    """
+    values = array("d")
     invalid_count = 0
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        for line_no, line in enumerate(f, start=1):
-            raw = line.rstrip("\n")
-            s = raw.strip()
+    for value in iter_numbers(lines, invalid):
+        if isinstance(value, float):
+            values.append(value)
+        else:
+            invalid_count += 1
 
-            if s == "":
-                print(f"[ERROR] Line {line_no}: empty line -> treated as nan")
-                lines_list.append("nan")
-                invalid_count += 1
-                continue
+    return values, invalid_count
 
-            try:
-                value = float(s)
-                if value == float("inf") or value == float("-inf"):
-                    raise ValueError("Infinity is not allowed")
 
-                lines_list.append(value)
-            except ValueError:
-                print(f"[ERROR] Line {line_no}: invalid float '{raw}' -> treated as nan")
-                lines_list.append("nan")
-                invalid_count += 1
+def lines_to_list(lines, invalid: list = None):
+    """
+    Parses an iterable of lines, replacing invalid lines with 'nan'.
+
+    :param lines: lines of text, e.g. an open file
+    :param invalid: if given, collects (line_no, line) of invalid lines
+        instead of reporting them
+    :type invalid: list
+    :return: (numbers_list, invalid_count)
+    :rtype: tuple[list, int]
+    """
+    lines_list = []
+    invalid_count = 0
+
+    for value in iter_numbers(lines, invalid):
+        lines_list.append(value)
+        if not isinstance(value, float):
+            invalid_count += 1
 
     return lines_list, invalid_count
 
 
+def parse_number(s: str):
+    """
+    Parses a stripped line as a finite or NaN float.
+
+    :param s: stripped line
+    :type s: str
+    :return: the float, or None if s is not a valid number
+    :rtype: float
+    """
+    try:
+        value = float(s)
+    except ValueError:
+        return None
+
+    if value == float("inf") or value == float("-inf"):
+        return None
+    return value
+
+
+def iter_numbers(lines, invalid: list = None):
+    """
+    Lazily parses lines, yielding 'nan' for invalid lines after reporting them.
+
+    :param lines: lines of text, e.g. an open file
+    :param invalid: if given, collects (line_no, line) of invalid lines
+        instead of reporting them
+    :type invalid: list
+    :return: iterator of floats and 'nan' placeholders
+    """
+    for line_no, line in enumerate(lines, start=1):
+        raw = line.rstrip("\n")
+        s = raw.strip()
+        value = parse_number(s) if s else None
+
+        if value is not None:
+            yield value
+            continue
+
+        if invalid is not None:
+            invalid.append((line_no, raw))
+        elif s == "":
+            print(f"[ERROR] Line {line_no}: empty line -> treated as nan")
+        else:
+            print(f"[ERROR] Line {line_no}: invalid float '{raw}' -> treated as nan")
+        yield "nan"
+
+
 def compute_mean(values: list) -> tuple[float, int]:
     """
     Computes mean using basic summation.
@@ -148,6 +352,69 @@ def compute_mode(values: list):
     return sorted(modes)
 
 
+def sort_runs(values: array) -> list:
+    """
+    Sorts values in place, one run of SORT_RUN_VALUES at a time.
+
+    Only one run is copied while sorting, so this costs little memory on
+    top of the packed values.
+
+    :param values: packed floats, reordered in place
+    :type values: array
+    :return: memoryviews of the sorted runs
+    :rtype: list
+    """
+    view = memoryview(values)
+    runs = []
+
+    for begin in range(0, len(values), SORT_RUN_VALUES):
+        run = view[begin:begin + SORT_RUN_VALUES]
+        run[:] = array("d", sorted(run))
+        runs.append(run)
+
+    return runs
+
+
+def compute_median_and_mode(values: array) -> tuple:
+    """
+    Computes median and mode in one pass over the merged sorted runs.
+
+    Gives the same results as compute_median() and compute_mode() without
+    a full sorted copy or a frequency dictionary.
+
+    :param values: packed valid floats, reordered in place
+    :type values: array
+    :return: (median, mode(s) or 'nan')
+    :rtype: tuple
+    """
+    n = len(values)
+    if n == 0:
+        return float("nan"), "nan"
+
+    lower = upper = None
+    modes = []
+    max_count = 0
+    position = 0
+
+    for value, group in itertools.groupby(heapq.merge(*sort_runs(values))):
+        count = sum(1 for _ in group)
+        position += count
+
+        if lower is None and (n - 1) // 2 < position:
+            lower = value
+        if upper is None and n // 2 < position:
+            upper = value
+
+        if count > max_count:
+            max_count = count
+            modes = [value]
+        elif count == max_count:
+            modes.append(value)
+
+    median = float(upper) if n % 2 == 1 else (lower + upper) / 2.0
+    return median, "nan" if max_count == 1 else modes
+
+
 def compute_variance(values: list, mean_value: float) -> float:
     """
     Computes population variance.
@@ -200,43 +467,150 @@ def compute_standard_deviation(variance_value: float) -> float:
     return guess
 
 
-def statistics_to_file(stats: dict, time_elapsed: float):
+def statistics_to_file(stats: dict, time_elapsed: float,
+                       output=RESULTS_FILE, fmt: str = "text"):
     """
-    Writes statistics results to StatisticsResults.txt.
+    Writes statistics results to StatisticsResults.txt, or to output.
+
+    The text report is written in a single write. Other formats hold one
+    row with a column per statistic.
+
+    :param stats: statistics, as returned by Statistics.to_dict()
+    :type stats: dict
+    :param time_elapsed: execution time in seconds
+    :type time_elapsed: float
+    :param output: file path or writable stream
+    :param fmt: 'text', 'csv', 'jsonl' or 'columnar'
+    :type fmt: str
     """
-    with open("StatisticsResults.txt", "w", encoding="utf-8") as f:
-        f.write(f"Execution time: {time_elapsed:.6f} seconds\n")
-        f.write(f"Valid numbers: {stats["valid_count"]}\n")
-        f.write(f"Invalid lines: {stats["invalid_count"]}\n\n")
-
-        f.write("Descriptive Statistics\n")
-        f.write("----------------------\n")
-        f.write(f"Mean: {stats["mean"]}\n")
-        f.write(f"Median: {stats["median"]}\n")
-        f.write(f"Mode: {stats["mode"]}\n")
-        f.write(f"Variance: {stats["variance"]}\n")
-        f.write(f"Standard Deviation: {stats["std_dev"]}\n")
+    if fmt != "text":
+        meta = {"tool": "compute_statistics", "execution_time": time_elapsed}
+        with open_writer(fmt, output, STATISTICS_COLUMNS, meta, STATISTICS_TYPES) as writer:
+            writer.write_rows([[stats[column] for column in STATISTICS_COLUMNS]])
+        return
+
+    with open_result(output) as f:
+        f.write(
+            f"Execution time: {time_elapsed:.6f} seconds\n"
+            f"Valid numbers: {stats["valid_count"]}\n"
+            f"Invalid lines: {stats["invalid_count"]}\n\n"
+            "Descriptive Statistics\n"
+            "----------------------\n"
+            f"Mean: {stats["mean"]}\n"
+            f"Median: {stats["median"]}\n"
+            f"Mode: {stats["mode"]}\n"
+            f"Variance: {stats["variance"]}\n"
+            f"Standard Deviation: {stats["std_dev"]}\n"
+        )
+
+
+def _sample_tokens(line: str) -> list:
+    return [parse_number(line.strip())]
+
+
+def plan_engine(args) -> str:
+    """
+    Picks the engine for args.file and logs the decision.
 
+    Small inputs keep the in-memory engine without being sampled, unless a
+    memory budget is given. Stdin, of unknown size, keeps the values packed
+    with the stream engine. For the others the parsed size is estimated
+    from a sample; past the budget the stream engine keeps the values packed.
 
-def main():
+    :param args: parsed command-line arguments
+    :return: 'memory' or 'stream'
+    :rtype: str
     """
-    Program entry point.
+    budget = None if args.memory_budget is None else int(args.memory_budget * 2**20)
+    profile = stat_inputs([args.file], budget)
+
+    if args.engine != "auto":
+        engine, reason = args.engine, "forced by --engine"
+    elif profile["stdin"]:
+        engine, reason = "stream", "stdin of unknown size"
+    elif args.memory_budget is None and is_small(profile):
+        engine, reason = "memory", "small input"
+    else:
+        sample_inputs(profile, [args.file], _sample_tokens)
+        if profile["rows"] * MEMORY_ROW_BYTES <= profile["memory_budget"]:
+            engine, reason = "memory", "parsed values fit the budget"
+        else:
+            engine, reason = "stream", "parsed values past the budget"
+
+    if args.explain_plan:
+        log_plan("compute_statistics", engine, reason, profile)
+    return engine
+
+
+def statistics_in_memory(source, profiler: StageProfiler = None, invalid: list = None):
     """
-    start = time.time()
+    Computes the statistics of an input from a list of its lines' values.
+
+    :param source: file path, bytes, buffer or iterable of lines
+    :param profiler: profiler timing the parse and each statistic
+    :type profiler: StageProfiler
+    :param invalid: if given, collects (line_no, line) of invalid lines
+        instead of reporting them
+    :type invalid: list
+    :return: (stats, rows)
+    :rtype: tuple[dict, int]
+    """
+    profiler = profiler or StageProfiler("compute_statistics")
+
+    with profiler.stage("parse"), open_source(source) as lines:
+        numbers_list, invalid_count = lines_to_list(lines, invalid)
+
+    with profiler.stage("mean"):
+        mean_value, valid_count = compute_mean(numbers_list)
+    with profiler.stage("median"):
+        median_value = compute_median(numbers_list)
+    with profiler.stage("mode"):
+        mode_value = compute_mode(numbers_list)
+    with profiler.stage("variance"):
+        variance_value = compute_variance(numbers_list, mean_value)
+    with profiler.stage("std_dev"):
+        std_dev_value = compute_standard_deviation(variance_value)
 
-    args = initilize_parser()
-    filename = args.file
+    stats = {
+        "invalid_count": invalid_count,
+        "mean": mean_value,
+        "median": median_value,
+        "valid_count": valid_count,
+        "mode": mode_value,
+        "variance": variance_value,
+        "std_dev": std_dev_value,
+    }
+    return stats, len(numbers_list)
 
-    numbers_list, invalid_count = file_to_list(filename)
 
-    mean_value, valid_count = compute_mean(numbers_list)
-    median_value = compute_median(numbers_list)
-    mode_value = compute_mode(numbers_list)
-    variance_value = compute_variance(numbers_list, mean_value)
-    std_dev_value = compute_standard_deviation(variance_value)
+def statistics_streaming(source, profiler: StageProfiler = None, invalid: list = None):
+    """
+    Computes the statistics of an input from its valid values packed in an
+    array, 8 bytes each. Median and mode come from merged sorted runs.
+
+    :param source: file path, bytes, buffer or iterable of lines
+    :param profiler: profiler timing the parse and each statistic
+    :type profiler: StageProfiler
+    :param invalid: if given, collects (line_no, line) of invalid lines
+        instead of reporting them
+    :type invalid: list
+    :return: (stats, rows)
+    :rtype: tuple[dict, int]
+    """
+    profiler = profiler or StageProfiler("compute_statistics")
+
+    with profiler.stage("parse"), open_source(source) as lines:
+        values, invalid_count = lines_to_array(lines, invalid)
 
-    end = time.time()
-    execution_time = end - start
+    # Mean and variance run first, on the values in input order.
+    with profiler.stage("mean"):
+        mean_value, valid_count = compute_mean(values)
+    with profiler.stage("variance"):
+        variance_value = compute_variance(values, mean_value)
+    with profiler.stage("std_dev"):
+        std_dev_value = compute_standard_deviation(variance_value)
+    with profiler.stage("median_mode"):
+        median_value, mode_value = compute_median_and_mode(values)
 
     stats = {
         "invalid_count": invalid_count,
@@ -247,20 +621,157 @@ def main():
         "variance": variance_value,
         "std_dev": std_dev_value,
     }
+    return stats, valid_count + invalid_count
+
+
+@dataclass(slots=True)
+class Statistics:  # pylint: disable=too-many-instance-attributes
+    """
+    Descriptive statistics of an input, as returned by describe().
+
+    mode is the sorted list of modes, or 'nan' when every value appears
+    once. invalid_lines holds (line_no, line) of the invalid lines, unless
+    they were printed.
+    """
 
-    statistics_to_file(stats, execution_time)
+    valid_count: int
+    invalid_count: int
+    mean: float
+    median: float
+    mode: list | str
+    variance: float
+    std_dev: float
+    invalid_lines: list = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the statistics as the dict written by statistics_to_file().
+
+        :return: statistics without the invalid lines
+        :rtype: dict
+        """
+        return {
+            "invalid_count": self.invalid_count,
+            "mean": self.mean,
+            "median": self.median,
+            "valid_count": self.valid_count,
+            "mode": self.mode,
+            "variance": self.variance,
+            "std_dev": self.std_dev,
+        }
+
+
+def describe(source, engine: str = "memory", output=None, verbose: bool = False,
+             fmt: str = "text") -> Statistics:
+    """
+    Computes the descriptive statistics of source, in process.
+
+    Nothing is written or printed unless asked: output receives the same
+    report as StatisticsResults.txt, and verbose prints the [ERROR] lines of
+    the CLI instead of collecting them in the result.
+
+    :param source: file path, bytes, buffer, or iterable of lines or numbers
+    :param engine: 'memory', or 'stream' to keep values packed in an array
+    :type engine: str
+    :param output: optional file path or writable stream for the report
+    :param verbose: print invalid lines as they are found
+    :type verbose: bool
+    :param fmt: format of the report, see statistics_to_file()
+    :type fmt: str
+    :return: the statistics
+    :rtype: Statistics
+    :raises ValueError: if engine is unknown
+    """
+    if engine not in ENGINES[1:]:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES[1:])}")
+
+    start = time.time()
+    invalid = None if verbose else []
+    compute = statistics_streaming if engine == "stream" else statistics_in_memory
+    stats, _ = compute(source, invalid=invalid)
+
+    if output is not None:
+        statistics_to_file(stats, time.time() - start, output, fmt)
+    return Statistics(**stats, invalid_lines=invalid or [])
+
+
+def process_file(args, start: float):
+    """
+    Computes the statistics of args.file, writes them to args.output in
+    args.format and prints them. plan_engine() picks whether the values are kept in a list
+    or packed in an array.
+
+    With --profile the run is broken down by stage (plan, parse, each
+    statistic, write) and reported as JSON with the tracemalloc peak and
+    rows/sec.
+
+    :param args: parsed command-line arguments
+    :param start: time.time() at program start
+    :type start: float
+    """
+    profiler = StageProfiler("compute_statistics", args.profile is not None, args.cprofile)
+
+    with profiler.stage("plan"):
+        engine = plan_engine(args)
+
+    if engine == "stream":
+        stats, rows = statistics_streaming(args.file, profiler)
+    else:
+        stats, rows = statistics_in_memory(args.file, profiler)
+
+    end = time.time()
+    execution_time = end - start
 
-    print(f"Valid numbers: {valid_count}")
-    print(f"Invalid lines: {invalid_count}")
+    with profiler.stage("write"):
+        statistics_to_file(stats, execution_time, args.output, args.format)
+
+    print(f"Valid numbers: {stats['valid_count']}")
+    print(f"Invalid lines: {stats['invalid_count']}")
     print("Descriptive Statistics")
     print("----------------------")
-    print(f"Mean: {mean_value:.2f}")
-    print(f"Median: {median_value:.2f}")
-    print(f"Mode: {mode_value}")
-    print(f"Variance: {variance_value:.2f}")
-    print(f"Standard Deviation: {std_dev_value:.2f}")
+    print(f"Mean: {stats['mean']:.2f}")
+    print(f"Median: {stats['median']:.2f}")
+    print(f"Mode: {stats['mode']}")
+    print(f"Variance: {stats['variance']:.2f}")
+    print(f"Standard Deviation: {stats['std_dev']:.2f}")
     print(f"Execution took {execution_time:.6f} seconds")
 
+    if args.profile is not None or args.cprofile:
+        report = profiler.finish(rows, input=args.file)
+        if args.profile is not None:
+            write_report(report, args.profile or None)
+
+
+def main():
+    """
+    Program entry point.
+
+    With --cache the result files and console output of an input already
+    seen with the same options are replayed from the result cache, without
+    parsing the input. Runs reading stdin or writing to stdout bypass it.
+
+    With --output - the results go to stdout once the input ends, and the
+    console output to stderr so it does not mix with them.
+    """
+    start = time.time()
+
+    args = initilize_parser()
+
+    if args.output == STDOUT:
+        with redirect_to_stdout() as stdout:
+            args.output = stdout
+            process_file(args, start)
+        return
+
+    if not args.cache or args.profile is not None or args.cprofile or args.file == STDIN:
+        process_file(args, start)
+        return
+
+    cache = ResultCache(args.cache_dir, int(args.cache_size * 2**20))
+    key = cache.key("compute_statistics", [args.file], {"format": args.format})
+    cache.run("compute_statistics", key, [args.output],
+              lambda: process_file(args, start))
+
 
 if __name__ == "__main__":
     main()
@@ -2,16 +2,31 @@
 Tests for compute_statistics.py
 """
 
+import gzip
+import io
+import json
+import lzma
+import math
+import sys
+from array import array
+
 import pytest
 
+import compute_statistics
 from compute_statistics import (
+    describe,
     file_to_list,
+    file_to_array,
+    compute_median_and_mode,
     compute_mean,
     compute_median,
     compute_mode,
     compute_variance,
     compute_standard_deviation,
     statistics_to_file,
+    statistics_in_memory,
+    statistics_streaming,
+    main,
 )
 
 
@@ -142,3 +157,230 @@ def test_full_pipeline_file_to_output(tmp_path, monkeypatch):
     assert "Variance:" in text
     assert "Standard Deviation:" in text
     assert "Invalid lines: 1" in text
+
+
+def test_file_to_list_reads_compressed_input(tmp_path):
+    """
+    Verifies gzip and xz inputs are detected by magic bytes and decompressed.
+    """
+    data = b"1.5\nbad\n2.5\n"
+    gz_path = tmp_path / "nums.data"
+    gz_path.write_bytes(gzip.compress(data))
+    xz_path = tmp_path / "nums.txt"
+    xz_path.write_bytes(lzma.compress(data))
+
+    assert file_to_list(str(gz_path)) == ([1.5, "nan", 2.5], 1)
+    assert file_to_list(str(xz_path)) == ([1.5, "nan", 2.5], 1)
+
+
+def test_main_profile_reports_stages_as_json(tmp_path, monkeypatch, capsys):
+    """
+    Verifies --profile writes per-stage timings, memory peak and rows/sec.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "nums.txt"
+    inp.write_text("1\n2\n2\nbad\n", encoding="utf-8")
+    profile_path = tmp_path / "profile.json"
+    monkeypatch.setattr(sys, "argv", [
+        "compute_statistics", str(inp), "--profile", str(profile_path),
+    ])
+
+    main()
+
+    report = json.loads(profile_path.read_text(encoding="utf-8"))
+    assert report["tool"] == "compute_statistics"
+    assert report["rows"] == 4
+    assert set(report["stages_ns"]) == {
+        "plan", "parse", "mean", "median", "mode", "variance", "std_dev", "write",
+    }
+    assert report["tracemalloc_peak_bytes"] > 0
+    assert report["rows_per_sec"] > 0
+    assert "Valid numbers: 3" in capsys.readouterr().out
+
+
+def test_main_cache_hit_rewrites_results(tmp_path, monkeypatch, capsys):
+    """
+    Verifies --cache serves an identical input from the cache.
+    """
+    monkeypatch.chdir(tmp_path)
+    for name in ["a.txt", "b.txt"]:
+        (tmp_path / name).write_text("1\n2\n2\n", encoding="utf-8")
+
+    for name in ["a.txt", "b.txt"]:
+        monkeypatch.setattr(sys, "argv", [
+            "compute_statistics", name, "--cache-dir", str(tmp_path / "cache"),
+        ])
+        main()
+
+    out = capsys.readouterr().out
+    assert "[CACHE] miss (hits: 0, misses: 1)" in out
+    assert "[CACHE] hit (hits: 1, misses: 1)" in out
+    assert out.count("Mode: [2.0]") == 2
+
+
+@pytest.mark.parametrize("values", [
+    [3.0, 1.0, 2.0, 2.0, 5.0, 1.0, 4.0],
+    [2.5, -1.0, 2.5, 7.0, -1.0, 0.5],
+    [4.0, 1.0, 3.0, 2.0],
+    [9.0],
+    [],
+])
+def test_median_and_mode_match_in_memory(values, monkeypatch):
+    """
+    Verifies the sorted-runs median and mode match compute_median and
+    compute_mode, across several runs.
+    """
+    monkeypatch.setattr(compute_statistics, "SORT_RUN_VALUES", 2)
+    median_value, mode_value = compute_median_and_mode(array("d", values))
+
+    if values:
+        assert median_value == compute_median(values)
+    else:
+        assert math.isnan(median_value)
+    assert mode_value == compute_mode(values)
+
+
+def test_stream_engine_matches_memory_engine(tmp_path, capsys):
+    """
+    Verifies both engines give the same statistics and error messages.
+    """
+    inp = tmp_path / "nums.txt"
+    inp.write_text("1.5\n\n-2\nabc\n2\n1.5\ninf\n10\n", encoding="utf-8")
+
+    expected, expected_rows = statistics_in_memory(str(inp))
+    expected_out = capsys.readouterr().out
+    stats, rows = statistics_streaming(str(inp))
+
+    assert stats == expected
+    assert rows == expected_rows == 8
+    assert capsys.readouterr().out == expected_out
+    assert file_to_array(str(inp)) == (array("d", [1.5, -2.0, 2.0, 1.5, 10.0]), 3)
+
+
+def test_main_forced_stream_engine(tmp_path, monkeypatch, capsys):
+    """
+    Verifies --engine stream is logged and writes the usual results.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "nums.txt"
+    inp.write_text("1\n2\n2\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", [
+        "compute_statistics", str(inp), "--engine", "stream", "--explain-plan",
+    ])
+
+    main()
+
+    captured = capsys.readouterr()
+    assert captured.err.startswith("[PLAN] compute_statistics: stream engine, forced by --engine")
+    assert "[PLAN]" not in captured.out
+    assert "Mode: [2.0]" in (tmp_path / "StatisticsResults.txt").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("source", [
+    ["1", "2", "2", "bad"],
+    [1.0, 2, 2, "bad"],
+    b"1\n2\n2\nbad\n",
+    io.BytesIO(b"1\n2\n2\nbad\n"),
+    io.StringIO("1\n2\n2\nbad\n"),
+])
+def test_describe_accepts_iterables_and_buffers(source, capsys):
+    """
+    Verifies describe() returns statistics without printing or writing.
+    """
+    stats = describe(source)
+
+    assert (stats.valid_count, stats.invalid_count) == (3, 1)
+    assert stats.mode == [2.0]
+    assert stats.invalid_lines == [(4, "bad")]
+    assert capsys.readouterr().out == ""
+    assert not hasattr(stats, "__dict__")
+
+
+def test_describe_writes_report_on_request(tmp_path, capsys):
+    """
+    Verifies output and verbose reproduce the CLI's report and messages.
+    """
+    inp = tmp_path / "nums.txt"
+    inp.write_text("4\n\n8\n", encoding="utf-8")
+    report = io.StringIO()
+
+    stats = describe(str(inp), engine="stream", output=report, verbose=True)
+
+    assert stats.mean == 6.0 and not stats.invalid_lines
+    assert "Mean: 6.0\nMedian: 6.0\n" in report.getvalue()
+    assert capsys.readouterr().out == "[ERROR] Line 2: empty line -> treated as nan\n"
+    with pytest.raises(ValueError):
+        describe([], engine="auto")
+
+
+def test_main_writes_jsonl_to_output(tmp_path, monkeypatch, capsys):
+    """
+    Verifies --format jsonl --output writes one object with every statistic.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "nums.txt"
+    inp.write_text("1\n2\n2\nbad\n", encoding="utf-8")
+    out = tmp_path / "stats.jsonl"
+    monkeypatch.setattr(sys, "argv", [
+        "compute_statistics", str(inp), "--format", "jsonl", "--output", str(out),
+    ])
+
+    main()
+    capsys.readouterr()
+
+    (row,) = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert row["valid_count"] == 3 and row["invalid_count"] == 1
+    assert row["mode"] == [2.0]
+    assert not (tmp_path / "StatisticsResults.txt").exists()
+
+
+def test_main_reads_stdin_and_writes_results_to_stdout(monkeypatch, capsys):
+    """
+    Verifies '-' reads stdin with the stream engine and --output - prints
+    only the results to stdout.
+    """
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b"4\nx\n8\n")))
+    monkeypatch.setattr(sys, "argv", ["compute_statistics", "-", "--output", "-", "--explain-plan"])
+
+    main()
+
+    captured = capsys.readouterr()
+    assert captured.out.splitlines()[1:3] == ["Valid numbers: 2", "Invalid lines: 1"]
+    assert "Mean: 6.0" in captured.out
+    assert captured.err.startswith("[PLAN] compute_statistics: stream engine, stdin")
+    assert "Mean: 6.00" in captured.err
+
+
+def test_main_rejects_profile_to_stderr_with_stdout_output(monkeypatch, capsys):
+    """
+    Verifies --output - refuses --profile without a PATH, whose report would
+    land among the console output on stderr.
+    """
+    monkeypatch.setattr(sys, "argv", ["compute_statistics", "-", "--output", "-", "--profile"])
+
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+
+    assert excinfo.value.code == 2
+    assert "--profile needs a PATH with --output -" in capsys.readouterr().err
+
+
+def test_main_cprofile_alone_dumps_stats(tmp_path, monkeypatch, capsys):
+    """
+    Verifies --cprofile without --profile dumps stats on every run, even
+    with the result cache, and prints no JSON report.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "nums.txt"
+    inp.write_text("1\n2\n", encoding="utf-8")
+    prof = tmp_path / "run.prof"
+    monkeypatch.setattr(sys, "argv", [
+        "compute_statistics", str(inp), "--cprofile", str(prof),
+        "--cache-dir", str(tmp_path / "cache"),
+    ])
+
+    for _ in range(2):
+        main()
+        assert prof.stat().st_size > 0
+        assert capsys.readouterr().err == ""
+        prof.unlink()
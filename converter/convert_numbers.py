@@ -1,22 +1,143 @@
 """Script that converts decimals to binary and hexadecimal."""
 
 import argparse
+import contextlib
+import os
+import sys
+import tempfile
 import time
+from dataclasses import dataclass, field
+
+# Helpers shared by the three tools live in ../shared.
+SHARED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared")
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
+
+# pylint: disable=wrong-import-position,import-error
+from execution_planner import is_small, log_plan, sample_inputs, stat_inputs
+from input_stream import STDIN, open_input, open_source
+from result_cache import DEFAULT_MAX_BYTES, ResultCache
+from result_writers import (
+    FORMATS,
+    STDOUT,
+    open_result,
+    open_writer,
+    output_path,
+    redirect_to_stdout,
+    write_lines,
+)
+from stage_profiler import StageProfiler, write_report
+# pylint: enable=wrong-import-position,import-error
+
+ENGINES = ('auto', 'memory', 'stream')
+
+# Planner estimate of the bytes the memory engine holds per input line: the
+# int, its binary and hexadecimal strings, their list slots and printouts.
+MEMORY_ROW_BYTES = 256
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+RESULTS_FILE = 'ConversionResults.txt'
+
+# Header and width of the column of a base in ConversionResults.txt.
+BASE_COLUMNS = {2: ('Binary', 12), 16: ('Hex', 8)}
+
 
 def initilize_parser():
     """
     Initializes argparser to accept params in file execution.
 
-    file: number of the file.
-    
+    file: number of the file, '-' for stdin.
+    --engine: memory or stream engine, picked from the input size by default.
+    --explain-plan: print the chosen engine and why to stderr.
+    --memory-budget: MiB the run may use, half the available memory by default.
+    --format: text, csv, jsonl or columnar results.
+    --output: results file, ConversionResults with the format's extension by
+        default; '-' streams rows to stdout and messages to stderr.
+    --profile: emit a per-stage JSON profile to a file, or stderr unless
+      --output - is given.
+    --cprofile: also dump cProfile stats to a file.
+    --cache: replay results of inputs already seen from the result cache.
+    --cache-dir: directory of the result cache, implies --cache.
+    --cache-size: maximum size of the result cache in MiB.
+
     """
     parser = argparse.ArgumentParser(
         prog='convert_numbers',
         description='Converts file numbers to binary and hexadecimal base'
     )
 
-    parser.add_argument('file', help="The name of the file to process.")
+    parser.add_argument('file', help="The name of the file to process, '-' for stdin.")
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES,
+        default='auto',
+        help="Engine; 'auto' picks one from the input size and memory."
+    )
+    parser.add_argument(
+        '--explain-plan',
+        action='store_true',
+        help="Print the chosen engine and why to stderr."
+    )
+    parser.add_argument(
+        '--memory-budget',
+        type=float,
+        metavar='MIB',
+        help="MiB the run may use when picking the engine."
+    )
+    parser.add_argument(
+        '--format',
+        choices=FORMATS,
+        default='text',
+        help="Format of the results file."
+    )
+    parser.add_argument(
+        '--output',
+        metavar='PATH',
+        help="Results file, '-' for stdout (default: ConversionResults with the "
+             "format's extension)."
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='',
+        metavar='PATH',
+        help="Emit a per-stage JSON profile to PATH (stderr if omitted, which "
+             "--output - does not allow)."
+    )
+    parser.add_argument(
+        '--cprofile',
+        metavar='PATH',
+        help="Also dump cProfile stats of the run to PATH."
+    )
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help="Replay results of an input already seen from the result cache."
+    )
+    parser.add_argument(
+        '--cache-dir',
+        metavar='DIR',
+        help="Directory of the result cache (implies --cache)."
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=float,
+        default=DEFAULT_MAX_BYTES / 2**20,
+        metavar='MIB',
+        help="Maximum size of the result cache in MiB."
+    )
     args = parser.parse_args()
+
+    if args.cache_dir:
+        args.cache = True
+    if args.output is None:
+        args.output = output_path(RESULTS_FILE, args.format)
+    if args.memory_budget is not None and args.memory_budget <= 0:
+        parser.error("--memory-budget must be positive")
+    if args.output == STDOUT and args.profile == "":
+        parser.error("--profile needs a PATH with --output -, as stderr holds the "
+                     "console output")
     return args
 
 
@@ -29,97 +150,169 @@ def file_to_list(file_path: str):
     :return: (numbers_list, invalid_count)
     :rtype: tuple[list, int]
     """
+    with open_input(file_path) as f:
+        return lines_to_list(f)
+
+
+def lines_to_list(lines, invalid: list = None):
+    """
+    Parses an iterable of lines, replacing invalid lines with 'nan'.
+
+    :param lines: lines of text, e.g. an open file
+    :param invalid: if given, collects (line_no, line) of invalid lines
+        instead of reporting them
+    :type invalid: list
+    :return: (numbers_list, invalid_count)
+    :rtype: tuple[list, int]
+    """
     lines_list = []
     invalid_count = 0
 
-    with open(file_path, 'r', encoding="utf-8") as f:
-        for line_no, line in enumerate(f, start=1):
-            raw = line.rstrip("\n")
-            s = raw.strip()
+    for value in iter_numbers(lines, invalid):
+        lines_list.append(value)
+        if not isinstance(value, int):
+            invalid_count += 1
 
-            if s == "":
-                print(f"[ERROR] Line {line_no}: empty line -> treated as nan")
-                lines_list.append('nan')
-                invalid_count += 1
-                continue
+    return lines_list, invalid_count
 
-            try:
-                lines_list.append(int(s))
-            except ValueError:
-                print(f"[ERROR] Line {line_no}: invalid integer '{raw}' -> treated as nan")
-                lines_list.append('nan')
-                invalid_count += 1
 
-    return lines_list, invalid_count
+def parse_number(s: str):
+    """
+    Parses a stripped line as an integer.
 
+    :param s: stripped line
+    :type s: str
+    :return: the integer, or None if s is not a valid integer
+    :rtype: int
+    """
+    try:
+        return int(s)
+    except ValueError:
+        return None
 
-def numbers_to_binary(numbers_to_convert: list) -> list[str]:
+
+def iter_numbers(lines, invalid: list = None):
     """
-    Converts list of numbers to binary
-    
-    :param numbers_to_convert: list of numbers
-    :type numbers_to_convert: list
-    :return: list of numbers in binary
-    :rtype: list[str]
+    Lazily parses lines, yielding 'nan' for invalid lines after reporting them.
+
+    :param lines: lines of text, e.g. an open file
+    :param invalid: if given, collects (line_no, line) of invalid lines
+        instead of reporting them
+    :type invalid: list
+    :return: iterator of integers and 'nan' placeholders
     """
-    binary_arr = []
-    for i in numbers_to_convert:
-        if not isinstance(i, int):
-            binary_arr.append('nan')
-            continue
+    for line_no, line in enumerate(lines, start=1):
+        raw = line.rstrip("\n")
+        s = raw.strip()
+        value = parse_number(s) if s else None
 
-        if i == 0:
-            binary_arr.append('0')
+        if value is not None:
+            yield value
             continue
 
-        sign = ''
-        if i < 0:
-            sign = '-'
-            i = -i
+        if invalid is not None:
+            invalid.append((line_no, raw))
+        elif s == "":
+            print(f"[ERROR] Line {line_no}: empty line -> treated as nan")
+        else:
+            print(f"[ERROR] Line {line_no}: invalid integer '{raw}' -> treated as nan")
+        yield 'nan'
+
+
+def to_base(number: int, base: int) -> str:
+    """
+    Converts an integer to a base between 2 and 36.
+
+    :param number: integer to convert
+    :type number: int
+    :param base: target base
+    :type base: int
+    :return: lowercase digits, with a '-' sign if negative
+    :rtype: str
+    """
+    if number == 0:
+        return '0'
 
-        bits = []
-        while i > 0:
-            bits.append(str(i % 2))
-            i //= 2
+    sign = ''
+    if number < 0:
+        sign = '-'
+        number = -number
 
-        binary_arr.append(sign + ''.join(reversed(bits)))
-    return binary_arr
+    digits = []
+    while number > 0:
+        digits.append(DIGITS[number % base])
+        number //= base
 
+    return sign + ''.join(reversed(digits))
 
-def numbers_to_hexadecimal(numbers_to_convert: list) -> list[str]:
+
+def to_binary(number: int) -> str:
     """
-    Converts list of numbers to hexadecimal
-    
-    :param numbers_to_convert: Description
+    Converts an integer to binary.
+
+    :param number: integer to convert
+    :type number: int
+    :return: binary digits, with a '-' sign if negative
+    :rtype: str
+    """
+    return to_base(number, 2)
+
+
+def to_hexadecimal(number: int) -> str:
+    """
+    Converts an integer to hexadecimal.
+
+    :param number: integer to convert
+    :type number: int
+    :return: lowercase hexadecimal digits, with a '-' sign if negative
+    :rtype: str
+    """
+    return to_base(number, 16)
+
+
+def numbers_to_base(numbers_to_convert: list, base: int) -> list[str]:
+    """
+    Converts list of numbers to a base between 2 and 36.
+
+    :param numbers_to_convert: list of numbers, 'nan' for invalid lines
     :type numbers_to_convert: list
-    :return: Description
+    :param base: target base
+    :type base: int
+    :return: list of converted numbers, 'nan' for invalid lines
     :rtype: list[str]
     """
-    hexadecimal_arr = []
-    hex_chars = '0123456789abcdef'
-
+    converted_arr = []
     for i in numbers_to_convert:
         if not isinstance(i, int):
-            hexadecimal_arr.append('nan')
+            converted_arr.append('nan')
             continue
 
-        if i == 0:
-            hexadecimal_arr.append('0')
-            continue
+        converted_arr.append(to_base(i, base))
+    return converted_arr
 
-        sign = ''
-        if i < 0:
-            sign = '-'
-            i = -i
 
-        digits = []
-        while i > 0:
-            digits.append(hex_chars[i % 16])
-            i //= 16
+def numbers_to_binary(numbers_to_convert: list) -> list[str]:
+    """
+    Converts list of numbers to binary
+    
+    :param numbers_to_convert: list of numbers
+    :type numbers_to_convert: list
+    :return: list of numbers in binary
+    :rtype: list[str]
+    """
+    return numbers_to_base(numbers_to_convert, 2)
 
-        hexadecimal_arr.append(sign + ''.join(reversed(digits)))
 
-    return hexadecimal_arr
+def numbers_to_hexadecimal(numbers_to_convert: list) -> list[str]:
+    """
+    Converts list of numbers to hexadecimal
+    
+    :param numbers_to_convert: Description
+    :type numbers_to_convert: list
+    :return: Description
+    :rtype: list[str]
+    """
+    return numbers_to_base(numbers_to_convert, 16)
 
 
 def arrays_to_file(original_arr: list,
@@ -143,47 +336,404 @@ def arrays_to_file(original_arr: list,
     """
 
     results = zip(original_arr, decimal_arr, hexadecimal_arr)
+    rows_to_file(results, time_elapsed, invalid_count)
 
-    with open("ConversionResults.txt", "w", encoding="utf-8") as f:
-        f.write(f"Execution time: {time_elapsed:.6f} seconds\n")
-        f.write(f"Invalid lines: {invalid_count}\n\n")
 
-        f.write(f"{'Number':>8}  {'Binary':>12}  {'Hex':>8}\n")
-        f.write(f"{'-'*8}  {'-'*12}  {'-'*8}\n")
+def _base_columns(bases: tuple) -> list:
+    return [BASE_COLUMNS.get(base, (f'Base {base}', 12)) for base in bases]
 
-        for orig, binary, hexa in results:
-            f.write(f"{str(orig):>8}  {str(binary):>12}  {str(hexa):>8}\n")
 
+def _column_names(columns: list) -> list:
+    return ['number'] + [label.lower().replace(' ', '') for label, _ in columns]
 
-def main():
+
+def _column_types(columns: list) -> list:
+    return ['int'] + ['string'] * len(columns)
+
+
+def _table_header(columns: list) -> str:
+    header = "".join(f"  {label:>{width}}" for label, width in columns)
+    rule = "".join(f"  {'-'*width}" for _, width in columns)
+    return f"{'Number':>8}{header}\n{'-'*8}{rule}\n"
+
+
+def _format_row(row, columns: list) -> str:
+    orig, *converted = row
+    cells = "".join(
+        f"  {str(value):>{width}}" for (_, width), value in zip(columns, converted)
+    )
+    return f"{str(orig):>8}{cells}\n"
+
+
+def rows_to_file(rows, time_elapsed: float, invalid_count: int,  # pylint: disable=too-many-arguments
+                 output=RESULTS_FILE, *, bases: tuple = (2, 16), fmt: str = 'text'):
     """
-    Program entry point.
+    Writes (number, converted...) rows to ConversionResults.txt, or to output.
+
+    Rows are formatted in batches and written in bulk. Formats other than
+    text have a number column and one column per base, named after the
+    text headers (binary, hex) or base<N>.
+
+    :param rows: iterable of (number, one converted string per base)
+    :param time_elapsed: execution time in seconds
+    :type time_elapsed: float
+    :param invalid_count: number of invalid lines
+    :type invalid_count: int
+    :param output: file path or writable stream
+    :param bases: bases of the converted columns
+    :type bases: tuple
+    :param fmt: 'text', 'csv', 'jsonl' or 'columnar'
+    :type fmt: str
+    """
+    columns = _base_columns(bases)
 
-    Parses command-line arguments to get an input file path, reads numeric values
-    from the file, converts the valid numbers to binary and hexadecimal
-    representations, measures total runtime, writes the original and converted
-    arrays (plus timing and invalid-line count) to an output file, and prints a
-    summary to the consol
+    if fmt != 'text':
+        meta = {'tool': 'convert_numbers', 'execution_time': time_elapsed,
+                'invalid_count': invalid_count}
+        with open_writer(fmt, output, _column_names(columns), meta,
+                         _column_types(columns)) as writer:
+            writer.write_rows(rows)
+        return
+
+    with open_result(output) as f:
+        f.write(f"Execution time: {time_elapsed:.6f} seconds\n"
+                f"Invalid lines: {invalid_count}\n\n"
+                f"{_table_header(columns)}")
+
+        write_lines(f, (_format_row(row, columns) for row in rows))
+
+
+def stream_conversion(lines, output, bases: tuple = (2, 16), fmt: str = 'text') -> tuple[int, int]:
+    """
+    Converts lines and writes each row to output as soon as it is converted.
+
+    Only the current row is held in memory, so a slow reader of output
+    throttles the reading of lines. The execution time and invalid count
+    are not known before the input ends: the text format has the table
+    only, and the columnar format keeps them in its footer.
+
+    :param lines: iterable of lines
+    :param output: file path or writable stream
+    :param bases: bases of the converted columns
+    :type bases: tuple
+    :param fmt: 'text', 'csv', 'jsonl' or 'columnar'
+    :type fmt: str
+    :return: (rows, invalid_count)
+    :rtype: tuple[int, int]
     """
     start = time.time()
+    columns = _base_columns(bases)
+    rows = invalid_count = 0
+
+    with contextlib.ExitStack() as stack:
+        if fmt == 'text':
+            f = stack.enter_context(open_result(output))
+            f.write(_table_header(columns))
+            meta = {}
+        else:
+            writer = stack.enter_context(open_writer(
+                fmt, output, _column_names(columns), types=_column_types(columns)
+            ))
+            meta = writer.meta
+
+        for value in iter_numbers(lines):
+            rows += 1
+            if isinstance(value, int):
+                row = (value, *(to_base(value, base) for base in bases))
+            else:
+                row = ('nan',) * (len(bases) + 1)
+                invalid_count += 1
 
-    args = initilize_parser()
-    filename = args.file
+            if fmt == 'text':
+                f.write(_format_row(row, columns))
+            else:
+                writer.write_rows((row,))
+
+        meta.update(tool='convert_numbers', execution_time=time.time() - start,
+                    invalid_count=invalid_count)
+
+    return rows, invalid_count
+
+
+def convert_file_streaming(file_path: str, rows_file):
+    """
+    Converts a file row by row, without holding its numbers in memory.
+
+    Each row is written to rows_file as tab-separated number, binary and
+    hexadecimal, with 'nan' in every column for invalid lines.
+
+    :param file_path: file route
+    :type file_path: str
+    :param rows_file: writable text file receiving the rows
+    :return: (rows, invalid_count)
+    :rtype: tuple[int, int]
+    """
+    rows = 0
+    invalid_count = 0
+
+    with open_input(file_path) as f:
+        for value in iter_numbers(f):
+            rows += 1
+            if isinstance(value, int):
+                rows_file.write(f"{value}\t{to_binary(value)}\t{to_hexadecimal(value)}\n")
+            else:
+                rows_file.write("nan\tnan\tnan\n")
+                invalid_count += 1
+
+    return rows, invalid_count
+
+
+def _read_rows(rows_file):
+    rows_file.seek(0)
+    for line in rows_file:
+        yield line.rstrip("\n").split("\t")
+
+
+def _typed_rows(rows_file):
+    for number, *converted in _read_rows(rows_file):
+        yield (number if number == 'nan' else int(number), *converted)
+
+
+def _print_column(prefix: str, rows_file, column: int):
+    """
+    Prints a column of rows_file like print() shows a list, item by item.
+    """
+    sys.stdout.write(f"{prefix}[")
+    for i, row in enumerate(_read_rows(rows_file)):
+        item = row[column]
+        if column or item == 'nan':
+            item = f"'{item}'"
+        sys.stdout.write(item if i == 0 else ", " + item)
+    sys.stdout.write("]\n")
+
+
+@dataclass(slots=True)
+class Conversion:
+    """
+    Numbers of an input converted to other bases, as returned by convert().
+
+    numbers holds the parsed integers, 'nan' for invalid lines; converted
+    maps each base to the converted strings. invalid_lines holds
+    (line_no, line) of the invalid lines, unless they were printed.
+    """
+
+    numbers: list
+    converted: dict
+    invalid_count: int
+    invalid_lines: list = field(default_factory=list)
+
+    def rows(self):
+        """
+        Yields (number, converted...) rows, one string per base.
+
+        :return: iterator of tuples
+        """
+        return zip(self.numbers, *self.converted.values())
+
+
+def convert(source, bases: tuple = (2, 16), output=None, verbose: bool = False,
+            fmt: str = 'text') -> Conversion:
+    """
+    Converts the integers of source to the given bases, in process.
+
+    Nothing is written or printed unless asked: output receives a report
+    like ConversionResults.txt, with a column per base, and verbose prints
+    the [ERROR] lines of the CLI instead of collecting them in the result.
+
+    :param source: file path, bytes, buffer, or iterable of lines or numbers
+    :param bases: bases between 2 and 36
+    :type bases: tuple
+    :param output: optional file path or writable stream for the report
+    :param verbose: print invalid lines as they are found
+    :type verbose: bool
+    :param fmt: format of the report, see rows_to_file()
+    :type fmt: str
+    :return: the conversion
+    :rtype: Conversion
+    :raises ValueError: if a base is out of range
+    """
+    bases = tuple(dict.fromkeys(bases))
+    for base in bases:
+        if not 2 <= base <= len(DIGITS):
+            raise ValueError(f"base must be between 2 and {len(DIGITS)}, got {base}")
+
+    start = time.time()
+    invalid = None if verbose else []
+
+    with open_source(source) as lines:
+        numbers_list, invalid_count = lines_to_list(lines, invalid)
+
+    converted = {base: numbers_to_base(numbers_list, base) for base in bases}
+    result = Conversion(numbers_list, converted, invalid_count, invalid or [])
+
+    if output is not None:
+        rows_to_file(result.rows(), time.time() - start, invalid_count, output,
+                     bases=bases, fmt=fmt)
+    return result
+
+
+def _sample_tokens(line: str) -> list:
+    return [parse_number(line.strip())]
 
-    numbers_list, invalid_count = file_to_list(filename)
-    binary_list = numbers_to_binary(numbers_list)
-    hexadecimal_list = numbers_to_hexadecimal(numbers_list)
+
+def plan_engine(args) -> str:
+    """
+    Picks the engine for args.file and logs the decision.
+
+    Small inputs keep the in-memory engine without being sampled, unless a
+    memory budget is given. Rows streamed to stdout, or read from stdin of
+    unknown size, use the stream engine. For the others the converted size is estimated
+    from a sample; past the budget rows are converted one at a time.
+
+    :param args: parsed command-line arguments
+    :return: 'memory' or 'stream'
+    :rtype: str
+    """
+    budget = None if args.memory_budget is None else int(args.memory_budget * 2**20)
+    profile = stat_inputs([args.file], budget)
+
+    if args.engine != 'auto':
+        engine, reason = args.engine, "forced by --engine"
+    elif not isinstance(args.output, str):
+        engine, reason = 'stream', "rows streamed to stdout"
+    elif profile["stdin"]:
+        engine, reason = 'stream', "stdin of unknown size"
+    elif args.memory_budget is None and is_small(profile):
+        engine, reason = 'memory', "small input"
+    else:
+        sample_inputs(profile, [args.file], _sample_tokens)
+        if profile["rows"] * MEMORY_ROW_BYTES <= profile["memory_budget"]:
+            engine, reason = 'memory', "converted rows fit the budget"
+        else:
+            engine, reason = 'stream', "converted rows past the budget"
+
+    if args.explain_plan:
+        log_plan('convert_numbers', engine, reason, profile)
+    return engine
+
+
+def _convert_in_memory(args, start: float, profiler: StageProfiler) -> int:
+    with profiler.stage("parse"):
+        numbers_list, invalid_count = file_to_list(args.file)
+    with profiler.stage("binary"):
+        binary_list = numbers_to_binary(numbers_list)
+    with profiler.stage("hex"):
+        hexadecimal_list = numbers_to_hexadecimal(numbers_list)
 
     end = time.time()
     execution_time = end - start
 
-    arrays_to_file(numbers_list, binary_list, hexadecimal_list, execution_time, invalid_count)
+    with profiler.stage("write"):
+        rows_to_file(zip(numbers_list, binary_list, hexadecimal_list), execution_time,
+                     invalid_count, args.output, fmt=args.format)
 
     print(f'Original: {numbers_list}')
     print(f'Binary: {binary_list}')
     print(f'Hexadecimal {hexadecimal_list}')
     print(f'Invalid lines: {invalid_count}')
     print(f'Execution took {execution_time:.6f} seconds')
+    return len(numbers_list)
+
+
+def _convert_streaming(args, start: float, profiler: StageProfiler) -> int:
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as rows_file:
+        with profiler.stage("convert"):
+            rows, invalid_count = convert_file_streaming(args.file, rows_file)
+
+        end = time.time()
+        execution_time = end - start
+
+        with profiler.stage("write"):
+            rows_to_file(_typed_rows(rows_file), execution_time, invalid_count, args.output,
+                         fmt=args.format)
+
+        _print_column('Original: ', rows_file, 0)
+        _print_column('Binary: ', rows_file, 1)
+        _print_column('Hexadecimal ', rows_file, 2)
+
+    print(f'Invalid lines: {invalid_count}')
+    print(f'Execution took {execution_time:.6f} seconds')
+    return rows
+
+
+def _convert_to_stdout(args, start: float, profiler: StageProfiler) -> int:
+    with profiler.stage("convert"), open_input(args.file) as f:
+        rows, invalid_count = stream_conversion(f, args.output, fmt=args.format)
+
+    print(f'Invalid lines: {invalid_count}')
+    print(f'Execution took {time.time() - start:.6f} seconds')
+    return rows
+
+
+def process_file(args, start: float):
+    """
+    Converts the numbers of args.file.
+
+    Reads numeric values from the file, converts the valid numbers to binary
+    and hexadecimal representations, measures total runtime, writes the
+    original and converted arrays (plus timing and invalid-line count) to
+    args.output in args.format, and prints a summary to the console.
+
+    plan_engine() picks whether the numbers are converted as lists in memory
+    or row by row through a temporary file. When args.output is stdout, the
+    stream engine writes each row there as soon as it is converted.
+
+    With --profile the run is broken down by stage (plan, then parse, binary
+    and hex, or convert for the stream engine, then write) and reported as
+    JSON with the tracemalloc peak and rows/sec.
+
+    :param args: parsed command-line arguments
+    :param start: time.time() at program start
+    :type start: float
+    """
+    profiler = StageProfiler("convert_numbers", args.profile is not None, args.cprofile)
+
+    with profiler.stage("plan"):
+        engine = plan_engine(args)
+
+    if engine == 'stream' and not isinstance(args.output, str):
+        rows = _convert_to_stdout(args, start, profiler)
+    elif engine == 'stream':
+        rows = _convert_streaming(args, start, profiler)
+    else:
+        rows = _convert_in_memory(args, start, profiler)
+
+    if args.profile is not None or args.cprofile:
+        report = profiler.finish(rows, input=args.file)
+        if args.profile is not None:
+            write_report(report, args.profile or None)
+
+
+def main():
+    """
+    Program entry point.
+
+    Parses command-line arguments and converts the input file. With --cache
+    the result file and console output of an input already seen are
+    replayed from the result cache, without parsing the input. Runs reading
+    stdin or writing to stdout bypass it.
+
+    With --output - the rows go to stdout, and the console output to stderr
+    so it does not mix with them.
+    """
+    start = time.time()
+
+    args = initilize_parser()
+
+    if args.output == STDOUT:
+        with redirect_to_stdout() as stdout:
+            args.output = stdout
+            process_file(args, start)
+        return
+
+    if not args.cache or args.profile is not None or args.cprofile or args.file == STDIN:
+        process_file(args, start)
+        return
+
+    cache = ResultCache(args.cache_dir, int(args.cache_size * 2**20))
+    key = cache.key('convert_numbers', [args.file], {'format': args.format})
+    cache.run('convert_numbers', key, [args.output],
+              lambda: process_file(args, start))
 
 
 if __name__ == '__main__':
@@ -2,6 +2,12 @@
 Tests for convert_numbers.py
 """
 
+import csv
+import gzip
+import io
+import json
+import sys
+
 import pytest
 
 from convert_numbers import (
@@ -9,7 +15,12 @@ from convert_numbers import (
     numbers_to_binary,
     numbers_to_hexadecimal,
     arrays_to_file,
+    convert,
+    convert_file_streaming,
+    main,
+    stream_conversion,
 )
+from result_writers import read_columnar  # pylint: disable=import-error,wrong-import-order
 
 
 def test_numbers_to_binary_zero():
@@ -133,3 +144,290 @@ def test_full_pipeline_file_to_output(tmp_path, monkeypatch):
     assert "111" in text
     assert "-1000" in text
     assert "nan" in text
+
+
+def test_file_to_list_reads_compressed_input(tmp_path):
+    """
+    Verifies a large gzip input is streamed through the chunk queue intact.
+
+    :param tmp_path:  Temporary file path for testing.
+    """
+    numbers = list(range(-50000, 50000))
+    p = tmp_path / "nums.gz"
+    p.write_bytes(gzip.compress("\n".join(map(str, numbers)).encode("utf-8")))
+
+    assert file_to_list(str(p)) == (numbers, 0)
+
+
+def test_file_to_list_corrupt_compressed_input_raises(tmp_path):
+    """
+    Verifies decompression errors reach the caller.
+
+    :param tmp_path:  Temporary file path for testing.
+    """
+    p = tmp_path / "nums.gz"
+    p.write_bytes(gzip.compress(b"1\n2\n3\n" * 1000)[:-30] + b"\x00" * 30)
+
+    with pytest.raises((OSError, EOFError)):
+        file_to_list(str(p))
+
+
+def test_main_profile_to_stderr_with_cprofile(tmp_path, monkeypatch, capsys):
+    """
+    Verifies a bare --profile prints JSON to stderr and --cprofile dumps stats.
+
+    :param tmp_path:  Temporary file path for testing.
+    :param monkeypatch: Fixture to mock file path and arguments.
+    :param capsys: Fixture to capture output
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "nums.txt"
+    inp.write_text("5\n-2\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", [
+        "convert_numbers", str(inp), "--profile", "--cprofile", str(tmp_path / "run.prof"),
+    ])
+
+    main()
+
+    report = json.loads(capsys.readouterr().err)
+    assert set(report["stages_ns"]) == {"plan", "parse", "binary", "hex", "write"}
+    assert report["rows"] == 2
+    assert (tmp_path / "run.prof").stat().st_size > 0
+
+
+def test_main_cache_keys_on_content(tmp_path, monkeypatch, capsys):
+    """
+    Verifies --cache recomputes when the input content changes.
+
+    :param tmp_path:  Temporary file path for testing.
+    :param monkeypatch: Fixture to mock file path and arguments.
+    :param capsys: Fixture to capture output
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "nums.txt"
+    argv = ["convert_numbers", str(inp), "--cache-dir", str(tmp_path / "cache")]
+    monkeypatch.setattr(sys, "argv", argv)
+
+    for text in ["5\n", "6\n", "5\n"]:
+        inp.write_text(text, encoding="utf-8")
+        main()
+
+    out = capsys.readouterr().out
+    assert "[CACHE] hit (hits: 1, misses: 2)" in out
+    assert "Binary: ['110']" in out
+    assert (tmp_path / "ConversionResults.txt").read_text(encoding="utf-8").endswith(
+        "       5           101         5\n"
+    )
+
+
+def test_convert_file_streaming_writes_rows(tmp_path, capsys):
+    """
+    Verifies rows are converted one by one and invalid lines reported.
+
+    :param tmp_path:  Temporary file path for testing.
+    :param capsys: Fixture to capture output
+    """
+    inp = tmp_path / "nums.txt"
+    inp.write_text("10\nx\n-255\n", encoding="utf-8")
+    rows_path = tmp_path / "rows.tsv"
+
+    with open(rows_path, "w", encoding="utf-8") as rows_file:
+        assert convert_file_streaming(str(inp), rows_file) == (3, 1)
+
+    assert rows_path.read_text(encoding="utf-8").splitlines() == [
+        "10\t1010\ta", "nan\tnan\tnan", "-255\t-11111111\t-ff",
+    ]
+    assert "[ERROR] Line 2: invalid integer 'x' -> treated as nan" in capsys.readouterr().out
+
+
+def test_main_stream_engine_matches_memory_engine(tmp_path, monkeypatch, capsys):
+    """
+    Verifies both engines write the same results and console output.
+
+    :param tmp_path:  Temporary file path for testing.
+    :param monkeypatch: Fixture to mock file path and arguments.
+    :param capsys: Fixture to capture output
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "nums.txt"
+    inp.write_text("5\n-17\nabc\n\n0\n255\n", encoding="utf-8")
+
+    outputs = []
+    for engine in ["memory", "stream"]:
+        monkeypatch.setattr(sys, "argv", [
+            "convert_numbers", str(inp), "--engine", engine, "--explain-plan",
+        ])
+        main()
+        captured = capsys.readouterr()
+        report = (tmp_path / "ConversionResults.txt").read_text(encoding="utf-8")
+        assert captured.err.startswith(
+            f"[PLAN] convert_numbers: {engine} engine, forced by --engine"
+        )
+        outputs.append((captured.out.splitlines()[:-1], report.splitlines()[1:]))
+
+    assert outputs[0] == outputs[1]
+    assert "Hexadecimal ['5', '-11', 'nan', 'nan', '0', 'ff']" in outputs[1][0]
+
+
+def test_convert_returns_columns_per_base(capsys):
+    """
+    Verifies convert() converts to any bases without printing or writing.
+
+    :param capsys: Fixture to capture output
+    """
+    conversion = convert([10, "x", -255], bases=(2, 8, 36))
+
+    assert conversion.numbers == [10, "nan", -255]
+    assert conversion.converted == {
+        2: ["1010", "nan", "-11111111"],
+        8: ["12", "nan", "-377"],
+        36: ["a", "nan", "-73"],
+    }
+    assert conversion.invalid_lines == [(2, "x")]
+    assert list(conversion.rows())[0] == (10, "1010", "12", "a")
+    assert capsys.readouterr().out == ""
+
+    with pytest.raises(ValueError):
+        convert(["1"], bases=(1,))
+
+
+def test_convert_report_matches_cli_format(tmp_path):
+    """
+    Verifies the report of convert() matches ConversionResults.txt.
+
+    :param tmp_path:  Temporary file path for testing.
+    """
+    report = tmp_path / "report.txt"
+    convert(io.BytesIO(b"5\n-17\n"), output=str(report))
+
+    assert report.read_text(encoding="utf-8").splitlines()[2:] == [
+        "",
+        "  Number        Binary       Hex",
+        "--------  ------------  --------",
+        "       5           101         5",
+        "     -17        -10001       -11",
+    ]
+
+
+def test_convert_columnar_keeps_number_column_int():
+    """
+    Verifies an invalid line leaves a null in the number column instead of
+    turning its row group into strings.
+    """
+    output = io.BytesIO()
+    convert(["x", *map(str, range(65541)), str(2**70)], output=output, fmt="columnar")
+    output.seek(0)
+
+    columns, meta, data = read_columnar(output)
+
+    assert columns == ["number", "binary", "hex"]
+    assert meta["invalid_count"] == 1
+    assert data["number"][:3] == [None, 0, 1]
+    assert data["number"][-2:] == [65540, 2**70]
+    assert data["binary"][0] == "nan"
+
+
+@pytest.mark.parametrize("engine", ["memory", "stream"])
+def test_main_writes_csv_rows(engine, tmp_path, monkeypatch, capsys):
+    """
+    Verifies --format csv writes a header and a row per line on both engines.
+
+    :param tmp_path:  Temporary file path for testing.
+    :param monkeypatch: Fixture to change the working directory and argv
+    :param capsys: Fixture to capture output
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "nums.txt"
+    inp.write_text("10\nx\n-3\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", [
+        "convert_numbers", str(inp), "--engine", engine, "--format", "csv",
+    ])
+
+    main()
+    capsys.readouterr()
+
+    with open(tmp_path / "ConversionResults.csv", newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [
+            ["number", "binary", "hex"],
+            ["10", "1010", "a"],
+            ["nan", "nan", "nan"],
+            ["-3", "-11", "-3"],
+        ]
+
+
+def test_stream_conversion_writes_each_row_before_reading_the_next():
+    """
+    Verifies rows reach the output as they are converted, not at the end.
+    """
+    out = io.StringIO()
+    seen = []
+
+    def lines():
+        for line in ["5\n", "bad\n", "-2\n"]:
+            seen.append(out.getvalue().count("\n"))
+            yield line
+
+    rows, invalid_count = stream_conversion(lines(), out)
+
+    assert (rows, invalid_count) == (3, 1)
+    assert seen == [2, 3, 4]
+    assert out.getvalue().splitlines()[2:] == [
+        "       5           101         5",
+        "     nan           nan       nan",
+        "      -2           -10        -2",
+    ]
+
+
+def test_main_pipes_stdin_to_stdout(monkeypatch, capsys):
+    """
+    Verifies '-' and --output - stream rows through stdin and stdout.
+
+    :param monkeypatch: Fixture to replace stdin and argv
+    :param capsys: Fixture to capture output
+    """
+    monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(b"10\nx\n")))
+    monkeypatch.setattr(sys, "argv", [
+        "convert_numbers", "-", "--format", "csv", "--output", "-", "--explain-plan",
+    ])
+
+    main()
+
+    captured = capsys.readouterr()
+    assert captured.out == "number,binary,hex\n10,1010,a\nnan,nan,nan\n"
+    assert captured.err.startswith("[PLAN] convert_numbers: stream engine, rows streamed")
+    assert "Invalid lines: 1" in captured.err
+
+
+def test_main_rejects_profile_to_stderr_with_stdout_output(monkeypatch, capsys):
+    """
+    Verifies --output - refuses --profile without a PATH, whose report would
+    land among the console output on stderr.
+    """
+    monkeypatch.setattr(sys, "argv", ["convert_numbers", "-", "--output", "-", "--profile"])
+
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+
+    assert excinfo.value.code == 2
+    assert "--profile needs a PATH with --output -" in capsys.readouterr().err
+
+
+def test_main_cprofile_alone_dumps_stats(tmp_path, monkeypatch, capsys):
+    """
+    Verifies --cprofile without --profile dumps stats on every run, even
+    with the result cache, and prints no JSON report.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "nums.txt"
+    inp.write_text("5\n-2\n", encoding="utf-8")
+    prof = tmp_path / "run.prof"
+    monkeypatch.setattr(sys, "argv", [
+        "convert_numbers", str(inp), "--cprofile", str(prof),
+        "--cache-dir", str(tmp_path / "cache"),
+    ])
+
+    for _ in range(2):
+        main()
+        assert prof.stat().st_size > 0
+        assert capsys.readouterr().err == ""
+        prof.unlink()
@@ -1,57 +1,321 @@
 """
-Script that counts distinct words and their frequency in a file.
+Script that counts distinct words and their frequency in one or more files.
 """
 
 import argparse
+import glob
+import io
+import itertools
+import os
+import sys
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+# Helpers shared by the three tools live in ../shared.
+SHARED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shared")
+if SHARED_DIR not in sys.path:
+    sys.path.insert(0, SHARED_DIR)
+
+# pylint: disable=wrong-import-position,import-error
+from execution_planner import is_small, log_plan, sample_inputs, stat_inputs
+from input_stream import STDIN, detect_compression, open_input, open_source
+from result_cache import DEFAULT_MAX_BYTES, ResultCache
+from result_writers import (
+    FORMATS,
+    STDOUT,
+    open_result,
+    open_writer,
+    output_path,
+    redirect_to_stdout,
+    write_lines,
+)
+from stage_profiler import StageProfiler, write_report
+
+from ngrams import NgramCounter
+from spill import ENTRY_BYTES, SpillingCounter
+from tokenizer import count_lines, iter_words, lines_to_words, report_invalid_token
+from vocabulary import Vocabulary
+from word_index import MANIFEST_NAME, WordIndex
+# pylint: enable=wrong-import-position,import-error
+
+ENGINES = ('auto', 'memory', 'stream', 'multiprocess', 'spill')
+RESULTS_FILE = 'WordCountResults.txt'
+
+# Planner estimates: bytes per distinct counted word, and bytes the memory
+# engine holds per input byte (the text plus its lines).
+WORD_BYTES = ENTRY_BYTES + 56
+MEMORY_BYTES_PER_INPUT_BYTE = 4
+PARALLEL_INPUT_BYTES = 256 * 2**20
+PARALLEL_CHUNK_BYTES = 32 * 2**20
+PARALLEL_MAX_ERROR_RATE = 0.01
 
 
 def initilize_parser():
     """
     Initializes argparser to accept params in file execution.
 
-    file: name of the file to process.
+    files: names or glob patterns of the files to process, '-' for stdin, or
+        the corpus directory with --index.
+    --workers: number of threads reading input files.
+    --per-file: also write a frequency table per input file.
+    --ngrams: also count word n-grams of these sizes, e.g. 2 3.
+    --engine: counting engine, picked from the input size by default.
+    --explain-plan: print the chosen engine and why to stderr.
+    --memory-budget: MiB the run may use, half the available memory by default.
+    --format: text, csv, jsonl or columnar results.
+    --output: results file, WordCountResults with the format's extension by
+        default; '-' writes results to stdout and messages to stderr.
+    --save-vocab: optional path to save the counted vocabulary to.
+    --index: directory of a persistent word-count index for the corpus.
+    --query: words to look up in the index without rescanning the corpus.
+    --profile: emit a per-stage JSON profile to a file, or stderr unless
+      --output - is given.
+    --cprofile: also dump cProfile stats to a file.
+    --cache: replay results of inputs already seen from the result cache.
+    --cache-dir: directory of the result cache, implies --cache.
+    --cache-size: maximum size of the result cache in MiB.
     """
     parser = argparse.ArgumentParser(
         prog='count_words',
-        description='Counts distinct words and their frequency in a file'
+        description='Counts distinct words and their frequency in files'
     )
 
-    parser.add_argument('file', help="The name of the file to process.")
+    parser.add_argument(
+        'files',
+        nargs='*',
+        help="The names or glob patterns of the files to process, '-' for stdin."
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=min(32, (os.cpu_count() or 1) + 4),
+        help="Number of threads reading input files."
+    )
+    parser.add_argument(
+        '--per-file',
+        action='store_true',
+        help="Also write a frequency table per input file."
+    )
+    parser.add_argument(
+        '--ngrams',
+        nargs='+',
+        type=int,
+        default=[],
+        metavar='N',
+        help="Also count word n-grams of size N (e.g. 2 for bigrams)."
+    )
+    parser.add_argument(
+        '--engine',
+        choices=ENGINES,
+        default='auto',
+        help="Counting engine; 'auto' picks one from the input size and memory."
+    )
+    parser.add_argument(
+        '--explain-plan',
+        action='store_true',
+        help="Print the chosen engine and why to stderr."
+    )
+    parser.add_argument(
+        '--memory-budget',
+        type=float,
+        metavar='MIB',
+        help="MiB the run may use; the spill engine spills counts past it."
+    )
+    parser.add_argument(
+        '--format',
+        choices=FORMATS,
+        default='text',
+        help="Format of the results file."
+    )
+    parser.add_argument(
+        '--output',
+        metavar='PATH',
+        help="Results file, '-' for stdout (default: WordCountResults with the "
+             "format's extension)."
+    )
+    parser.add_argument(
+        '--save-vocab',
+        metavar='PATH',
+        help="Save the counted vocabulary in a memory-mappable file."
+    )
+    parser.add_argument(
+        '--index',
+        metavar='DIR',
+        help="Keep an incremental index of the corpus directory in DIR."
+    )
+    parser.add_argument(
+        '--query',
+        nargs='+',
+        metavar='WORD',
+        help="Print frequencies of WORD from --index without rescanning."
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='',
+        metavar='PATH',
+        help="Emit a per-stage JSON profile to PATH (stderr if omitted, which "
+             "--output - does not allow)."
+    )
+    parser.add_argument(
+        '--cprofile',
+        metavar='PATH',
+        help="Also dump cProfile stats of the run to PATH."
+    )
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help="Replay results of inputs already seen from the result cache."
+    )
+    parser.add_argument(
+        '--cache-dir',
+        metavar='DIR',
+        help="Directory of the result cache (implies --cache)."
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=float,
+        default=DEFAULT_MAX_BYTES / 2**20,
+        metavar='MIB',
+        help="Maximum size of the result cache in MiB."
+    )
     args = parser.parse_args()
+
+    if args.cache_dir:
+        args.cache = True
+    if args.output is None:
+        args.output = output_path(RESULTS_FILE, args.format)
+    if args.query and not args.index:
+        parser.error("--query requires --index")
+    if not args.files and not args.query:
+        parser.error("the following arguments are required: files")
+    if args.index and len(args.files) > 1:
+        parser.error("--index takes a single corpus directory")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if any(n < 2 for n in args.ngrams):
+        parser.error("--ngrams sizes must be at least 2")
+    if args.index and args.ngrams:
+        parser.error("--ngrams cannot be combined with --index")
+    if args.memory_budget is not None and args.memory_budget <= 0:
+        parser.error("--memory-budget must be positive")
+    if args.output == STDOUT and args.profile == "":
+        parser.error("--profile needs a PATH with --output -, as stderr holds the "
+                     "console output")
+    _check_engine(parser, args)
+    args.paths = _check_index(parser, args) if args.index else _parse_paths(parser, args.files)
     return args
 
 
-def file_to_words(file_path: str):
+def _check_engine(parser, args):
+    """
+    Fails on an --engine the other options rule out.
+    """
+    if args.index and args.engine != 'auto':
+        parser.error("--engine cannot be combined with --index")
+    if args.engine == 'spill' and (args.ngrams or args.per_file or args.save_vocab):
+        parser.error("--engine spill cannot be combined with --ngrams, "
+                     "--per-file or --save-vocab")
+    if args.engine == 'multiprocess' and (args.ngrams or args.per_file or STDIN in args.files):
+        parser.error("--engine multiprocess cannot be combined with --ngrams, "
+                     "--per-file or stdin")
+
+
+def _check_index(parser, args) -> list:
+    """
+    Fails on a corpus that is not a directory, which would empty the index,
+    and on --query of a directory holding no index.
+    """
+    if args.query:
+        if not os.path.exists(os.path.join(args.index, MANIFEST_NAME)):
+            parser.error(f"--index {args.index} holds no index to query")
+    elif not os.path.isdir(args.files[0]):
+        parser.error(f"corpus directory not found: {args.files[0]}")
+    return []
+
+
+def _parse_paths(parser, patterns: list) -> list[str]:
+    paths = []
+    try:
+        paths = expand_inputs(patterns)
+    except ValueError as error:
+        parser.error(str(error))
+    return paths
+
+
+def file_to_words(file_path: str, ngrams: list = ()):
     """
     Reads a file and extracts words separated by whitespace.
 
     :param file_path: file route
     :type file_path: str
+    :param ngrams: NgramCounter objects fed in the same pass
+    :type ngrams: list
     :return: (words_list, invalid_count)
     :rtype: tuple[list[str], int]
     """
-    words_list = []
-    invalid_count = 0
+    with open_input(file_path) as f:
+        return lines_to_words(f, ngrams)
 
-    with open(file_path, 'r', encoding="utf-8") as f:
-        for line_no, line in enumerate(f, start=1):
-            raw = line.rstrip("\n")
-            s = raw.strip()
 
-            if s == "":
-                continue
+def expand_inputs(patterns: list) -> list[str]:
+    """
+    Expands glob patterns into file paths, keeping the given order.
+
+    Plain paths are kept as they are so a missing file is still reported
+    when it is read. Paths matched more than once are only kept once.
+
+    :param patterns: file names or glob patterns ('**' is recursive)
+    :type patterns: list
+    :return: file paths
+    :rtype: list[str]
+    :raises ValueError: if a pattern matches no files
+    """
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                raise ValueError(f"no files match '{pattern}'")
+            paths.extend(matches)
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
 
-            tokens = s.split()
 
-            for token in tokens:
-                if token.isalpha():
-                    words_list.append(token.lower())
-                else:
-                    print(f"[ERROR] Line {line_no}: invalid token '{token}' -> ignored")
-                    invalid_count += 1
+def _read_text(file_path: str) -> str:
+    with open_input(file_path) as f:
+        return f.read()
 
-    return words_list, invalid_count
+
+def read_files(paths: list, workers: int):
+    """
+    Reads files concurrently with a thread pool, yielding them in order.
+
+    At most 2 * workers files are read ahead, so memory stays bounded when
+    counting is slower than reading.
+
+    :param paths: file paths
+    :type paths: list
+    :param workers: number of reading threads
+    :type workers: int
+    :return: iterator of (path, text)
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        remaining = iter(paths)
+        pending = deque(
+            (path, pool.submit(_read_text, path))
+            for path in itertools.islice(remaining, 2 * workers)
+        )
+
+        while pending:
+            path, future = pending.popleft()
+            next_path = next(remaining, None)
+            if next_path is not None:
+                pending.append((next_path, pool.submit(_read_text, next_path)))
+            yield path, future.result()
 
 
 def count_word_frequencies(words: list) -> dict:
@@ -72,66 +336,637 @@ def count_word_frequencies(words: list) -> dict:
     return freqs
 
 
-def results_to_file(freqs: dict, time_elapsed: float, invalid_count: int):
+def count_word_vocabulary(words) -> Vocabulary:
+    """
+    Counts frequencies of words into a compact Vocabulary.
+
+    The words are counted in a dict, which is faster and smaller while
+    counting, and the counts are then packed into a Vocabulary.
+
+    :param words: iterable of valid words
+    :return: vocabulary of word -> frequency
+    :rtype: Vocabulary
+    """
+    return Vocabulary.from_counts(count_word_frequencies(words))
+
+
+def _merge_counts(totals: dict, counts):
+    for word, count in counts.items():
+        totals[word] = totals.get(word, 0) + count
+
+
+def _share_ids(ngrams):
+    """
+    Makes the n-gram counters intern their words in a single vocabulary.
+    """
+    for counter in ngrams[1:]:
+        counter.vocab = ngrams[0].vocab
+
+
+def count_file(file_path: str):
+    """
+    Tokenizes one file and counts its words.
+
+    :param file_path: file route
+    :type file_path: str
+    :return: (vocabulary, invalid_count)
+    :rtype: tuple[Vocabulary, int]
+    """
+    counts = {}
+    with open_input(file_path) as f:
+        invalid_count = count_lines(f, counts)
+    return Vocabulary.from_counts(counts), invalid_count
+
+
+def count_files(paths: list, workers: int = 1, per_file: bool = False,
+                ngrams: list = ()):
+    """
+    Counts words over many files, reading them concurrently.
+
+    Reading runs in a thread pool while tokenizing and counting happen in
+    a single shared stage, so the totals need no locking. The text of each
+    file is split into lines and counted word by word, without a list of
+    its words. Words are counted in dicts and packed into Vocabulary
+    tables at the end. N-gram counters
+    are fed during tokenization and share one vocabulary for their IDs.
+
+    :param paths: file paths
+    :type paths: list
+    :param workers: number of reading threads
+    :type workers: int
+    :param per_file: also keep a table per file
+    :type per_file: bool
+    :param ngrams: NgramCounter objects fed in the same pass
+    :type ngrams: list
+    :return: (totals, invalid_count, per_file_tables)
+    :rtype: tuple[Vocabulary, int, list[tuple[str, Vocabulary]]]
+    """
+    totals = {}
+    invalid_count = 0
+    tables = []
+    _share_ids(ngrams)
+
+    for path, text in read_files(paths, workers):
+        table = {} if per_file else totals
+        # split("\n") matches how files are iterated, unlike splitlines().
+        invalid_count += count_lines(text.split("\n"), table, ngrams)
+
+        if per_file:
+            _merge_counts(totals, table)
+            tables.append((path, Vocabulary.from_counts(table)))
+
+    return Vocabulary.from_counts(totals), invalid_count, tables
+
+
+def count_files_streaming(paths: list, per_file: bool = False, ngrams: list = ()):
+    """
+    Counts words over many files, reading them line by line.
+
+    Unlike count_files() no file is held in memory, only the counts.
+
+    :param paths: file paths
+    :type paths: list
+    :param per_file: also keep a table per file
+    :type per_file: bool
+    :param ngrams: NgramCounter objects fed in the same pass
+    :type ngrams: list
+    :return: (totals, invalid_count, per_file_tables)
+    :rtype: tuple[Vocabulary, int, list[tuple[str, Vocabulary]]]
+    """
+    totals = {}
+    invalid_count = 0
+    tables = []
+    _share_ids(ngrams)
+
+    for path in paths:
+        table = {} if per_file else totals
+        with open_input(path) as f:
+            invalid_count += count_lines(f, table, ngrams)
+
+        if per_file:
+            _merge_counts(totals, table)
+            tables.append((path, Vocabulary.from_counts(table)))
+
+    return Vocabulary.from_counts(totals), invalid_count, tables
+
+
+def split_file(file_path: str, chunk_bytes: int) -> list[tuple]:
+    """
+    Splits a file into byte ranges of about chunk_bytes ending on line ends.
+
+    Compressed files cannot be split and are a single (path, 0, None) range.
+
+    :param file_path: file route
+    :type file_path: str
+    :param chunk_bytes: target size of a range
+    :type chunk_bytes: int
+    :return: (path, begin, end) ranges
+    :rtype: list[tuple]
+    """
+    with open(file_path, "rb") as raw:
+        if detect_compression(raw) is not None:
+            return [(file_path, 0, None)]
+
+        size = os.fstat(raw.fileno()).st_size
+        ranges = []
+        begin = 0
+        while begin < size:
+            raw.seek(min(begin + chunk_bytes, size))
+            raw.readline()
+            end = raw.tell()
+            ranges.append((file_path, begin, end))
+            begin = end
+
+    return ranges
+
+
+def _count_chunk(task):
+    """
+    Counts the words of a (path, begin, end) range in a worker process.
+
+    :return: (counts, invalid tokens as (line_no, token), lines in range)
+    :rtype: tuple[dict, list, int]
+    """
+    path, begin, end = task
+    invalid = []
+
+    if end is None:
+        with open_input(path) as f:
+            counts = count_word_frequencies(w for w in iter_words(f, invalid=invalid) if w)
+        return counts, invalid, 0
+
+    with open(path, "rb") as raw:
+        raw.seek(begin)
+        data = raw.read(end - begin)
+
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8")
+    counts = count_word_frequencies(w for w in iter_words(lines, invalid=invalid) if w)
+    return counts, invalid, data.count(b"\n")
+
+
+def count_files_parallel(paths: list, processes: int,
+                         chunk_bytes: int = PARALLEL_CHUNK_BYTES):
+    """
+    Counts words over many files in a pool of worker processes.
+
+    Files are split into line-aligned byte ranges counted independently;
+    their tables are merged and their invalid tokens reported in input
+    order, with line numbers relative to their file.
+
+    :param paths: file paths
+    :type paths: list
+    :param processes: number of worker processes
+    :type processes: int
+    :param chunk_bytes: target size of the range counted by one task
+    :type chunk_bytes: int
+    :return: (totals, invalid_count, per_file_tables), the last always empty
+    :rtype: tuple[Vocabulary, int, list]
+    """
+    tasks = [task for path in paths for task in split_file(path, chunk_bytes)]
+    totals = {}
+    invalid_count = 0
+    current_path, line_offset = None, 0
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        for task, (counts, invalid, lines) in zip(tasks, pool.map(_count_chunk, tasks)):
+            if task[0] != current_path:
+                current_path, line_offset = task[0], 0
+
+            for line_no, token in invalid:
+                report_invalid_token(line_offset + line_no, token)
+            invalid_count += len(invalid)
+            line_offset += lines
+            _merge_counts(totals, counts)
+
+    return Vocabulary.from_counts(totals), invalid_count, []
+
+
+def count_files_spilling(paths: list, memory_budget: int, tmp_dir: str = None):
+    """
+    Counts words over many files with bounded memory.
+
+    Files are tokenized line by line and counted into a SpillingCounter,
+    which spills sorted partial counts to disk whenever the counts pass
+    memory_budget bytes. The caller must close() the returned counter.
+
+    :param paths: file paths
+    :type paths: list
+    :param memory_budget: bytes of counts kept in memory
+    :type memory_budget: int
+    :param tmp_dir: directory for the spill files, the system default if None
+    :type tmp_dir: str
+    :return: (counter, invalid_count)
+    :rtype: tuple[SpillingCounter, int]
+    """
+    counter = SpillingCounter(memory_budget, tmp_dir=tmp_dir)
+    invalid_count = 0
+
+    try:
+        for path in paths:
+            with open_input(path) as f:
+                for word in iter_words(f):
+                    if word is None:
+                        invalid_count += 1
+                    else:
+                        counter.add(word)
+    except BaseException:
+        counter.close()
+        raise
+
+    return counter, invalid_count
+
+
+def sorted_items(freqs):
+    """
+    Returns the (word, count) pairs of freqs in alphabetical order.
+
+    A SpillingCounter already streams its items sorted from disk, so it is
+    not materialized in memory.
+
+    :param freqs: dict, Vocabulary, NgramCounter or SpillingCounter
+    :return: iterable of (word, count)
+    """
+    if isinstance(freqs, SpillingCounter):
+        return freqs.items()
+
+    items = list(freqs.items())
+    items.sort(key=lambda x: x[0])
+    return items
+
+
+def _sample_tokens(line: str) -> list:
+    return [token.lower() if token.isalpha() else None for token in line.split()]
+
+
+def _choose_engine(args, profile: dict) -> tuple[str, str]:
+    """
+    Picks the counting engine from a sampled input profile.
+
+    :return: (engine, reason)
+    :rtype: tuple[str, str]
+    """
+    budget = profile["memory_budget"]
+    vocab_bytes = profile["distinct"] * WORD_BYTES
+    text_bytes = MEMORY_BYTES_PER_INPUT_BYTE * min(
+        profile["input_bytes"], (2 * args.workers + 1) * profile["largest_bytes"]
+    )
+    tables_needed = args.ngrams or args.per_file
+    splittable = profile["files"] > 1 or not profile["compressed"]
+
+    if vocab_bytes > budget:
+        if tables_needed or args.save_vocab:
+            return 'stream', "vocabulary past the budget but the requested tables need it in memory"
+        return 'spill', "vocabulary past the budget"
+
+    if (profile["cores"] > 1 and splittable and not tables_needed
+            and profile["input_bytes"] >= PARALLEL_INPUT_BYTES
+            and profile["error_rate"] <= PARALLEL_MAX_ERROR_RATE):
+        if vocab_bytes * (profile["cores"] + 1) <= budget:
+            return 'multiprocess', "large input and a table per worker fits the budget"
+
+    if vocab_bytes + text_bytes <= budget:
+        return 'memory', "input text and vocabulary fit the budget"
+    return 'stream', "input text past the budget"
+
+
+def plan_engine(args, paths: list) -> tuple[str, dict]:
+    """
+    Picks the counting engine for paths and logs the decision.
+
+    Small inputs keep the in-memory engine without being sampled, unless a
+    memory budget is given, and stdin is streamed. For the others the
+    vocabulary is estimated from a sample: past the memory budget its
+    counts are spilled to disk; large inputs with few errors are split
+    across processes; inputs whose text does not fit are streamed line by
+    line.
+
+    :param args: parsed command-line arguments
+    :param paths: input files
+    :type paths: list
+    :return: (engine, profile)
+    :rtype: tuple[str, dict]
+    """
+    budget = None if args.memory_budget is None else int(args.memory_budget * 2**20)
+    profile = stat_inputs(paths, budget)
+
+    if args.engine != 'auto':
+        engine, reason = args.engine, "forced by --engine"
+    elif profile["stdin"]:
+        engine, reason = 'stream', "stdin of unknown size"
+    elif args.memory_budget is None and is_small(profile):
+        engine, reason = 'memory', "small input"
+    else:
+        sample_inputs(profile, paths, _sample_tokens)
+        engine, reason = _choose_engine(args, profile)
+
+    if args.explain_plan:
+        log_plan('count_words', engine, reason, profile)
+    return engine, profile
+
+
+def count_inputs(args, paths: list, engine: str, profile: dict):
+    """
+    Counts the words of paths with the given engine.
+
+    :param args: parsed command-line arguments
+    :param paths: input files
+    :type paths: list
+    :param engine: engine from plan_engine()
+    :type engine: str
+    :param profile: input profile from plan_engine()
+    :type profile: dict
+    :return: (freqs, invalid_count, per_file_tables, ngram_counters)
+    :rtype: tuple
+    """
+    if engine == 'spill':
+        freqs, invalid_count = count_files_spilling(paths, profile["memory_budget"])
+        return freqs, invalid_count, [], []
+    if engine == 'multiprocess':
+        freqs, invalid_count, tables = count_files_parallel(paths, profile["cores"])
+        return freqs, invalid_count, tables, []
+
+    ngrams = [NgramCounter(n) for n in dict.fromkeys(args.ngrams)]
+    if engine == 'stream':
+        freqs, invalid_count, tables = count_files_streaming(paths, args.per_file, ngrams)
+    else:
+        freqs, invalid_count, tables = count_files(paths, args.workers, args.per_file, ngrams)
+    return freqs, invalid_count, tables, ngrams
+
+
+def _write_table(f, freqs, label='Word', width=20):
+    f.write(f"{label:<{width}}  {'Count':>10}\n"
+            f"{'-'*width}  {'-'*10}\n")
+    write_lines(f, (f"{word:<{width}}  {str(count):>10}\n"
+                    for word, count in sorted_items(freqs)))
+
+
+def _result_tables(per_file: list, ngrams: list):
+    """
+    Yields (table name, freqs) of the tables written after the totals.
+    """
+    for counter in ngrams:
+        yield f"{counter.n}-grams", counter
+    for path, table in per_file or []:
+        yield f"file:{path}", table
+
+
+def _write_rows(fmt: str, output, freqs, tables: list, meta: dict):
+    """
+    Writes the word counts in a machine-readable format.
+
+    The columns are word and count. With n-gram or per-file tables a table
+    column comes first: 'words' for the totals, then '<n>-grams' and
+    'file:<path>'.
     """
-    Writes results to WordCountResults.txt.
+    if not tables:
+        with open_writer(fmt, output, ('word', 'count'), meta, ('string', 'int')) as writer:
+            writer.write_rows(sorted_items(freqs))
+        return
 
-    :param freqs: dict of count words
-    :type freqs: dict
+    with open_writer(fmt, output, ('table', 'word', 'count'), meta,
+                     ('string', 'string', 'int')) as writer:
+        for name, table in [('words', freqs)] + tables:
+            writer.write_rows((name, word, count) for word, count in sorted_items(table))
+
+
+def results_to_file(freqs: dict, time_elapsed: float, invalid_count: int,  # pylint: disable=too-many-arguments
+                    per_file: list = None, ngrams: list = (), *,
+                    output=RESULTS_FILE, fmt='text'):
+    """
+    Writes results to WordCountResults.txt, or to output.
+
+    Rows are formatted in batches and written in bulk. See _write_rows()
+    for the columns of the other formats.
+
+    :param freqs: counted words, a dict, Vocabulary or SpillingCounter
+    :type freqs: dict | Vocabulary | SpillingCounter
     :param time_elapsed: execution time in seconds
     :type time_elapsed: float
     :param invalid_count: number of invalid tokens
     :type invalid_count: int
+    :param per_file: optional (path, freqs) tables written after the totals
+    :type per_file: list
+    :param ngrams: NgramCounter tables written after the word totals
+    :type ngrams: list
+    :param output: file path or writable stream
+    :param fmt: 'text', 'csv', 'jsonl' or 'columnar'
+    :type fmt: str
     """
-    items = list(freqs.items())
-    items.sort(key=lambda x: x[0])
+    if fmt != 'text':
+        meta = {'tool': 'count_words', 'execution_time': time_elapsed,
+                'invalid_count': invalid_count}
+        _write_rows(fmt, output, freqs, list(_result_tables(per_file, ngrams)), meta)
+        return
 
-    with open("WordCountResults.txt", "w", encoding="utf-8") as f:
-        f.write(f"Execution time: {time_elapsed:.6f} seconds\n")
-        f.write(f"Invalid tokens: {invalid_count}\n\n")
+    with open_result(output) as f:
+        f.write(f"Execution time: {time_elapsed:.6f} seconds\n"
+                f"Invalid tokens: {invalid_count}\n\n")
 
-        f.write(f"{'Word':<20}  {'Count':>10}\n")
-        f.write(f"{'-'*20}  {'-'*10}\n")
+        _write_table(f, freqs)
 
-        for word, count in items:
-            f.write(f"{word:<20}  {str(count):>10}\n")
+        for counter in ngrams:
+            f.write(f"\n{counter.n}-grams\n")
+            _write_table(f, counter, label=f"{counter.n}-gram", width=20 * counter.n)
 
+        for path, table in per_file or []:
+            f.write(f"\nFile: {path}\n")
+            _write_table(f, table)
 
-def main():
+
+@dataclass(slots=True)
+class WordCounts:
     """
-    Program entry point.
+    Word frequencies of an input, as returned by count_words().
 
-    Parses command-line arguments to get an input file path, reads words from
-    the file, counts distinct words and their frequencies, measures total
-    runtime, writes results to WordCountResults.txt, and prints results to the
-    console. Invalid tokens are reported but do not stop execution.
+    counts maps words to frequencies; ngrams maps each requested n to its
+    NgramCounter. invalid_tokens holds
+    (line_no, token) of the invalid tokens, unless they were printed.
     """
-    start = time.time()
 
-    args = initilize_parser()
-    filename = args.file
+    counts: Vocabulary
+    invalid_count: int
+    ngrams: dict = field(default_factory=dict)
+    invalid_tokens: list = field(default_factory=list)
 
-    words_list, invalid_count = file_to_words(filename)
-    freqs = count_word_frequencies(words_list)
+    def to_dict(self) -> dict:
+        """
+        Returns the word frequencies as a dict.
 
-    end = time.time()
-    execution_time = end - start
+        :return: mapping of word -> frequency
+        :rtype: dict
+        """
+        return self.counts.to_dict()
 
-    results_to_file(freqs, execution_time, invalid_count)
 
-    items = list(freqs.items())
-    items.sort(key=lambda x: x[0])
+def count_words(source, ngrams: tuple = (), output=None, verbose: bool = False,
+                fmt: str = 'text') -> WordCounts:
+    """
+    Counts the words of source, in process.
+
+    Nothing is written or printed unless asked: output receives the same
+    report as WordCountResults.txt, and verbose prints the [ERROR] lines of
+    the CLI instead of collecting them in the result.
+
+    :param source: file path, bytes, buffer or iterable of lines
+    :param ngrams: also count word n-grams of these sizes, each at least 2
+    :type ngrams: tuple
+    :param output: optional file path or writable stream for the report
+    :param verbose: print invalid tokens as they are found
+    :type verbose: bool
+    :param fmt: format of the report, see results_to_file()
+    :type fmt: str
+    :return: the word counts
+    :rtype: WordCounts
+    :raises ValueError: if an n-gram size is below 2
+    """
+    if any(n < 2 for n in ngrams):
+        raise ValueError("n-gram sizes must be at least 2")
+
+    start = time.time()
+    counts = {}
+    ids = Vocabulary()
+    counters = {n: NgramCounter(n, ids) for n in dict.fromkeys(ngrams)}
+    invalid = None if verbose else []
+    invalid_count = 0
+
+    with open_source(source) as lines:
+        for word in iter_words(lines, list(counters.values()), invalid):
+            if word is None:
+                invalid_count += 1
+            else:
+                counts[word] = counts.get(word, 0) + 1
 
-    print("Word frequencies:")
-    print(f"{'Word':<20}  {'Count':>10}")
-    print(f"{'-'*20}  {'-'*10}")
+    counts = Vocabulary.from_counts(counts)
+    if output is not None:
+        results_to_file(counts, time.time() - start, invalid_count,
+                        ngrams=list(counters.values()), output=output, fmt=fmt)
+    return WordCounts(counts, invalid_count, counters, invalid or [])
 
-    for word, count in items:
+
+def _print_query(index: WordIndex, words: list):
+    for word, count in index.query(words).items():
         print(f"{word:<20}  {str(count):>10}")
 
+
+def process_inputs(args, start: float):
+    """
+    Counts the words of the inputs given in args.
+
+    Reads words from the files concurrently, counts distinct words and their
+    frequencies, measures total runtime, writes results to args.output in
+    args.format, and prints results to the console. Invalid tokens
+    are reported but do not stop execution.
+
+    With --index the input is a corpus directory: only files that changed
+    since the last run are re-tokenized, and --query reads frequencies from
+    the index without scanning the corpus at all. Otherwise plan_engine()
+    picks how to count from the input size and the memory budget: in
+    memory, streamed, across processes, or spilled to disk and merged back
+    when the vocabulary is larger than the budget.
+
+    With --profile the run is broken down by stage (plan, count, write, print)
+    and reported as JSON with the tracemalloc peak and tokens/sec.
+
+    :param args: parsed command-line arguments
+    :param start: time.time() at program start
+    :type start: float
+    """
+    profiler = StageProfiler("count_words", args.profile is not None, args.cprofile)
+    tables = []
+    ngrams = []
+
+    if args.index:
+        index = WordIndex(args.index, count_file)
+
+        if args.query:
+            _print_query(index, args.query)
+            return
+
+        with profiler.stage("count"):
+            changes = index.update(args.files[0])
+        print(f"Index: {changes['changed']} changed, {changes['unchanged']} unchanged, "
+              f"{changes['removed']} removed")
+        freqs = index.totals()
+        invalid_count = index.invalid_count
+    else:
+        with profiler.stage("plan"):
+            plan = plan_engine(args, args.paths)
+        with profiler.stage("count"):
+            freqs, invalid_count, tables, ngrams = count_inputs(args, args.paths, *plan)
+
+    execution_time = time.time() - start
+
+    try:
+        with profiler.stage("write"):
+            results_to_file(freqs, execution_time, invalid_count, tables, ngrams,
+                            output=args.output, fmt=args.format)
+
+            if args.save_vocab:
+                freqs.save(args.save_vocab)
+
+        with profiler.stage("print"):
+            print("Word frequencies:")
+            _write_table(sys.stdout, freqs)
+
+        tokens = invalid_count
+        if args.profile is not None:
+            tokens += sum(count for _, count in freqs.items())
+    finally:
+        if isinstance(freqs, SpillingCounter):
+            freqs.close()
+
+    for counter in ngrams:
+        print(f"Distinct {counter.n}-grams: {len(counter.counts)}")
     print(f"Invalid tokens: {invalid_count}")
     print(f"Execution took {execution_time:.6f} seconds")
 
+    if args.profile is not None or args.cprofile:
+        report = profiler.finish(tokens, inputs=args.files)
+        if args.profile is not None:
+            write_report(report, args.profile or None)
+
+
+def main():
+    """
+    Program entry point.
+
+    Parses command-line arguments to get input file paths or globs and counts
+    their words. With --cache the result file and console output of inputs
+    already seen with the same options are replayed from the result cache,
+    without parsing them. Index, --save-vocab, --profile and --cprofile runs
+    bypass the cache, as do runs reading stdin or writing results to stdout.
+
+    With --output - the results go to stdout once the input ends, and the
+    console output to stderr so it does not mix with them.
+    """
+    start = time.time()
+
+    args = initilize_parser()
+
+    if args.output == STDOUT:
+        with redirect_to_stdout() as stdout:
+            args.output = stdout
+            process_inputs(args, start)
+        return
+
+    profiling = args.profile is not None or args.cprofile
+    if not args.cache or args.index or args.save_vocab or profiling or STDIN in args.paths:
+        process_inputs(args, start)
+        return
+
+    paths = args.paths
+
+    options = {
+        "ngrams": sorted(set(args.ngrams)),
+        "per_file": paths if args.per_file else None,
+        "format": args.format,
+    }
+
+    cache = ResultCache(args.cache_dir, int(args.cache_size * 2**20))
+    key = cache.key('count_words', paths, options)
+    cache.run('count_words', key, [args.output],
+              lambda: process_inputs(args, start))
+
 
 if __name__ == '__main__':
     main()
@@ -2,13 +2,30 @@
 Tests for wordCount.py
 """
 
+import gzip
+import io
+import json
+import lzma
+import sys
+from types import SimpleNamespace
+
 import pytest
 
 from count_words import (
+    _choose_engine,
+    count_words,
     file_to_words,
     count_word_frequencies,
+    count_word_vocabulary,
+    count_files,
+    count_files_parallel,
+    count_files_streaming,
+    expand_inputs,
+    split_file,
     results_to_file,
+    main,
 )
+from result_writers import read_columnar  # pylint: disable=import-error,wrong-import-order
 
 
 def test_file_to_words_valid_and_invalid_tokens(tmp_path, capsys):
@@ -115,3 +132,391 @@ def test_full_pipeline_file_to_output(tmp_path, monkeypatch, capsys):
     assert "[ERROR] Line 2:" in captured
     assert "invalid token 'CAT!'" in captured
     assert "invalid token '12'" in captured
+
+
+def test_count_word_vocabulary_matches_dict_counts():
+    """
+    Verifies the vocabulary counts agree with the dict counter.
+    """
+    words = ["a", "b", "a", "c", "b", "a"]
+    vocab = count_word_vocabulary(words)
+    assert vocab.to_dict() == count_word_frequencies(words)
+
+
+def test_expand_inputs_globs_and_plain_paths(tmp_path):
+    """
+    Verifies globs are expanded in order and duplicates are dropped.
+    """
+    (tmp_path / "sub").mkdir()
+    for name in ["b.txt", "a.txt", "sub/c.txt", "notes.md"]:
+        (tmp_path / name).write_text("word\n", encoding="utf-8")
+
+    paths = expand_inputs([
+        str(tmp_path / "*.txt"),
+        str(tmp_path / "**" / "c.txt"),
+        str(tmp_path / "a.txt"),
+        str(tmp_path / "missing.txt"),
+    ])
+
+    assert paths == [
+        str(tmp_path / "a.txt"),
+        str(tmp_path / "b.txt"),
+        str(tmp_path / "sub" / "c.txt"),
+        str(tmp_path / "missing.txt"),
+    ]
+
+
+def test_count_files_aggregates_and_keeps_per_file_tables(tmp_path, monkeypatch):
+    """
+    Verifies concurrent counting over many files, with per-file tables.
+    """
+    monkeypatch.chdir(tmp_path)
+    paths = []
+    for i, text in enumerate(["dog cat\n", "dog 12\n", "bird\ndog\n"]):
+        p = tmp_path / f"in{i}.txt"
+        p.write_text(text, encoding="utf-8")
+        paths.append(str(p))
+
+    totals, invalid_count, tables = count_files(paths, workers=2, per_file=True)
+
+    assert totals.to_dict() == {"dog": 3, "cat": 1, "bird": 1}
+    assert invalid_count == 1
+    assert [path for path, _ in tables] == paths
+    assert tables[2][1].to_dict() == {"bird": 1, "dog": 1}
+
+    results_to_file(totals, 0.0, invalid_count, tables)
+    text = (tmp_path / "WordCountResults.txt").read_text(encoding="utf-8")
+    assert f"File: {paths[1]}" in text
+
+
+def test_count_files_missing_file_raises(tmp_path):
+    """
+    Verifies a missing input file is reported by the reading threads.
+    """
+    with pytest.raises(FileNotFoundError):
+        count_files([str(tmp_path / "missing.txt")], workers=2)
+
+
+def test_compressed_inputs_are_decompressed(tmp_path):
+    """
+    Verifies gzip, xz and zstd inputs give the same words as plain text.
+    """
+    data = b"Dog cat\nbird 12\n"
+    (tmp_path / "a.gz").write_bytes(gzip.compress(data))
+    (tmp_path / "b.xz").write_bytes(lzma.compress(data))
+
+    assert file_to_words(str(tmp_path / "a.gz")) == (["dog", "cat", "bird"], 1)
+    totals, invalid_count, _ = count_files([str(tmp_path / "a.gz"), str(tmp_path / "b.xz")])
+    assert totals.to_dict() == {"dog": 2, "cat": 2, "bird": 2}
+    assert invalid_count == 2
+
+    zstandard = pytest.importorskip("zstandard")
+    (tmp_path / "c.zst").write_bytes(zstandard.ZstdCompressor().compress(data))
+    assert file_to_words(str(tmp_path / "c.zst")) == (["dog", "cat", "bird"], 1)
+
+
+def test_main_profile_counts_tokens(tmp_path, monkeypatch, capsys):
+    """
+    Verifies --profile reports the plan, count, write and print stages.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "words.txt"
+    inp.write_text("dog cat dog 12\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["count_words", str(inp), "--profile"])
+
+    main()
+
+    report = json.loads(capsys.readouterr().err)
+    assert report["rows"] == 4
+    assert set(report["stages_ns"]) == {"plan", "count", "write", "print"}
+    assert report["inputs"] == [str(inp)]
+
+
+def test_split_file_ends_ranges_on_line_ends(tmp_path):
+    """
+    Verifies byte ranges cover the file and never cut a line.
+    """
+    inp = tmp_path / "words.txt"
+    data = b"dog cat\nbird\n\nfish dog cat\nowl"
+    inp.write_bytes(data)
+
+    ranges = split_file(str(inp), 5)
+
+    assert ranges[0][1] == 0 and ranges[-1][2] == len(data)
+    for (_, _, end), (_, begin, _) in zip(ranges, ranges[1:]):
+        assert end == begin and data[end - 1:end] == b"\n"
+
+    (tmp_path / "words.gz").write_bytes(gzip.compress(data))
+    assert split_file(str(tmp_path / "words.gz"), 5) == [(str(tmp_path / "words.gz"), 0, None)]
+
+
+def test_engines_agree_on_counts_and_errors(tmp_path, capsys):
+    """
+    Verifies the streaming and multi-process engines match count_files,
+    including the line numbers of invalid tokens.
+    """
+    a = tmp_path / "a.txt"
+    a.write_text("dog cat\nx1 bird\n\ndog 12 cat\nowl\n", encoding="utf-8")
+    b = tmp_path / "b.gz"
+    b.write_bytes(gzip.compress(b"Owl 7\ncat\n"))
+    paths = [str(a), str(b)]
+
+    expected = count_files(paths)
+    expected_out = capsys.readouterr().out
+
+    for count in [
+        lambda: count_files_streaming(paths),
+        lambda: count_files_parallel(paths, processes=2, chunk_bytes=8),
+    ]:
+        totals, invalid_count, tables = count()
+        assert totals.to_dict() == expected[0].to_dict()
+        assert invalid_count == expected[1] == 3
+        assert not tables
+        assert capsys.readouterr().out == expected_out
+
+    assert "[ERROR] Line 4: invalid token '12' -> ignored" in expected_out
+
+
+def test_main_logs_plan_for_small_input(tmp_path, monkeypatch, capsys):
+    """
+    Verifies small inputs keep the memory engine and the plan is printed to
+    stderr only with --explain-plan.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "words.txt"
+    inp.write_text("dog cat dog\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", ["count_words", str(inp)])
+
+    main()
+    assert "[PLAN]" not in str(capsys.readouterr())
+
+    monkeypatch.setattr(sys, "argv", ["count_words", str(inp), "--explain-plan"])
+    main()
+
+    captured = capsys.readouterr()
+    assert captured.err.startswith("[PLAN] count_words: memory engine, small input")
+    assert "[PLAN]" not in captured.out
+
+
+def test_count_words_api_returns_counts_and_ngrams(capsys):
+    """
+    Verifies count_words() counts words and n-grams without side effects.
+    """
+    words = count_words(io.StringIO("Dog cat dog\ncat 12 dog\n"), ngrams=(2,))
+
+    assert words.to_dict() == {"dog": 3, "cat": 2}
+    assert words.counts.count("cat") == 2
+    assert words.invalid_count == 1
+    assert words.invalid_tokens == [(2, "12")]
+    assert dict(words.ngrams[2].items()) == {"dog cat": 2, "cat dog": 1}
+    assert capsys.readouterr().out == ""
+
+    with pytest.raises(ValueError):
+        count_words([], ngrams=(1,))
+
+
+def test_count_words_api_writes_report_on_request(tmp_path, capsys):
+    """
+    Verifies output and verbose reproduce the CLI's report and messages.
+    """
+    inp = tmp_path / "words.txt"
+    inp.write_text("b a b x1\n", encoding="utf-8")
+    report = io.StringIO()
+
+    count_words(inp, output=report, verbose=True)
+
+    assert report.getvalue().splitlines()[1:] == [
+        "Invalid tokens: 1",
+        "",
+        "Word                       Count",
+        "--------------------  ----------",
+        "a                              1",
+        "b                              2",
+    ]
+    assert capsys.readouterr().out == "[ERROR] Line 1: invalid token 'x1' -> ignored\n"
+
+
+@pytest.mark.parametrize("engine", ["memory", "spill"])
+def test_main_writes_columnar_results(engine, tmp_path, monkeypatch):
+    """
+    Verifies --format columnar writes the counts with the run details.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "words.txt"
+    inp.write_text("dog cat dog 12\n", encoding="utf-8")
+    monkeypatch.setattr(sys, "argv", [
+        "count_words", str(inp), "--engine", engine, "--format", "columnar",
+    ])
+
+    main()
+
+    columns, meta, data = read_columnar(tmp_path / "WordCountResults.col")
+    assert columns == ["word", "count"]
+    assert data == {"word": ["cat", "dog"], "count": [1, 2]}
+    assert meta["invalid_count"] == 1
+    assert not (tmp_path / "WordCountResults.txt").exists()
+
+
+def test_results_to_file_jsonl_tables(tmp_path):
+    """
+    Verifies n-gram tables get a table column in machine-readable formats.
+    """
+    words = count_words(["dog cat dog"], ngrams=(2,))
+    out = tmp_path / "out.jsonl"
+
+    results_to_file(words.counts, 0.1, 0, ngrams=list(words.ngrams.values()),
+                    output=str(out), fmt="jsonl")
+
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert rows[0] == {"table": "words", "word": "cat", "count": 1}
+    assert rows[2:] == [
+        {"table": "2-grams", "word": "cat dog", "count": 1},
+        {"table": "2-grams", "word": "dog cat", "count": 1},
+    ]
+
+
+def test_main_reads_stdin_and_writes_results_to_stdout(monkeypatch, capsys):
+    """
+    Verifies '-' reads (compressed) stdin and --output - keeps stdout for results.
+    """
+    stdin = io.TextIOWrapper(io.BytesIO(gzip.compress(b"dog cat\ndog 12\n")))
+    monkeypatch.setattr(sys, "stdin", stdin)
+    monkeypatch.setattr(sys, "argv", [
+        "count_words", "-", "--format", "jsonl", "--output", "-", "--explain-plan",
+    ])
+
+    main()
+
+    captured = capsys.readouterr()
+    assert [json.loads(line) for line in captured.out.splitlines()] == [
+        {"word": "cat", "count": 1},
+        {"word": "dog", "count": 2},
+    ]
+    assert captured.err.startswith("[PLAN] count_words: stream engine, stdin of unknown size")
+    assert "[ERROR] Line 2: invalid token '12' -> ignored" in captured.err
+    assert not stdin.closed
+
+
+def test_main_rejects_glob_matching_no_files(tmp_path, monkeypatch, capsys):
+    """
+    Verifies a glob matching nothing fails instead of writing empty results.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["count_words", "nomatch*.txt"])
+
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+
+    assert excinfo.value.code == 2
+    assert "no files match 'nomatch*.txt'" in capsys.readouterr().err
+    assert not (tmp_path / "WordCountResults.txt").exists()
+
+
+@pytest.mark.parametrize("argv, message", [
+    (["corpTYPO", "--index", "idx"], "corpus directory not found: corpTYPO"),
+    (["--index", "idx", "--query", "dog"], "--index idx holds no index to query"),
+])
+def test_main_rejects_missing_corpus_or_index(argv, message, tmp_path, monkeypatch, capsys):
+    """
+    Verifies --index fails on a missing corpus and --query on a missing index.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sys, "argv", ["count_words", *argv])
+
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+
+    assert excinfo.value.code == 2
+    assert message in capsys.readouterr().err
+    assert not (tmp_path / "idx" / "manifest.json").exists()
+
+
+def test_main_rejects_profile_to_stderr_with_stdout_output(monkeypatch, capsys):
+    """
+    Verifies --output - refuses --profile without a PATH, whose report would
+    land among the console output on stderr.
+    """
+    monkeypatch.setattr(sys, "argv", ["count_words", "-", "--output", "-", "--profile"])
+
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+
+    assert excinfo.value.code == 2
+    assert "--profile needs a PATH with --output -" in capsys.readouterr().err
+
+
+def test_main_cprofile_alone_dumps_stats(tmp_path, monkeypatch, capsys):
+    """
+    Verifies --cprofile without --profile dumps stats on every run, even
+    with the result cache, and prints no JSON report.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "words.txt"
+    inp.write_text("dog cat dog\n", encoding="utf-8")
+    prof = tmp_path / "run.prof"
+    monkeypatch.setattr(sys, "argv", [
+        "count_words", str(inp), "--cprofile", str(prof),
+        "--cache-dir", str(tmp_path / "cache"),
+    ])
+
+    for _ in range(2):
+        main()
+        assert prof.stat().st_size > 0
+        assert capsys.readouterr().err == ""
+        prof.unlink()
+
+
+def _profile(**overrides):
+    profile = {
+        "files": 1, "disk_bytes": 2**30, "compressed": 0, "input_bytes": 2**30,
+        "largest_bytes": 2**30, "stdin": False, "cores": 8, "memory_budget": 2**30,
+        "rows": 10**8, "distinct": 10**4, "error_rate": 0.0,
+    }
+    profile.update(overrides)
+    return profile
+
+
+def _args(**overrides):
+    args = {"workers": 4, "ngrams": [], "per_file": False, "save_vocab": None}
+    args.update(overrides)
+    return SimpleNamespace(**args)
+
+
+def test_choose_engine_follows_budget_and_cores():
+    """
+    Verifies the engine picked for a large input.
+    """
+    assert _choose_engine(_args(), _profile())[0] == "multiprocess"
+    assert _choose_engine(_args(), _profile(cores=1))[0] == "stream"
+    assert _choose_engine(_args(), _profile(cores=1, memory_budget=2**34))[0] == "memory"
+    assert _choose_engine(_args(), _profile(distinct=10**8))[0] == "spill"
+    assert _choose_engine(_args(ngrams=[2]), _profile(distinct=10**8))[0] == "stream"
+    assert _choose_engine(_args(), _profile(error_rate=0.5, memory_budget=2**34))[0] == "memory"
+
+
+def test_main_replays_cached_results_without_parsing(tmp_path, monkeypatch, capsys):
+    """
+    Verifies a second run is served from the cache and counts hits.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "words.txt"
+    inp.write_text("dog cat dog 12\n", encoding="utf-8")
+    argv = ["count_words", str(inp), "--cache-dir", str(tmp_path / "cache")]
+    monkeypatch.setattr(sys, "argv", argv)
+
+    main()
+    first = capsys.readouterr().out
+    report = (tmp_path / "WordCountResults.txt").read_text(encoding="utf-8")
+    (tmp_path / "WordCountResults.txt").unlink()
+
+    def fail(*_):
+        raise AssertionError("input parsed on a cache hit")
+
+    monkeypatch.setattr("count_words.count_files", fail)
+    main()
+    second = capsys.readouterr().out
+
+    assert "[CACHE] miss (hits: 0, misses: 1)" in first
+    assert "[CACHE] hit (hits: 1, misses: 1)" in second
+    assert second.replace("hit (hits: 1", "miss (hits: 0") == first
+    assert (tmp_path / "WordCountResults.txt").read_text(encoding="utf-8") == report
@@ -0,0 +1,103 @@
+"""
+Word n-gram counting with packed integer keys.
+
+An n-gram is stored as the vocabulary IDs of its words packed into a single
+int, ID_BITS bits per word, instead of as a joined string. The key is rolled
+forward one word at a time, so counting costs one shift and one dict update
+per word.
+"""
+
+from vocabulary import Vocabulary
+
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+
+
+def pack_ngram(ids) -> int:
+    """
+    Packs word IDs into a single int key, first word in the highest bits.
+
+    :param ids: word IDs
+    :return: packed key
+    :rtype: int
+    """
+    key = 0
+    for word_id in ids:
+        if word_id > ID_MASK:
+            raise OverflowError(f"word ID {word_id} does not fit in {ID_BITS} bits")
+        key = (key << ID_BITS) | word_id
+    return key
+
+
+def unpack_ngram(key: int, n: int) -> tuple:
+    """
+    Unpacks a key made by pack_ngram back into n word IDs.
+
+    :param key: packed key
+    :type key: int
+    :param n: words per n-gram
+    :type n: int
+    :return: word IDs
+    :rtype: tuple
+    """
+    ids = []
+    for _ in range(n):
+        ids.append(key & ID_MASK)
+        key >>= ID_BITS
+    return tuple(reversed(ids))
+
+
+class NgramCounter:
+    """
+    Counts n-grams of consecutive words fed one at a time with add().
+
+    Words are interned in vocab, which can be shared with the unigram
+    counts so both use the same IDs. reset() breaks the sequence, e.g. at
+    the end of a file or at an invalid token.
+    """
+
+    __slots__ = ("n", "vocab", "counts", "_key", "_filled", "_mask")
+
+    def __init__(self, n: int, vocab: Vocabulary = None):
+        if n < 2:
+            raise ValueError("n-grams need at least 2 words")
+        self.n = n
+        self.vocab = Vocabulary() if vocab is None else vocab
+        self.counts = {}
+        self._mask = (1 << (ID_BITS * n)) - 1
+        self._key = 0
+        self._filled = 0
+
+    def add(self, word: str):
+        """
+        Appends a word to the current sequence and counts the n-gram ending
+        at it once n words have been seen.
+
+        :param word: next word
+        :type word: str
+        """
+        word_id = self.vocab.add(word, 0)
+        if word_id > ID_MASK:
+            raise OverflowError(f"word ID {word_id} does not fit in {ID_BITS} bits")
+
+        self._key = ((self._key << ID_BITS) & self._mask) | word_id
+        if self._filled < self.n - 1:
+            self._filled += 1
+            return
+
+        self.counts[self._key] = self.counts.get(self._key, 0) + 1
+
+    def reset(self):
+        """
+        Starts a new sequence so no n-gram spans the break.
+        """
+        self._key = 0
+        self._filled = 0
+
+    def items(self):
+        """
+        Yields (phrase, count) pairs with words joined by single spaces.
+        """
+        for key, count in self.counts.items():
+            words = [self.vocab.word(i) for i in unpack_ngram(key, self.n)]
+            yield " ".join(words), count
@@ -0,0 +1,73 @@
+"""
+Tests for ngrams.py
+"""
+
+import pytest
+
+from count_words import count_files, lines_to_words
+from ngrams import NgramCounter, pack_ngram, unpack_ngram
+
+
+def test_pack_and_unpack_round_trip():
+    """
+    Verifies packed keys unpack to the same IDs and keep their order.
+    """
+    key = pack_ngram((7, 0, 123456))
+    assert unpack_ngram(key, 3) == (7, 0, 123456)
+    assert pack_ngram((1, 2)) != pack_ngram((2, 1))
+
+
+def test_pack_rejects_ids_that_do_not_fit():
+    """
+    Verifies IDs above 32 bits are rejected.
+    """
+    with pytest.raises(OverflowError):
+        pack_ngram((1 << 32, 1))
+
+
+def test_counter_counts_bigrams_and_trigrams():
+    """
+    Verifies rolling keys count every window of consecutive words.
+    """
+    bigrams = NgramCounter(2)
+    trigrams = NgramCounter(3, bigrams.vocab)
+    for w in "the cat and the cat sat".split():
+        bigrams.add(w)
+        trigrams.add(w)
+
+    assert dict(bigrams.items()) == {
+        "the cat": 2, "cat and": 1, "and the": 1, "cat sat": 1,
+    }
+    assert dict(trigrams.items())["the cat and"] == 1
+    assert sum(trigrams.counts.values()) == 4
+    assert bigrams.counts[pack_ngram((0, 1))] == 2
+
+
+def test_counter_rejects_unigrams():
+    """
+    Verifies n must be at least 2.
+    """
+    with pytest.raises(ValueError):
+        NgramCounter(1)
+
+
+def test_invalid_tokens_and_files_break_sequences(tmp_path):
+    """
+    Verifies n-grams never span an invalid token or two files.
+    """
+    counter = NgramCounter(2)
+    lines_to_words(["red fish 42 blue fish\n", "red\n"], [counter])
+    assert dict(counter.items()) == {"red fish": 1, "blue fish": 1, "fish red": 1}
+
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    a.write_text("one two\n", encoding="utf-8")
+    b.write_text("three four\n", encoding="utf-8")
+
+    counter = NgramCounter(2)
+    trigrams = NgramCounter(3)
+    totals, _, _ = count_files([str(a), str(b)], ngrams=[counter, trigrams])
+
+    assert dict(counter.items()) == {"one two": 1, "three four": 1}
+    assert trigrams.vocab is counter.vocab
+    assert totals.to_dict() == {"four": 1, "one": 1, "three": 1, "two": 1}
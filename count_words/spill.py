@@ -0,0 +1,161 @@
+"""
+Out-of-core word counting with sharded spill files and an external merge.
+
+Counts are kept in a dict until its estimated size passes the memory budget.
+The dict is then sorted and spilled as runs to temporary shard files, one per
+hash partition that got words. At the end the runs of each partition are
+k-way merged into one file, at most MERGE_FAN_IN runs at a time so the number
+of open files stays bounded, and the partitions are merged again into a
+single alphabetical stream. Counts stay exact; only the budget decides how much is kept in RAM.
+"""
+
+import contextlib
+import heapq
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import zlib
+
+# Approximate bytes a dict entry and its int count add on top of the word.
+ENTRY_BYTES = 72
+# Most runs merged in one pass, each an open file; well under the usual
+# descriptor limits so the output and other inputs still fit.
+MERGE_FAN_IN = 32
+
+
+def _read_run(file_path: str):
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            word, count = line.rstrip("\n").split("\t")
+            yield word, int(count)
+
+
+def _sum_sorted(pairs):
+    """
+    Adds up the counts of equal words in a sorted (word, count) stream.
+    """
+    for word, group in itertools.groupby(pairs, key=lambda x: x[0]):
+        yield word, sum(count for _, count in group)
+
+
+class SpillingCounter:
+    """
+    Exact word counter that spills to disk past memory_budget bytes.
+
+    Spill files live in a temporary directory removed by close().
+    """
+
+    def __init__(self, memory_budget: int, partitions: int = 16, tmp_dir: str = None):
+        self.memory_budget = memory_budget
+        self.partitions = partitions
+        self.counts = {}
+        self.spills = 0
+        self._used = 0
+        self._runs = [[] for _ in range(partitions)]
+        self._tmp_dir = tempfile.mkdtemp(prefix="count_words_", dir=tmp_dir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, word: str, count: int = 1):
+        """
+        Adds count occurrences of word, spilling if over the budget.
+
+        :param word: word to add
+        :type word: str
+        :param count: occurrences to add
+        :type count: int
+        """
+        if word in self.counts:
+            self.counts[word] += count
+            return
+
+        self.counts[word] = count
+        self._used += sys.getsizeof(word) + ENTRY_BYTES
+        if self._used > self.memory_budget:
+            self.spill()
+
+    def spill(self):
+        """
+        Writes the in-memory counts as sorted runs, one per partition, and
+        empties the dict.
+        """
+        if not self.counts:
+            return
+
+        files = {}
+        with contextlib.ExitStack() as stack:
+            for word in sorted(self.counts):
+                p = zlib.crc32(word.encode("utf-8")) % self.partitions
+                if p not in files:
+                    path = os.path.join(self._tmp_dir, f"p{p:03d}-r{self.spills:05d}.tsv")
+                    files[p] = stack.enter_context(open(path, "w", encoding="utf-8"))
+                    self._runs[p].append(path)
+                files[p].write(f"{word}\t{self.counts[word]}\n")
+
+        self.counts = {}
+        self._used = 0
+        self.spills += 1
+
+    def items(self):
+        """
+        Yields every (word, count) pair in alphabetical order.
+
+        When nothing was spilled this just sorts the dict. Otherwise the runs
+        of each partition are merged into a single file; partitions hold
+        disjoint words, so merging them needs no further summing.
+        """
+        if self.spills == 0:
+            yield from sorted(self.counts.items())
+            return
+
+        self.spill()
+        for p in range(self.partitions):
+            for depth in itertools.count():
+                if len(self._runs[p]) <= 1:
+                    break
+                self._merge_pass(p, depth)
+
+        with contextlib.ExitStack() as stack:
+            streams = [
+                stack.enter_context(contextlib.closing(_read_run(runs[0])))
+                for runs in self._runs if runs
+            ]
+            yield from heapq.merge(*streams, key=lambda x: x[0])
+
+    def close(self):
+        """
+        Removes the spill files.
+        """
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+    def _merge_pass(self, p: int, depth: int):
+        """
+        Merges the runs of partition p in groups of MERGE_FAN_IN, replacing
+        each group with one run.
+        """
+        merged_runs = []
+        for group, runs in enumerate(itertools.batched(self._runs[p], MERGE_FAN_IN)):
+            if len(runs) == 1:
+                merged_runs.append(runs[0])
+                continue
+
+            merged_path = os.path.join(
+                self._tmp_dir, f"p{p:03d}-m{self.spills:05d}-{depth}-{group:05d}.tsv"
+            )
+            with contextlib.ExitStack() as stack:
+                f = stack.enter_context(open(merged_path, "w", encoding="utf-8"))
+                streams = [stack.enter_context(contextlib.closing(_read_run(r))) for r in runs]
+                for word, count in _sum_sorted(heapq.merge(*streams, key=lambda x: x[0])):
+                    f.write(f"{word}\t{count}\n")
+
+            for run in runs:
+                os.remove(run)
+            merged_runs.append(merged_path)
+
+        self._runs[p] = merged_runs
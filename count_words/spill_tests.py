@@ -0,0 +1,119 @@
+"""
+Tests for spill.py
+"""
+
+import os
+
+import spill
+from count_words import count_file, count_files_spilling, results_to_file
+from spill import SpillingCounter
+
+
+def test_counter_without_spill_sorts_in_memory(tmp_path):
+    """
+    Verifies small inputs never touch the disk.
+    """
+    with SpillingCounter(10**6, tmp_dir=str(tmp_path)) as counter:
+        for w in ["b", "a", "b"]:
+            counter.add(w)
+
+        assert counter.spills == 0
+        assert list(counter.items()) == [("a", 1), ("b", 2)]
+
+
+def test_counter_spills_and_merges_exactly(tmp_path):
+    """
+    Verifies counts stay exact and sorted across many spills.
+    """
+    words = [f"w{i % 37:03d}" for i in range(1000)]
+
+    with SpillingCounter(400, partitions=4, tmp_dir=str(tmp_path)) as counter:
+        for w in words:
+            counter.add(w)
+
+        assert counter.spills > 1
+        expected = sorted({w: words.count(w) for w in words}.items())
+        assert list(counter.items()) == expected
+
+        counter.add("w000", 5)
+        counter.add("zzz")
+        merged = dict(counter.items())
+        assert merged["w000"] == words.count("w000") + 5
+        assert merged["zzz"] == 1
+
+
+def test_spill_only_writes_partitions_with_words(tmp_path):
+    """
+    Verifies a spill creates no files for empty partitions.
+    """
+    with SpillingCounter(1, partitions=16, tmp_dir=str(tmp_path)) as counter:
+        counter.add("dog")
+        (spill_dir,) = os.listdir(tmp_path)
+        assert len(os.listdir(tmp_path / spill_dir)) == 1
+        assert list(counter.items()) == [("dog", 1)]
+
+
+def test_merge_bounds_open_runs(tmp_path, monkeypatch):
+    """
+    Verifies runs are merged in passes of at most MERGE_FAN_IN open files.
+    """
+    open_runs = []
+    peak = []
+    read_run = spill._read_run  # pylint: disable=protected-access
+
+    def tracked(file_path):
+        open_runs.append(file_path)
+        peak.append(len(open_runs))
+        try:
+            yield from read_run(file_path)
+        finally:
+            open_runs.remove(file_path)
+
+    monkeypatch.setattr(spill, "MERGE_FAN_IN", 3)
+    monkeypatch.setattr(spill, "_read_run", tracked)
+    words = [f"w{i % 23:02d}" for i in range(500)]
+
+    with SpillingCounter(1, partitions=1, tmp_dir=str(tmp_path)) as counter:
+        for w in words:
+            counter.add(w)
+
+        assert counter.spills == len(words)
+        assert list(counter.items()) == sorted({w: words.count(w) for w in words}.items())
+        assert max(peak) == 3
+
+
+def test_close_removes_spill_files(tmp_path):
+    """
+    Verifies closing the counter deletes its temporary directory.
+    """
+    counter = SpillingCounter(1, tmp_dir=str(tmp_path))
+    counter.add("dog")
+    counter.add("cat")
+    assert counter.spills == 2
+    assert os.listdir(tmp_path)
+
+    counter.close()
+    assert not os.listdir(tmp_path)
+
+
+def test_spilling_pipeline_matches_in_memory(tmp_path, monkeypatch, capsys):
+    """
+    Verifies the out-of-core output equals the in-memory output.
+    """
+    monkeypatch.chdir(tmp_path)
+    inp = tmp_path / "words.txt"
+    inp.write_text("Dog cat dog\nCAT! 12 bird\nbird dog zebra apple\n", encoding="utf-8")
+
+    expected, expected_invalid = count_file(str(inp))
+    results_to_file(expected, 0.0, expected_invalid)
+    in_memory = (tmp_path / "WordCountResults.txt").read_text(encoding="utf-8")
+
+    counter, invalid_count = count_files_spilling([str(inp)], 1, tmp_dir=str(tmp_path))
+    try:
+        assert counter.spills > 0
+        results_to_file(counter, 0.0, invalid_count)
+    finally:
+        counter.close()
+
+    assert (tmp_path / "WordCountResults.txt").read_text(encoding="utf-8") == in_memory
+    assert "invalid token 'CAT!'" in capsys.readouterr().out
@@ -0,0 +1,107 @@
+"""
+Whitespace tokenizer shared by the count_words engines.
+
+A token made only of letters is a word and is counted lowercased; any other
+token is invalid, reported with its line number and breaks n-gram runs.
+"""
+
+
+def lines_to_words(lines, ngrams: list = ()):
+    """
+    Extracts words separated by whitespace from an iterable of lines.
+
+    Each valid word is also fed to the n-gram counters. Invalid tokens and
+    the end of the input break the word sequence, so no n-gram spans them.
+
+    :param lines: lines of text, e.g. an open file
+    :param ngrams: NgramCounter objects fed in the same pass
+    :type ngrams: list
+    :return: (words_list, invalid_count)
+    :rtype: tuple[list[str], int]
+    """
+    words_list = []
+    invalid_count = 0
+
+    for word in iter_words(lines, ngrams):
+        if word is None:
+            invalid_count += 1
+        else:
+            words_list.append(word)
+
+    return words_list, invalid_count
+
+
+def report_invalid_token(line_no: int, token: str):
+    """
+    Prints the error message of an invalid token.
+
+    :param line_no: line number in its file
+    :type line_no: int
+    :param token: invalid token
+    :type token: str
+    """
+    print(f"[ERROR] Line {line_no}: invalid token '{token}' -> ignored")
+
+
+def iter_words(lines, ngrams: list = (), invalid: list = None):
+    """
+    Lazily tokenizes lines, yielding each valid word lowercased.
+
+    Invalid tokens are reported and yielded as None so callers can count
+    them without holding every word in memory.
+
+    :param lines: lines of text, e.g. an open file
+    :param ngrams: NgramCounter objects fed in the same pass
+    :type ngrams: list
+    :param invalid: if given, collects (line_no, token) of invalid tokens
+        instead of reporting them
+    :type invalid: list
+    :return: iterator of words, None for invalid tokens
+    """
+    for counter in ngrams:
+        counter.reset()
+
+    for line_no, line in enumerate(lines, start=1):
+        raw = line.rstrip("\n")
+        s = raw.strip()
+
+        if s == "":
+            continue
+
+        tokens = s.split()
+
+        for token in tokens:
+            if token.isalpha():
+                word = token.lower()
+                for counter in ngrams:
+                    counter.add(word)
+                yield word
+            else:
+                if invalid is None:
+                    report_invalid_token(line_no, token)
+                else:
+                    invalid.append((line_no, token))
+                for counter in ngrams:
+                    counter.reset()
+                yield None
+
+
+def count_lines(lines, counts: dict, ngrams: list = ()) -> int:
+    """
+    Tokenizes lines and adds the frequency of each word to counts.
+
+    :param lines: lines of text, e.g. an open file
+    :param counts: mapping of word -> frequency, updated in place
+    :type counts: dict
+    :param ngrams: NgramCounter objects fed in the same pass
+    :type ngrams: list
+    :return: number of invalid tokens
+    :rtype: int
+    """
+    invalid_count = 0
+    for word in iter_words(lines, ngrams):
+        if word is None:
+            invalid_count += 1
+        else:
+            counts[word] = counts.get(word, 0) + 1
+    return invalid_count
@@ -0,0 +1,286 @@
+"""
+Compact vocabulary that interns words to dense integer IDs.
+
+Counts live in an array('Q') and word bytes in one contiguous arena. A
+compacted or loaded vocabulary holds no per-word objects: each word costs
+its UTF-8 bytes plus 16 bytes of offset and count. Saved vocabularies are
+sorted by word and can be memory-mapped back without copying.
+
+A vocabulary that is still growing keeps a dict index on top of the arrays,
+which makes it larger than a plain dict of counts. Counting is therefore
+done in a dict and turned into a vocabulary once with from_counts(); add()
+is meant for interning words to IDs, as the n-gram counters do.
+"""
+
+import bisect
+import itertools
+import mmap
+import struct
+import sys
+from array import array
+
+_MAGIC = b"VOCAB001"
+_HEADER = struct.Struct("<8sQQ")
+
+
+class Vocabulary:
+    """
+    Maps words to dense integer IDs and keeps a count per word.
+
+    While words are being added the vocabulary keeps a word -> ID dict
+    index, costing a string and a boxed ID per word on top of the arrays.
+    After compact(), from_counts() or load() the arena is sorted by word,
+    there is no index and lookups use binary search over the arena.
+    """
+
+    __slots__ = ("_ids", "_offsets", "_counts", "_arena", "_buffer")
+
+    def __init__(self):
+        self._ids = {}
+        self._offsets = array("Q", [0])
+        self._counts = array("Q")
+        self._arena = bytearray()
+        self._buffer = None
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, word: str) -> bool:
+        return self.id_of(word) is not None
+
+    def add(self, word: str, count: int = 1) -> int:
+        """
+        Adds count occurrences of word, interning it if it is new.
+
+        :param word: word to add
+        :type word: str
+        :param count: occurrences to add, 0 only interns the word
+        :type count: int
+        :return: ID of the word
+        :rtype: int
+        """
+        if self._ids is None:
+            self._materialize()
+
+        word_id = self._ids.get(word)
+        if word_id is None:
+            word_id = len(self._counts)
+            self._ids[word] = word_id
+            self._arena += word.encode("utf-8")
+            self._offsets.append(len(self._arena))
+            self._counts.append(count)
+        else:
+            self._counts[word_id] += count
+        return word_id
+
+    def subtract(self, word: str, count: int):
+        """
+        Removes count occurrences of word. Words never drop below zero.
+
+        :param word: word to subtract
+        :type word: str
+        :param count: occurrences to remove
+        :type count: int
+        """
+        if self._ids is None:
+            self._materialize()
+
+        word_id = self._ids.get(word)
+        if word_id is not None:
+            self._counts[word_id] -= min(count, self._counts[word_id])
+
+    def update(self, other):
+        """
+        Adds every (word, count) pair of other to this vocabulary.
+
+        :param other: mapping or vocabulary with an items() method
+        """
+        for word, count in other.items():
+            self.add(word, count)
+
+    def id_of(self, word: str):
+        """
+        Returns the ID of word, or None if it is not in the vocabulary.
+
+        :param word: word to look up
+        :type word: str
+        :return: word ID or None
+        """
+        if self._ids is not None:
+            return self._ids.get(word)
+
+        target = word.encode("utf-8")
+        n = len(self._counts)
+        i = bisect.bisect_left(range(n), target, key=self._word_bytes)
+        if i < n and self._word_bytes(i) == target:
+            return i
+        return None
+
+    def word(self, word_id: int) -> str:
+        """
+        Returns the word stored under word_id.
+
+        :param word_id: dense word ID
+        :type word_id: int
+        :return: word
+        :rtype: str
+        """
+        return self._word_bytes(word_id).decode("utf-8")
+
+    def count(self, word: str) -> int:
+        """
+        Returns the count of word, 0 if it is unknown.
+
+        :param word: word to look up
+        :type word: str
+        :return: frequency
+        :rtype: int
+        """
+        word_id = self.id_of(word)
+        if word_id is None:
+            return 0
+        return self._counts[word_id]
+
+    def items(self):
+        """
+        Yields (word, count) pairs in ID order, skipping zero counts.
+        """
+        for word_id, count in enumerate(self._counts):
+            if count:
+                yield self.word(word_id), count
+
+    def to_dict(self) -> dict:
+        """
+        Returns a plain word -> count dict.
+
+        :return: mapping of word -> frequency
+        :rtype: dict
+        """
+        return dict(self.items())
+
+    def compact(self):
+        """
+        Sorts the arena by word and drops the word -> ID index.
+
+        Words with a zero count are discarded and IDs are renumbered, so IDs
+        handed out before compacting are no longer valid.
+        """
+        self._offsets, self._counts, self._arena = self._sorted_layout()
+        self._ids = None
+        self._buffer = None
+
+    @classmethod
+    def from_counts(cls, counts: dict) -> "Vocabulary":
+        """
+        Builds a compacted vocabulary from a word -> count mapping.
+
+        Words with a zero count are dropped. Counting into a dict and
+        converting once is several times faster than one add() per word.
+
+        :param counts: mapping of word -> frequency
+        :type counts: dict
+        :return: vocabulary sorted by word
+        :rtype: Vocabulary
+        """
+        # Code point order is the UTF-8 byte order used by lookups.
+        words = sorted(word for word, count in counts.items() if count)
+        encoded = [word.encode("utf-8") for word in words]
+
+        vocab = cls()
+        vocab._ids = None
+        vocab._offsets = array("Q", itertools.accumulate(map(len, encoded), initial=0))
+        vocab._counts = array("Q", [counts[word] for word in words])
+        vocab._arena = bytearray().join(encoded)
+        return vocab
+
+    def save(self, file_path: str):
+        """
+        Writes the vocabulary, sorted by word, in a memory-mappable format.
+
+        The file holds a header (magic, word count, arena size) followed by
+        the offsets and counts as little-endian uint64 and the arena bytes.
+
+        :param file_path: destination file
+        :type file_path: str
+        """
+        offsets, counts, arena = self._sorted_layout()
+        if sys.byteorder != "little":
+            offsets.byteswap()
+            counts.byteswap()
+
+        with open(file_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, len(counts), len(arena)))
+            f.write(offsets.tobytes())
+            f.write(counts.tobytes())
+            f.write(arena)
+
+    @classmethod
+    def load(cls, file_path: str) -> "Vocabulary":
+        """
+        Memory-maps a vocabulary written by save().
+
+        The loaded vocabulary reads straight from the mapped file. Adding
+        words to it copies the data into memory first.
+
+        :param file_path: vocabulary file
+        :type file_path: str
+        :return: loaded vocabulary
+        :rtype: Vocabulary
+        """
+        with open(file_path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        view = memoryview(buffer)
+        magic, n, arena_len = _HEADER.unpack_from(view)
+        if magic != _MAGIC:
+            raise ValueError(f"{file_path} is not a vocabulary file")
+
+        start = _HEADER.size
+        counts_start = start + 8 * (n + 1)
+        arena_start = counts_start + 8 * n
+
+        vocab = cls()
+        vocab._ids = None
+        vocab._buffer = buffer
+        vocab._arena = view[arena_start:arena_start + arena_len]
+
+        if sys.byteorder == "little":
+            vocab._offsets = view[start:counts_start].cast("Q")
+            vocab._counts = view[counts_start:arena_start].cast("Q")
+        else:
+            vocab._offsets = array("Q", view[start:counts_start].tobytes())
+            vocab._counts = array("Q", view[counts_start:arena_start].tobytes())
+            vocab._offsets.byteswap()
+            vocab._counts.byteswap()
+
+        return vocab
+
+    def _word_bytes(self, word_id: int) -> bytes:
+        return bytes(self._arena[self._offsets[word_id]:self._offsets[word_id + 1]])
+
+    def _sorted_layout(self):
+        order = sorted(range(len(self._counts)), key=self._word_bytes)
+
+        offsets = array("Q", [0])
+        counts = array("Q")
+        arena = bytearray()
+        for word_id in order:
+            count = self._counts[word_id]
+            if count == 0:
+                continue
+            arena += self._word_bytes(word_id)
+            offsets.append(len(arena))
+            counts.append(count)
+
+        return offsets, counts, arena
+
+    def _materialize(self):
+        """
+        Copies a compacted or memory-mapped vocabulary back into growable
+        arrays and rebuilds the word -> ID index.
+        """
+        self._offsets = array("Q", self._offsets)
+        self._counts = array("Q", self._counts)
+        self._arena = bytearray(self._arena)
+        self._buffer = None
+        self._ids = {self.word(i): i for i in range(len(self._counts))}
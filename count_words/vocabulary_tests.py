@@ -0,0 +1,103 @@
+"""
+Tests for vocabulary.py
+"""
+
+import pytest
+
+from vocabulary import Vocabulary
+
+
+def test_add_assigns_dense_ids_and_counts():
+    """
+    Verifies words get consecutive IDs and repeated words are counted.
+    """
+    vocab = Vocabulary()
+    assert vocab.add("dog") == 0
+    assert vocab.add("cat") == 1
+    assert vocab.add("dog") == 0
+    assert vocab.add("bird", 0) == 2
+
+    assert len(vocab) == 3
+    assert vocab.word(1) == "cat"
+    assert vocab.count("dog") == 2
+    assert vocab.count("bird") == 0
+    assert vocab.count("fish") == 0
+    assert vocab.to_dict() == {"dog": 2, "cat": 1}
+
+
+def test_compact_sorts_and_keeps_lookups():
+    """
+    Verifies compacting sorts words, drops zero counts and still finds words.
+    """
+    vocab = Vocabulary()
+    for w in ["pear", "apple", "pear", "zoo", "ñandu"]:
+        vocab.add(w)
+    vocab.add("unused", 0)
+
+    vocab.compact()
+
+    assert list(vocab.items()) == [("apple", 1), ("pear", 2), ("zoo", 1), ("ñandu", 1)]
+    assert vocab.id_of("pear") == 1
+    assert vocab.id_of("unused") is None
+    assert "zoo" in vocab
+    assert "fig" not in vocab
+
+
+def test_save_and_load_round_trip(tmp_path):
+    """
+    Verifies a saved vocabulary is loaded back sorted with the same counts.
+    """
+    vocab = Vocabulary()
+    for w in ["b", "a", "c", "a", "b", "a"]:
+        vocab.add(w)
+
+    path = tmp_path / "vocab.bin"
+    vocab.save(str(path))
+    loaded = Vocabulary.load(str(path))
+
+    assert list(loaded.items()) == [("a", 3), ("b", 2), ("c", 1)]
+    assert loaded.count("b") == 2
+    assert loaded.count("d") == 0
+    assert vocab.word(0) == "b"
+
+
+def test_loaded_vocabulary_can_be_extended(tmp_path):
+    """
+    Verifies adding to a memory-mapped vocabulary copies it into memory.
+    """
+    vocab = Vocabulary()
+    vocab.add("dog", 2)
+    path = tmp_path / "vocab.bin"
+    vocab.save(str(path))
+
+    loaded = Vocabulary.load(str(path))
+    loaded.add("dog")
+    loaded.add("cat")
+    loaded.subtract("dog", 10)
+
+    assert loaded.to_dict() == {"cat": 1}
+
+
+def test_load_rejects_other_files(tmp_path):
+    """
+    Verifies loading a file that is not a vocabulary raises ValueError.
+    """
+    path = tmp_path / "words.txt"
+    path.write_bytes(b"not a vocabulary file at all")
+
+    with pytest.raises(ValueError):
+        Vocabulary.load(str(path))
+
+
+def test_from_counts_builds_a_compacted_vocabulary():
+    """
+    Verifies a dict of counts becomes a sorted vocabulary without an index.
+    """
+    vocab = Vocabulary.from_counts({"pear": 2, "apple": 1, "zero": 0, "ñandu": 3})
+
+    assert list(vocab.items()) == [("apple", 1), ("pear", 2), ("ñandu", 3)]
+    assert vocab.count("ñandu") == 3
+    assert "zero" not in vocab
+
+    vocab.add("fig")
+    assert vocab.to_dict() == {"apple": 1, "fig": 1, "pear": 2, "ñandu": 3}
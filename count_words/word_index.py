@@ -0,0 +1,247 @@
+"""
+Persistent incremental word-count index for a corpus directory.
+
+The index keeps, for every file of the corpus, its mtime, size, content hash
+and frequency table, plus the global totals. Updating the index only
+re-tokenizes files whose content changed; queries read the saved totals
+without touching the corpus.
+
+Tables and totals are never overwritten in place: new ones get new names
+and the manifest, replaced atomically, is the single commit point. Files
+it no longer references are deleted only after that, so a run interrupted
+halfway leaves the previous index intact.
+"""
+
+import hashlib
+import json
+import os
+
+from vocabulary import Vocabulary
+
+MANIFEST_NAME = "manifest.json"
+TOTALS_NAME = "totals.vocab"
+TABLES_DIR = "tables"
+TOTALS_PREFIX = "totals-"
+
+
+def file_hash(file_path: str) -> str:
+    """
+    Returns the BLAKE2b hex digest of a file's content.
+
+    :param file_path: file route
+    :type file_path: str
+    :return: hex digest
+    :rtype: str
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def table_name(rel: str, digest: str) -> str:
+    """
+    Names the table of a file version, relative to the index directory.
+
+    The content digest is part of the name, so the table of a changed file
+    never overwrites the one the committed manifest still points to.
+
+    :param rel: file path relative to the corpus
+    :type rel: str
+    :param digest: content hash of the file
+    :type digest: str
+    :return: table path
+    :rtype: str
+    """
+    rel_hash = hashlib.blake2b(rel.encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(TABLES_DIR, f"{rel_hash}-{digest}.vocab")
+
+
+def corpus_files(corpus_dir: str, exclude: str = None) -> list[str]:
+    """
+    Lists the regular files under corpus_dir, recursively and sorted.
+
+    :param corpus_dir: corpus directory
+    :type corpus_dir: str
+    :param exclude: directory to skip, e.g. an index kept inside the corpus
+    :type exclude: str
+    :return: file paths
+    :rtype: list[str]
+    """
+    excluded = os.path.realpath(exclude) if exclude else None
+    paths = []
+    for root, dirs, files in os.walk(corpus_dir):
+        dirs[:] = sorted(
+            d for d in dirs if os.path.realpath(os.path.join(root, d)) != excluded
+        )
+        for name in sorted(files):
+            paths.append(os.path.join(root, name))
+    return paths
+
+
+class WordIndex:
+    """
+    On-disk word-count index stored in index_dir.
+
+    count_file is called as count_file(path) for new or changed files and
+    must return (Vocabulary, invalid_count).
+    """
+
+    def __init__(self, index_dir: str, count_file):
+        self.index_dir = index_dir
+        self.count_file = count_file
+        self.manifest = {"files": {}}
+
+        manifest_path = os.path.join(index_dir, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+
+    @property
+    def invalid_count(self) -> int:
+        """
+        Total invalid tokens over all indexed files.
+        """
+        return sum(e["invalid_count"] for e in self.manifest["files"].values())
+
+    def update(self, corpus_dir: str) -> dict:
+        """
+        Brings the index up to date with corpus_dir.
+
+        Files are first compared by mtime and size, then by content hash.
+        Only files whose content changed are re-tokenized; their old table
+        is subtracted from the totals and the new one merged in. The index
+        directory is skipped when it lies inside the corpus.
+
+        :param corpus_dir: corpus directory
+        :type corpus_dir: str
+        :return: number of changed, unchanged and removed files
+        :rtype: dict
+        :raises NotADirectoryError: if corpus_dir is not a directory, which
+            would otherwise remove every indexed file
+        """
+        if not os.path.isdir(corpus_dir):
+            raise NotADirectoryError(f"corpus directory not found: {corpus_dir}")
+
+        os.makedirs(os.path.join(self.index_dir, TABLES_DIR), exist_ok=True)
+
+        files = self.manifest["files"]
+        totals = self.totals()
+        stats = {"changed": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+
+        for path in corpus_files(corpus_dir, exclude=self.index_dir):
+            rel = os.path.relpath(path, corpus_dir)
+            seen.add(rel)
+            st = os.stat(path)
+            entry = files.get(rel)
+
+            if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                stats["unchanged"] += 1
+                continue
+
+            digest = file_hash(path)
+            if entry and entry["hash"] == digest:
+                entry["mtime_ns"] = st.st_mtime_ns
+                entry["size"] = st.st_size
+                stats["unchanged"] += 1
+                continue
+
+            if entry:
+                self._subtract_table(totals, entry)
+
+            table, invalid_count = self.count_file(path)
+            totals.update(table)
+
+            table_path = table_name(rel, digest)
+            table.save(os.path.join(self.index_dir, table_path))
+
+            files[rel] = {
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "hash": digest,
+                "invalid_count": invalid_count,
+                "table": table_path,
+            }
+            stats["changed"] += 1
+
+        for rel in sorted(set(files) - seen):
+            self._subtract_table(totals, files.pop(rel))
+            stats["removed"] += 1
+
+        if stats["changed"] or stats["removed"]:
+            self.manifest["generation"] = self.manifest.get("generation", 0) + 1
+            self.manifest["totals"] = f"{TOTALS_PREFIX}{self.manifest['generation']}.vocab"
+            self._replace(self.manifest["totals"], totals.save)
+        self._replace(MANIFEST_NAME, self._write_manifest)
+        self._remove_stale_files()
+
+        return stats
+
+    def totals(self) -> Vocabulary:
+        """
+        Returns the global totals, memory-mapped from the index.
+
+        :return: vocabulary of word -> frequency over the whole corpus
+        :rtype: Vocabulary
+        """
+        totals_path = os.path.join(self.index_dir, self.manifest.get("totals", TOTALS_NAME))
+        if not os.path.exists(totals_path):
+            return Vocabulary()
+        return Vocabulary.load(totals_path)
+
+    def query(self, words: list) -> dict:
+        """
+        Looks up word frequencies in the index without rescanning the corpus.
+
+        :param words: words to look up
+        :type words: list
+        :return: mapping of word -> frequency
+        :rtype: dict
+        :raises FileNotFoundError: if index_dir holds no index
+        """
+        if not os.path.exists(os.path.join(self.index_dir, MANIFEST_NAME)):
+            raise FileNotFoundError(f"no index in {self.index_dir}")
+        totals = self.totals()
+        return {w: totals.count(w.lower()) for w in words}
+
+    def _subtract_table(self, totals: Vocabulary, entry: dict):
+        table = Vocabulary.load(os.path.join(self.index_dir, entry["table"]))
+        for word, count in table.items():
+            totals.subtract(word, count)
+
+    def _remove_stale_files(self):
+        """
+        Deletes tables and totals the manifest no longer references, left by
+        changed or removed files or by an interrupted run.
+        """
+        live = {entry["table"] for entry in self.manifest["files"].values()}
+        live.add(self.manifest.get("totals", TOTALS_NAME))
+
+        candidates = [
+            os.path.join(TABLES_DIR, name)
+            for name in os.listdir(os.path.join(self.index_dir, TABLES_DIR))
+        ]
+        candidates += [
+            name for name in os.listdir(self.index_dir)
+            if name == TOTALS_NAME or name.startswith(TOTALS_PREFIX)
+        ]
+
+        for rel_path in candidates:
+            if rel_path not in live:
+                os.remove(os.path.join(self.index_dir, rel_path))
+
+    def _write_manifest(self, file_path: str):
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+
+    def _replace(self, name: str, write):
+        """
+        Writes name through a temporary file so readers never see it half
+        written.
+        """
+        final_path = os.path.join(self.index_dir, name)
+        tmp_path = final_path + ".tmp"
+        write(tmp_path)
+        os.replace(tmp_path, final_path)
@@ -0,0 +1,169 @@
+"""
+Tests for word_index.py
+"""
+
+import os
+
+import pytest
+
+from count_words import count_file
+from word_index import WordIndex
+
+
+def _touch_later(path):
+    """
+    Moves the mtime of path forward so the index sees it as modified.
+    """
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+
+def test_update_indexes_every_file(tmp_path):
+    """
+    Verifies the first update counts every file of the corpus.
+    """
+    corpus = tmp_path / "corpus"
+    (corpus / "sub").mkdir(parents=True)
+    (corpus / "a.txt").write_text("dog cat dog\n", encoding="utf-8")
+    (corpus / "sub" / "b.txt").write_text("cat bird 12\n", encoding="utf-8")
+
+    index = WordIndex(str(tmp_path / "idx"), count_file)
+    changes = index.update(str(corpus))
+
+    assert changes == {"changed": 2, "unchanged": 0, "removed": 0}
+    assert index.totals().to_dict() == {"bird": 1, "cat": 2, "dog": 2}
+    assert index.invalid_count == 1
+
+
+def test_update_only_retokenizes_changed_files(tmp_path):
+    """
+    Verifies unchanged files are skipped and changed files are re-merged.
+    """
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("dog cat\n", encoding="utf-8")
+    (corpus / "b.txt").write_text("bird\n", encoding="utf-8")
+    WordIndex(str(tmp_path / "idx"), count_file).update(str(corpus))
+
+    counted = []
+
+    def counting(path):
+        counted.append(os.path.basename(path))
+        return count_file(path)
+
+    (corpus / "a.txt").write_text("dog dog fish\n", encoding="utf-8")
+    _touch_later(corpus / "a.txt")
+    _touch_later(corpus / "b.txt")
+
+    index = WordIndex(str(tmp_path / "idx"), counting)
+    changes = index.update(str(corpus))
+
+    assert counted == ["a.txt"]
+    assert changes == {"changed": 1, "unchanged": 1, "removed": 0}
+    assert index.totals().to_dict() == {"bird": 1, "dog": 2, "fish": 1}
+
+
+def test_update_drops_removed_files(tmp_path):
+    """
+    Verifies deleted files are subtracted from the totals.
+    """
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("dog cat\n", encoding="utf-8")
+    (corpus / "b.txt").write_text("cat\n", encoding="utf-8")
+    WordIndex(str(tmp_path / "idx"), count_file).update(str(corpus))
+
+    os.remove(corpus / "a.txt")
+    index = WordIndex(str(tmp_path / "idx"), count_file)
+    changes = index.update(str(corpus))
+
+    assert changes["removed"] == 1
+    assert index.totals().to_dict() == {"cat": 1}
+    assert len(os.listdir(tmp_path / "idx" / "tables")) == 1
+
+
+def test_query_reads_index_without_corpus(tmp_path):
+    """
+    Verifies queries are answered after the corpus is gone.
+    """
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("Dog cat dog\n", encoding="utf-8")
+    WordIndex(str(tmp_path / "idx"), count_file).update(str(corpus))
+
+    os.remove(corpus / "a.txt")
+    index = WordIndex(str(tmp_path / "idx"), count_file)
+
+    assert index.query(["dog", "CAT", "bird"]) == {"dog": 2, "CAT": 1, "bird": 0}
+
+
+def test_interrupted_update_keeps_previous_index(tmp_path):
+    """
+    Verifies a run failing halfway leaves tables the next run can trust.
+    """
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("dog cat\n", encoding="utf-8")
+    WordIndex(str(tmp_path / "idx"), count_file).update(str(corpus))
+
+    (corpus / "a.txt").write_text("fish fish fish\n", encoding="utf-8")
+    _touch_later(corpus / "a.txt")
+    (corpus / "b.txt").write_text("bird\n", encoding="utf-8")
+
+    def failing(path):
+        if path.endswith("b.txt"):
+            raise OSError("disk full")
+        return count_file(path)
+
+    with pytest.raises(OSError):
+        WordIndex(str(tmp_path / "idx"), failing).update(str(corpus))
+
+    index = WordIndex(str(tmp_path / "idx"), count_file)
+    assert index.totals().to_dict() == {"cat": 1, "dog": 1}
+
+    index.update(str(corpus))
+    assert index.totals().to_dict() == {"bird": 1, "fish": 3}
+    assert len(os.listdir(tmp_path / "idx" / "tables")) == 2
+    assert sorted(os.listdir(tmp_path / "idx")) == ["manifest.json", "tables", "totals-2.vocab"]
+
+
+def test_update_skips_index_inside_corpus(tmp_path):
+    """
+    Verifies an index kept in the corpus does not count its own files.
+    """
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("dog cat\n", encoding="utf-8")
+
+    WordIndex(str(corpus / ".idx"), count_file).update(str(corpus))
+    index = WordIndex(str(corpus / ".idx"), count_file)
+    changes = index.update(str(corpus))
+
+    assert changes == {"changed": 0, "unchanged": 1, "removed": 0}
+    assert index.totals().to_dict() == {"cat": 1, "dog": 1}
+
+
+def test_update_rejects_missing_corpus(tmp_path):
+    """
+    Verifies a mistyped corpus path fails instead of emptying the index.
+    """
+    corpus = tmp_path / "corpus"
+    corpus.mkdir()
+    (corpus / "a.txt").write_text("dog cat\n", encoding="utf-8")
+    WordIndex(str(tmp_path / "idx"), count_file).update(str(corpus))
+
+    index = WordIndex(str(tmp_path / "idx"), count_file)
+    with pytest.raises(NotADirectoryError):
+        index.update(str(tmp_path / "corpTYPO"))
+    with pytest.raises(NotADirectoryError):
+        index.update(str(corpus / "a.txt"))
+
+    assert WordIndex(str(tmp_path / "idx"), count_file).query(["dog"]) == {"dog": 1}
+
+
+def test_query_without_index_fails(tmp_path):
+    """
+    Verifies querying a directory with no manifest does not report zeros.
+    """
+    with pytest.raises(FileNotFoundError):
+        WordIndex(str(tmp_path), count_file).query(["dog"])
@@ -0,0 +1,350 @@
+"""
+Resident batch server for compute_statistics, convert_numbers and count_words.
+
+The server keeps a pool of warm worker processes with the three tools already
+imported, so each request skips interpreter startup. Requests are JSON
+objects naming a tool and either an input `path` or an inline `data` payload:
+
+    {"tool": "count_words", "path": "corpus/TC1.txt"}
+    {"tool": "convert_numbers", "data": "10\\n-3\\n"}
+
+Responses are JSON with the tool's results, the same report the CLI writes
+to its results file, and the [ERROR] messages of the run. The server listens
+on localhost HTTP (POST /run, GET /health) and/or a Unix socket speaking
+newline-delimited JSON.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import socketserver
+import stat
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The tools import their helpers (input_stream, result_writers, ...) by bare
+# name from the single copy in shared/.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOL_DIRS = ("shared", "compute_statistics", "converter", "count_words")
+for _tool_dir in TOOL_DIRS:
+    sys.path.insert(0, os.path.join(ROOT, _tool_dir))
+
+# pylint: disable=wrong-import-position,import-error
+import compute_statistics
+import convert_numbers
+import count_words
+# pylint: enable=wrong-import-position,import-error
+
+MAX_BODY_BYTES = 64 * 2**20
+
+
+def _json_number(value):
+    """
+    Returns value with NaN replaced by None, which JSON can represent.
+    """
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _run_statistics(source):
+    report = io.StringIO()
+    stats = compute_statistics.describe(source, output=report, verbose=True)
+    result = {key: _json_number(value) for key, value in stats.to_dict().items()}
+    return result, report.getvalue()
+
+
+def _run_conversion(source):
+    report = io.StringIO()
+    conversion = convert_numbers.convert(source, output=report, verbose=True)
+    result = {
+        "numbers": conversion.numbers,
+        "binary": conversion.converted[2],
+        "hexadecimal": conversion.converted[16],
+        "invalid_count": conversion.invalid_count,
+    }
+    return result, report.getvalue()
+
+
+def _run_word_count(source):
+    report = io.StringIO()
+    words = count_words.count_words(source, output=report, verbose=True)
+    result = {
+        "counts": dict(count_words.sorted_items(words.counts)),
+        "invalid_count": words.invalid_count,
+    }
+    return result, report.getvalue()
+
+
+TOOLS = {
+    "compute_statistics": _run_statistics,
+    "convert_numbers": _run_conversion,
+    "count_words": _run_word_count,
+}
+
+
+def validate_request(request) -> str:
+    """
+    Checks a request and returns its tool name.
+
+    :param request: decoded JSON request
+    :return: tool name
+    :rtype: str
+    :raises ValueError: if the request is malformed
+    """
+    if not isinstance(request, dict):
+        raise ValueError("request must be a JSON object")
+    if request.get("tool") not in TOOLS:
+        raise ValueError(f"tool must be one of {', '.join(sorted(TOOLS))}")
+    if ("path" in request) == ("data" in request):
+        raise ValueError("request needs exactly one of 'path' or 'data'")
+
+    source = request.get("path", request.get("data"))
+    if not isinstance(source, str):
+        raise ValueError("'path' and 'data' must be strings")
+    return request["tool"]
+
+
+def run_request(request: dict) -> dict:
+    """
+    Runs one request in the calling process. Used by the pool workers.
+
+    The tool runs through its library API: the report it would write to its
+    results file and its console messages are captured in memory.
+
+    :param request: validated request
+    :type request: dict
+    :return: response with the tool's results
+    :rtype: dict
+    """
+    tool = validate_request(request)
+    start = time.time()
+    messages = io.StringIO()
+
+    if "path" in request:
+        source = request["path"]
+    else:
+        source = io.StringIO(request["data"])
+
+    with contextlib.redirect_stdout(messages):
+        result, report = TOOLS[tool](source)
+
+    return {
+        "tool": tool,
+        "result": result,
+        "report": report,
+        "messages": messages.getvalue().splitlines(),
+        "seconds": time.time() - start,
+    }
+
+
+def _ping():
+    return os.getpid()
+
+
+class BatchServer:
+    """
+    Pool of warm workers shared by the HTTP and Unix socket front ends.
+    """
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # Start every worker now so the first requests do not pay for it.
+        for future in [self.pool.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+
+    def handle(self, request) -> tuple[int, dict]:
+        """
+        Runs a request on the pool.
+
+        :param request: decoded JSON request
+        :return: (HTTP-like status, response)
+        :rtype: tuple[int, dict]
+        """
+        try:
+            validate_request(request)
+            return 200, self.pool.submit(run_request, request).result()
+        except (ValueError, OSError) as exc:
+            return 400, {"error": str(exc)}
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}
+
+    def close(self):
+        """
+        Stops the workers.
+        """
+        self.pool.shutdown()
+
+
+def make_http_server(batch: BatchServer, host: str = "127.0.0.1", port: int = 0):
+    """
+    Builds a threading HTTP server answering POST /run and GET /health.
+
+    :param batch: worker pool
+    :type batch: BatchServer
+    :param host: interface to bind, localhost by default
+    :type host: str
+    :param port: port to bind, 0 picks a free one
+    :type port: int
+    :return: server; its address is in server.server_address
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        """
+        HTTP front end of the batch server.
+        """
+
+        def do_GET(self):  # pylint: disable=invalid-name
+            """
+            Answers the health check.
+            """
+            if self.path == "/health":
+                self._reply(200, {"status": "ok", "workers": batch.workers})
+            else:
+                self._reply(404, {"error": "not found"})
+
+        def do_POST(self):  # pylint: disable=invalid-name
+            """
+            Runs a request posted to /run.
+            """
+            if self.path != "/run":
+                self._reply(404, {"error": "not found"})
+                return
+
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+            except ValueError:
+                length = -1
+            if length < 0:
+                self._reply(400, {"error": "Content-Length must be a non-negative integer"})
+                return
+            if length > MAX_BODY_BYTES:
+                self._reply(413, {"error": "request too large"})
+                return
+
+            try:
+                request = json.loads(self.rfile.read(length))
+            except ValueError:
+                self._reply(400, {"error": "body must be JSON"})
+                return
+
+            self._reply(*batch.handle(request))
+
+        def _reply(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def make_unix_server(batch: BatchServer, socket_path: str):
+    """
+    Builds a threading Unix socket server speaking newline-delimited JSON.
+
+    Each line received is a request; each reply is one JSON line holding
+    the response, or {"error": ...}. A stale socket left at socket_path is
+    replaced; any other file there is left alone.
+
+    :param batch: worker pool
+    :type batch: BatchServer
+    :param socket_path: filesystem path of the socket
+    :type socket_path: str
+    :return: server
+    :raises FileExistsError: if socket_path exists and is not a socket
+    """
+
+    class Handler(socketserver.StreamRequestHandler):
+        """
+        Unix socket front end of the batch server.
+        """
+
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    _, response = 400, {"error": "request must be JSON"}
+                else:
+                    _, response = batch.handle(request)
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    with contextlib.suppress(FileNotFoundError):
+        if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+            raise FileExistsError(f"{socket_path} exists and is not a socket")
+        os.remove(socket_path)
+    return socketserver.ThreadingUnixStreamServer(socket_path, Handler)
+
+
+def initilize_parser():
+    """
+    Initializes argparser to accept params in file execution.
+    """
+    parser = argparse.ArgumentParser(
+        prog="batch_server",
+        description="Serves the three tools from a pool of warm workers"
+    )
+
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP interface to bind.")
+    parser.add_argument("--port", type=int, help="HTTP port; HTTP is off if not given.")
+    parser.add_argument("--unix", metavar="PATH", help="Also listen on this Unix socket.")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count).")
+    args = parser.parse_args()
+
+    if args.port is None and args.unix is None:
+        parser.error("give --port, --unix or both")
+    return args
+
+
+def main():
+    """
+    Program entry point.
+
+    Starts the worker pool and serves requests until interrupted.
+    """
+    args = initilize_parser()
+    batch = BatchServer(args.workers)
+    servers = []
+
+    if args.port is not None:
+        servers.append(make_http_server(batch, args.host, args.port))
+        print(f"HTTP on http://{args.host}:{servers[-1].server_address[1]}")
+    if args.unix:
+        servers.append(make_unix_server(batch, args.unix))
+        print(f"Unix socket on {args.unix}")
+
+    with ThreadPoolExecutor(max_workers=len(servers)) as threads:
+        try:
+            futures = [threads.submit(server.serve_forever) for server in servers]
+            for future in futures:
+                future.result()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+            batch.close()
+
+
+if __name__ == "__main__":
+    main()
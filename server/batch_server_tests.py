@@ -0,0 +1,162 @@
+"""
+Tests for batch_server.py
+"""
+
+import http.client
+import json
+import socket
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from batch_server import (
+    BatchServer,
+    make_http_server,
+    make_unix_server,
+    run_request,
+)
+
+
+@pytest.fixture(name="batch", scope="module")
+def fixture_batch():
+    """
+    Starts one pool of warm workers shared by the tests.
+    """
+    batch = BatchServer(workers=2)
+    yield batch
+    batch.close()
+
+
+@pytest.fixture(name="http_url")
+def fixture_http_url(batch):
+    """
+    Serves HTTP on a free localhost port for the duration of a test.
+    """
+    server = make_http_server(batch, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _post(url, body):
+    request = urllib.request.Request(
+        url + "/run", data=json.dumps(body).encode("utf-8"), method="POST"
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_run_request_inline_statistics():
+    """
+    Verifies a request runs in-process with results, report and messages.
+    """
+    response = run_request({"tool": "compute_statistics", "data": "1\n2\n2\nbad\n"})
+
+    assert response["result"]["valid_count"] == 3
+    assert response["result"]["mode"] == [2.0]
+    assert "Descriptive Statistics" in response["report"]
+    assert response["messages"] == ["[ERROR] Line 4: invalid float 'bad' -> treated as nan"]
+
+
+def test_http_runs_each_tool(http_url, tmp_path):
+    """
+    Verifies every tool answers over HTTP, by path and inline.
+    """
+    inp = tmp_path / "words.txt"
+    inp.write_text("Dog cat dog\n", encoding="utf-8")
+
+    status, words = _post(http_url, {"tool": "count_words", "path": str(inp)})
+    assert status == 200
+    assert words["result"]["counts"] == {"cat": 1, "dog": 2}
+
+    status, conversion = _post(http_url, {"tool": "convert_numbers", "data": "10\nx\n-3\n"})
+    assert status == 200
+    assert conversion["result"]["binary"] == ["1010", "nan", "-11"]
+    assert "Invalid lines: 1" in conversion["report"]
+
+    status, stats = _post(http_url, {"tool": "compute_statistics", "data": "x\n"})
+    assert status == 200
+    assert stats["result"]["mean"] is None
+
+
+def test_http_health_and_bad_requests(http_url, tmp_path):
+    """
+    Verifies the health check and errors for malformed requests.
+    """
+    with urllib.request.urlopen(http_url + "/health") as response:
+        assert json.loads(response.read())["status"] == "ok"
+
+    status, body = _post(http_url, {"tool": "nope", "data": ""})
+    assert status == 400
+    assert "tool must be one of" in body["error"]
+
+    status, body = _post(http_url, {"tool": "count_words", "path": str(tmp_path / "missing")})
+    assert status == 400
+    assert "No such file" in body["error"]
+
+
+def test_unix_socket_newline_delimited_json(batch, tmp_path):
+    """
+    Verifies the Unix socket answers one JSON line per request line.
+    """
+    socket_path = str(tmp_path / "batch.sock")
+    server = make_unix_server(batch, socket_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            with client.makefile("rwb") as stream:
+                stream.write(b'{"tool": "count_words", "data": "a b a"}\n')
+                stream.write(b"not json\n")
+                stream.flush()
+
+                first = json.loads(stream.readline())
+                second = json.loads(stream.readline())
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert first["result"]["counts"] == {"a": 2, "b": 1}
+    assert second == {"error": "request must be JSON"}
+
+
+@pytest.mark.parametrize("length", ["abc", "-1", "1.5", "\u00b2"])
+def test_http_rejects_bad_content_length(http_url, length):
+    """
+    Verifies a non-numeric or negative Content-Length answers 400.
+    """
+    host, port = http_url.removeprefix("http://").split(":")
+    conn = http.client.HTTPConnection(host, int(port))
+    try:
+        conn.putrequest("POST", "/run")
+        conn.putheader("Content-Length", length)
+        conn.endheaders()
+        response = conn.getresponse()
+        assert response.status == 400
+        assert "Content-Length" in json.loads(response.read())["error"]
+    finally:
+        conn.close()
+
+
+def test_unix_server_keeps_files_that_are_not_sockets(batch, tmp_path):
+    """
+    Verifies an existing regular file at the socket path is not deleted.
+    """
+    path = tmp_path / "important.txt"
+    path.write_text("keep me\n", encoding="utf-8")
+
+    with pytest.raises(FileExistsError):
+        make_unix_server(batch, str(path))
+    assert path.read_text(encoding="utf-8") == "keep me\n"
+
+    stale = str(tmp_path / "stale.sock")
+    make_unix_server(batch, stale).server_close()
+    make_unix_server(batch, stale).server_close()
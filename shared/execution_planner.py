@@ -0,0 +1,220 @@
+"""
+Size-aware execution planning shared by compute_statistics, convert_numbers
+and count_words.
+
+Before a run the inputs are profiled: their size and compression on disk
+and, from a sample of their first lines, the rows per byte, the error rate
+and how fast distinct values grow. Together with the cores and memory
+available, each tool uses the profile to pick an engine: the plain
+in-memory path for small inputs, streaming, multi-process or spill-to-disk
+execution for large ones. With --explain-plan the decision is printed to
+stderr, away from the console output and results on stdout.
+
+Standard input ('-') cannot be measured or sampled without consuming it, so
+it is only flagged in the profile; the tools stream it.
+"""
+
+import math
+import os
+import sys
+
+from input_stream import STDIN, detect_compression, open_input
+
+SMALL_INPUT_BYTES = 32 * 2**20
+SAMPLE_BYTES = 2**20
+COMPRESSION_RATIO = 4
+DEFAULT_MEMORY_BUDGET = 2**30
+
+
+def available_memory() -> int:
+    """
+    Returns the memory available to new allocations, in bytes.
+
+    :return: MemAvailable from /proc/meminfo, free physical pages, or None
+    :rtype: int
+    """
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def available_cores() -> int:
+    """
+    Returns the number of cores this process may run on.
+
+    :return: number of cores
+    :rtype: int
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def stat_inputs(paths: list, memory_budget: int = None) -> dict:
+    """
+    Profiles inputs from their metadata and first bytes only.
+
+    Compressed inputs are assumed to expand COMPRESSION_RATIO times until
+    sample_inputs() reads them. STDIN is not counted, only flagged.
+
+    :param paths: input files
+    :type paths: list
+    :param memory_budget: bytes the run may use, half the available memory if None
+    :type memory_budget: int
+    :return: profile with files, disk_bytes, compressed, input_bytes,
+        largest_bytes, stdin, cores and memory_budget
+    :rtype: dict
+    """
+    if memory_budget is None:
+        available = available_memory()
+        memory_budget = available // 2 if available else DEFAULT_MEMORY_BUDGET
+
+    profile = {
+        "files": len(paths),
+        "disk_bytes": 0,
+        "compressed": 0,
+        "input_bytes": 0,
+        "largest_bytes": 0,
+        "stdin": STDIN in paths,
+        "cores": available_cores(),
+        "memory_budget": memory_budget,
+    }
+
+    for path in paths:
+        if path == STDIN:
+            profile["files"] -= 1
+            continue
+        with open(path, "rb") as raw:
+            size = os.fstat(raw.fileno()).st_size
+            compressed = detect_compression(raw) is not None
+
+        expanded = size * COMPRESSION_RATIO if compressed else size
+        profile["disk_bytes"] += size
+        profile["compressed"] += compressed
+        profile["input_bytes"] += expanded
+        profile["largest_bytes"] = max(profile["largest_bytes"], expanded)
+
+    return profile
+
+
+def is_small(profile: dict) -> bool:
+    """
+    Tells whether inputs are small enough to skip sampling.
+
+    :param profile: profile from stat_inputs()
+    :type profile: dict
+    :return: True for uncompressed files up to SMALL_INPUT_BYTES, without stdin
+    :rtype: bool
+    """
+    return (not profile["compressed"] and not profile["stdin"]
+            and profile["input_bytes"] <= SMALL_INPUT_BYTES)
+
+
+def _sample_lines(paths: list, limit: int, state: dict):
+    """
+    Yields the first lines of paths until limit characters are read, and
+    sets state["exhausted"] when every line was read.
+    """
+    for path in paths:
+        with open_input(path) as f:
+            for line in f:
+                state["chars"] += len(line)
+                yield line
+                if state["chars"] >= limit:
+                    return
+    state["exhausted"] = True
+
+
+def sample_inputs(profile: dict, paths: list, tokenize, sample_bytes: int = SAMPLE_BYTES):
+    """
+    Extends a profile with estimates drawn from the first lines of paths.
+
+    tokenize(line) returns the tokens of a line, None for invalid ones.
+    Row and distinct counts are extrapolated to the whole input; distinct
+    values are assumed to grow as a power of the rows (Heaps' law) with
+    the exponent measured between the first half and the whole sample.
+
+    Adds rows, distinct and error_rate to the profile. When the sample
+    covers the whole input, input_bytes and the counts are exact.
+
+    :param profile: profile from stat_inputs()
+    :type profile: dict
+    :param paths: input files
+    :type paths: list
+    :param tokenize: line -> list of tokens
+    :param sample_bytes: characters to sample
+    :type sample_bytes: int
+    :return: the updated profile
+    :rtype: dict
+    """
+    state = {"chars": 0, "exhausted": False}
+    seen = set()
+    rows = invalid = 0
+    half = None
+
+    for line in _sample_lines(paths, sample_bytes, state):
+        for token in tokenize(line):
+            rows += 1
+            if token is None:
+                invalid += 1
+            else:
+                seen.add(token)
+        if half is None and state["chars"] >= sample_bytes // 2:
+            half = (rows, len(seen))
+
+    distinct = len(seen)
+    if state["exhausted"]:
+        profile["input_bytes"] = state["chars"]
+        profile["largest_bytes"] = min(profile["largest_bytes"], state["chars"])
+    elif state["chars"]:
+        scale = profile["input_bytes"] / state["chars"]
+        growth = 1.0
+        if half and half[1] and rows > half[0]:
+            growth = math.log(distinct / half[1]) / math.log(rows / half[0])
+        rows = int(rows * scale)
+        distinct = min(rows, int(distinct * scale ** min(max(growth, 0.0), 1.0)))
+
+    profile["rows"] = rows
+    profile["distinct"] = distinct
+    profile["error_rate"] = invalid / rows if rows else 0.0
+    return profile
+
+
+def _mib(n: float) -> str:
+    return f"{n / 2**20:.1f} MiB"
+
+
+def log_plan(tool: str, engine: str, reason: str, profile: dict):
+    """
+    Prints the engine chosen for a run and why to stderr.
+
+    :param tool: tool name
+    :type tool: str
+    :param engine: engine name
+    :type engine: str
+    :param reason: short explanation
+    :type reason: str
+    :param profile: profile the decision was based on
+    :type profile: dict
+    """
+    details = [
+        f"input ~{_mib(profile['input_bytes'])} in {profile['files']} file(s)",
+        f"{profile['compressed']} compressed",
+    ]
+    if profile["stdin"]:
+        details[0] += " and stdin"
+    if "rows" in profile:
+        details.append(f"~{profile['rows']} rows, ~{profile['distinct']} distinct, "
+                       f"{profile['error_rate']:.1%} invalid")
+    details.append(f"{profile['cores']} cores, budget {_mib(profile['memory_budget'])}")
+
+    print(f"[PLAN] {tool}: {engine} engine, {reason} ({'; '.join(details)})", file=sys.stderr)
@@ -0,0 +1,74 @@
+"""
+Tests for execution_planner.py
+"""
+
+import gzip
+
+from execution_planner import is_small, sample_inputs, stat_inputs
+
+
+def _sample_tokens(line: str) -> list:
+    return [token.lower() if token.isalpha() else None for token in line.split()]
+
+
+def test_stat_inputs_detects_compression(tmp_path):
+    """
+    Verifies sizes add up and compressed inputs are assumed to expand.
+    """
+    (tmp_path / "a.txt").write_bytes(b"x" * 100)
+    (tmp_path / "b.gz").write_bytes(gzip.compress(b"y" * 1000))
+    paths = [str(tmp_path / "a.txt"), str(tmp_path / "b.gz")]
+
+    profile = stat_inputs(paths, memory_budget=123)
+    compressed_size = (tmp_path / "b.gz").stat().st_size
+
+    assert profile["files"] == 2
+    assert profile["compressed"] == 1
+    assert profile["disk_bytes"] == 100 + compressed_size
+    assert profile["input_bytes"] > profile["disk_bytes"]
+    assert profile["memory_budget"] == 123
+    assert not is_small(profile)
+    assert is_small(stat_inputs(paths[:1]))
+
+
+def test_stat_inputs_flags_stdin_without_reading_it(tmp_path):
+    """
+    Verifies stdin is flagged, not counted, and never treated as small.
+    """
+    (tmp_path / "a.txt").write_bytes(b"x" * 100)
+
+    profile = stat_inputs(["-", str(tmp_path / "a.txt")])
+
+    assert profile["stdin"]
+    assert profile["files"] == 1
+    assert profile["disk_bytes"] == 100
+    assert not is_small(profile)
+
+
+def test_sample_inputs_is_exact_when_sample_covers_input(tmp_path):
+    """
+    Verifies counts are exact for inputs smaller than the sample.
+    """
+    (tmp_path / "b.gz").write_bytes(gzip.compress(b"Dog cat\ndog 12\n"))
+    paths = [str(tmp_path / "b.gz")]
+
+    profile = sample_inputs(stat_inputs(paths), paths, _sample_tokens)
+
+    assert profile["input_bytes"] == 15
+    assert profile["rows"] == 4
+    assert profile["distinct"] == 2
+    assert profile["error_rate"] == 0.25
+
+
+def test_sample_inputs_extrapolates_rows_and_distinct(tmp_path):
+    """
+    Verifies rows scale with size and repeated words do not inflate distinct.
+    """
+    inp = tmp_path / "words.txt"
+    inp.write_text("dog cat bird\n" * 10000, encoding="utf-8")
+    paths = [str(inp)]
+
+    profile = sample_inputs(stat_inputs(paths), paths, _sample_tokens, sample_bytes=13000)
+
+    assert 29000 <= profile["rows"] <= 31000
+    assert profile["distinct"] == 3
@@ -0,0 +1,223 @@
+"""
+Opens input files as text, transparently decompressing gzip, xz and zstd.
+
+Compression is detected from the magic bytes, not the file extension.
+Compressed inputs are decompressed by a background thread that feeds a
+bounded queue of chunks, so decompression overlaps with parsing and only a
+few chunks are ever held in memory.
+
+The path '-' reads standard input, in chunks of at most CHUNK_SIZE bytes as
+they arrive. Lines are only read as fast as they are processed, so a pipe
+feeding the tools blocks its producer instead of filling memory.
+
+open_source() resolves the inputs accepted by the library API of the tools.
+"""
+
+import contextlib
+import gzip
+import io
+import lzma
+import os
+import queue
+import sys
+import threading
+
+STDIN = "-"
+CHUNK_SIZE = 1 << 16
+QUEUE_CHUNKS = 16
+
+MAGIC_BYTES = {
+    b"\x1f\x8b": "gzip",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+
+def detect_compression(raw) -> str:
+    """
+    Returns 'gzip', 'xz', 'zstd' or None from the first bytes of raw.
+
+    :param raw: buffered binary stream, left at its current position
+    :return: compression name or None
+    :rtype: str
+    """
+    head = raw.peek(6)[:6]
+    for magic, kind in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return kind
+    return None
+
+
+def _decompressor(kind: str, raw):
+    if kind == "gzip":
+        return gzip.GzipFile(fileobj=raw)
+    if kind == "xz":
+        return lzma.LZMAFile(raw)
+
+    try:
+        from compression import zstd  # pylint: disable=import-outside-toplevel
+        return zstd.ZstdFile(raw)
+    except ImportError:
+        pass
+    try:
+        import zstandard  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise RuntimeError(
+            "reading zstd input needs Python 3.14+ or the 'zstandard' package"
+        ) from exc
+    # Concatenated files and pzstd output hold several frames; read them all.
+    return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+
+
+class _ChunkQueueReader(io.RawIOBase):
+    """
+    Raw binary stream fed with decompressed chunks by a background thread.
+
+    The queue holds at most QUEUE_CHUNKS chunks, so the thread blocks when
+    the reader falls behind. Errors raised while decompressing are raised
+    again on the reading side.
+    """
+
+    def __init__(self, source, raw):
+        super().__init__()
+        self._source = source
+        self._raw = raw
+        self._queue = queue.Queue(maxsize=QUEUE_CHUNKS)
+        self._stop = threading.Event()
+        self._chunk = memoryview(b"")
+        self._eof = False
+        self._thread = threading.Thread(target=self._pump, daemon=True)
+        self._thread.start()
+
+    def _pump(self):
+        try:
+            while not self._stop.is_set():
+                chunk = self._source.read(CHUNK_SIZE)
+                self._put(chunk)
+                if not chunk:
+                    break
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self._put(exc)
+        finally:
+            self._source.close()
+            self._raw.close()
+
+    def _put(self, item):
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if not self._chunk and not self._eof:
+            item = self._queue.get()
+            if isinstance(item, Exception):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+            self._chunk = memoryview(item)
+
+        n = min(len(b), len(self._chunk))
+        b[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+        super().close()
+
+
+class _StdinReader(io.RawIOBase):
+    """
+    Raw stream over sys.stdin.buffer that leaves stdin open when closed.
+
+    Each read returns what one read of stdin gives, without waiting for a
+    full buffer, so lines are processed as soon as they arrive.
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._buffer = buffer
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        return self._buffer.readinto1(b)
+
+
+def open_input(file_path: str, encoding: str = "utf-8"):
+    """
+    Opens file_path for reading text, decompressing it if needed.
+
+    Uncompressed files are opened directly, with no extra thread. STDIN
+    ('-') reads standard input, which is left open afterwards.
+
+    :param file_path: file route
+    :type file_path: str
+    :param encoding: text encoding
+    :type encoding: str
+    :return: text stream to use as a context manager and iterate by lines
+    """
+    if file_path == STDIN:
+        raw = io.BufferedReader(_StdinReader(sys.stdin.buffer), CHUNK_SIZE)
+    else:
+        raw = open(file_path, "rb")  # pylint: disable=consider-using-with
+    try:
+        kind = detect_compression(raw)
+        if kind is None:
+            return io.TextIOWrapper(raw, encoding=encoding)
+
+        reader = _ChunkQueueReader(_decompressor(kind, raw), raw)
+    except BaseException:
+        raw.close()
+        raise
+
+    return io.TextIOWrapper(io.BufferedReader(reader, CHUNK_SIZE), encoding=encoding)
+
+
+@contextlib.contextmanager
+def _detached_text(buffer, encoding: str):
+    text = io.TextIOWrapper(buffer, encoding=encoding)
+    try:
+        yield text
+    finally:
+        text.detach()
+
+
+def _as_lines(items):
+    for item in items:
+        yield item if isinstance(item, str) else str(item)
+
+
+def open_source(source, encoding: str = "utf-8"):
+    """
+    Opens an input given to the library API as lines of text.
+
+    source is a file path or STDIN, bytes, a binary or text buffer, or an
+    iterable of lines. Paths are opened with open_input() and closed afterwards; buffers
+    are left open. Items of an iterable that are not strings, e.g. numbers,
+    are converted with str().
+
+    :param source: input to read
+    :param encoding: text encoding of paths, bytes and binary buffers
+    :type encoding: str
+    :return: context manager giving an iterable of lines
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return open_input(os.fspath(source), encoding)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return _detached_text(io.BytesIO(source), encoding)
+    if isinstance(source, io.TextIOBase):
+        return contextlib.nullcontext(source)
+    if isinstance(source, io.IOBase):
+        return _detached_text(source, encoding)
+    return contextlib.nullcontext(_as_lines(source))
@@ -0,0 +1,22 @@
+"""
+Tests for input_stream.py
+"""
+
+import pytest
+
+from input_stream import CHUNK_SIZE, open_input
+
+
+def test_zstd_input_reads_every_frame(tmp_path):
+    """
+    Verifies a .zst file of several frames, like concatenated files or
+    pzstd output, is read to the end.
+    """
+    zstandard = pytest.importorskip("zstandard")
+    compressor = zstandard.ZstdCompressor()
+    first = b"dog cat\n" * (CHUNK_SIZE // 4)
+    path = tmp_path / "words.zst"
+    path.write_bytes(compressor.compress(first) + compressor.compress(b"bird\n"))
+
+    with open_input(str(path)) as f:
+        assert f.read() == first.decode("ascii") + "bird\n"
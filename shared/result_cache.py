@@ -0,0 +1,232 @@
+"""
+Content-addressed result cache shared by compute_statistics, convert_numbers
+and count_words.
+
+Entries are keyed by a BLAKE2b hash of the input bytes plus the tool name and
+its options. An entry holds the result files and console output of a run, so
+a hit replays them without parsing the input. The cache is bounded in size
+and evicts the least recently used entries; hit and miss counts are kept per
+tool.
+"""
+
+import base64
+import contextlib
+import fcntl
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+DEFAULT_MAX_BYTES = 256 * 2**20
+
+
+def default_cache_dir() -> str:
+    """
+    Returns the cache directory used when none is given.
+
+    :return: $XDG_CACHE_HOME/tc4017, or ~/.cache/tc4017
+    :rtype: str
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "tc4017")
+
+
+class _Tee(io.TextIOBase):
+    """
+    Text stream writing to another stream while keeping a copy.
+    """
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+        self.copy = io.StringIO()
+
+    def write(self, s):
+        self.copy.write(s)
+        return self.stream.write(s)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _encode_file(data: bytes):
+    """
+    Returns the content of a result file as stored in an entry: text, or
+    {"base64": ...} for binary files.
+    """
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(data).decode("ascii")}
+
+
+def _decode_file(stored) -> bytes:
+    if isinstance(stored, dict):
+        return base64.b64decode(stored["base64"])
+    return stored.encode("utf-8")
+
+
+def _write_atomic(file_path: str, text: str):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, file_path)
+
+
+class ResultCache:
+    """
+    On-disk LRU cache of tool results in cache_dir.
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.entries_dir = os.path.join(self.cache_dir, "entries")
+        self.stats_path = os.path.join(self.cache_dir, "stats.json")
+        self.lock_path = os.path.join(self.cache_dir, "stats.lock")
+        os.makedirs(self.entries_dir, exist_ok=True)
+
+    @staticmethod
+    def key(tool: str, file_paths: list, options: dict = None) -> str:
+        """
+        Builds the cache key of a run from its inputs' content and options.
+
+        :param tool: tool name
+        :type tool: str
+        :param file_paths: input files, hashed in order
+        :type file_paths: list
+        :param options: options that change the results
+        :type options: dict
+        :return: hex key
+        :rtype: str
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps([tool, options or {}], sort_keys=True).encode("utf-8"))
+
+        for file_path in file_paths:
+            digest.update(b"\0file\0")
+            with open(file_path, "rb") as f:
+                while chunk := f.read(1 << 20):
+                    digest.update(chunk)
+
+        return digest.hexdigest()
+
+    def get(self, key: str):
+        """
+        Returns the entry stored under key and marks it recently used.
+
+        :param key: cache key
+        :type key: str
+        :return: entry dict, or None on a miss
+        """
+        entry_path = os.path.join(self.entries_dir, key + ".json")
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(entry_path)
+        return entry
+
+    def put(self, key: str, entry: dict):
+        """
+        Stores entry under key, then evicts entries past max_bytes.
+
+        :param key: cache key
+        :type key: str
+        :param entry: JSON-serializable entry
+        :type entry: dict
+        """
+        _write_atomic(os.path.join(self.entries_dir, key + ".json"), json.dumps(entry))
+        self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits max_bytes.
+        """
+        entries = []
+        total = 0
+        for entry in os.scandir(self.entries_dir):
+            if entry.name.endswith(".json"):
+                st = entry.stat()
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                total += st.st_size
+
+        entries.sort()
+        for _, size, entry_path in entries:
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(entry_path)
+            total -= size
+
+    def record(self, tool: str, hit: bool) -> dict:
+        """
+        Counts a hit or a miss for tool and returns its updated counts.
+
+        The update holds an exclusive lock on lock_path, so runs sharing the
+        cache do not lose each other's counts.
+
+        :param tool: tool name
+        :type tool: str
+        :param hit: whether the lookup hit
+        :type hit: bool
+        :return: {"hits": ..., "misses": ...}
+        :rtype: dict
+        """
+        with open(self.lock_path, "a", encoding="utf-8") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            stats = {}
+            with contextlib.suppress(FileNotFoundError, ValueError):
+                with open(self.stats_path, "r", encoding="utf-8") as f:
+                    stats = json.load(f)
+
+            counts = stats.setdefault(tool, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+            _write_atomic(self.stats_path, json.dumps(stats, sort_keys=True))
+        return counts
+
+    def run(self, tool: str, key: str, result_files: list, compute) -> bool:
+        """
+        Replays a cached run, or calls compute() and caches what it produced.
+
+        On a hit the result files are rewritten, in the order of
+        result_files, and the console output is printed again. On a miss
+        compute() runs with its console output copied, and its result files
+        and output are stored. Binary result files are stored base64-encoded.
+
+        :param tool: tool name, for the hit and miss counts
+        :type tool: str
+        :param key: cache key from key()
+        :type key: str
+        :param result_files: files the run writes, in a fixed order
+        :type result_files: list
+        :param compute: callable doing the actual run
+        :return: True on a hit
+        :rtype: bool
+        """
+        entry = self.get(key)
+        if entry is not None:
+            for file_path, stored in zip(result_files, entry["files"].values()):
+                with open(file_path, "wb") as f:
+                    f.write(_decode_file(stored))
+            sys.stdout.write(entry["stdout"])
+        else:
+            tee = _Tee(sys.stdout)
+            with contextlib.redirect_stdout(tee):
+                compute()
+
+            files = {}
+            for file_path in result_files:
+                with open(file_path, "rb") as f:
+                    files[file_path] = _encode_file(f.read())
+            self.put(key, {"files": files, "stdout": tee.copy.getvalue()})
+
+        counts = self.record(tool, entry is not None)
+        print(f"[CACHE] {'hit' if entry is not None else 'miss'} "
+              f"(hits: {counts['hits']}, misses: {counts['misses']})")
+        return entry is not None
@@ -0,0 +1,81 @@
+"""
+Tests for result_cache.py
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from result_cache import ResultCache
+
+
+def test_key_depends_on_content_tool_and_options(tmp_path):
+    """
+    Verifies keys follow the input bytes, not the file name.
+    """
+    a = tmp_path / "a.txt"
+    b = tmp_path / "b.txt"
+    a.write_text("dog cat\n", encoding="utf-8")
+    b.write_text("dog cat\n", encoding="utf-8")
+
+    key = ResultCache.key("count_words", [str(a)])
+    assert key == ResultCache.key("count_words", [str(b)])
+    assert key != ResultCache.key("compute_statistics", [str(a)])
+    assert key != ResultCache.key("count_words", [str(a)], {"ngrams": [2]})
+
+    b.write_text("dog cow\n", encoding="utf-8")
+    assert key != ResultCache.key("count_words", [str(b)])
+
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    """
+    Verifies entries past the size bound are evicted oldest use first.
+    """
+    cache = ResultCache(str(tmp_path), max_bytes=10**6)
+    for name in ["a", "b", "c"]:
+        cache.put(name, {"files": {}, "stdout": name * 1000})
+
+    for age, name in enumerate(["b", "a", "c"]):
+        path = os.path.join(cache.entries_dir, name + ".json")
+        os.utime(path, ns=(age * 10**9, age * 10**9))
+    assert cache.get("b") is not None
+
+    cache.max_bytes = 2500
+    cache.evict()
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert cache.get("c") is not None
+
+
+def test_run_stores_binary_results_and_replays_to_new_paths(tmp_path, capsys):
+    """
+    Verifies binary result files are cached and replayed in result_files order.
+    """
+    cache = ResultCache(str(tmp_path / "cache"))
+    first = tmp_path / "first.col"
+    data = b"\xff\x00binary"
+
+    cache.run("count_words", "k", [str(first)], lambda: first.write_bytes(data))
+    second = tmp_path / "second.col"
+    hit = cache.run("count_words", "k", [str(second)], lambda: None)
+
+    assert hit
+    assert second.read_bytes() == data
+    assert "[CACHE] hit" in capsys.readouterr().out
+
+
+def _record_hits(cache_dir, count):
+    cache = ResultCache(cache_dir)
+    for _ in range(count):
+        cache.record("count_words", hit=True)
+
+
+def test_record_keeps_counts_of_concurrent_runs(tmp_path):
+    """
+    Verifies runs sharing the cache do not lose each other's hit counts.
+    """
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_record_hits, [str(tmp_path)] * 4, [50] * 4))
+
+    counts = ResultCache(str(tmp_path)).record("count_words", hit=False)
+    assert counts == {"hits": 200, "misses": 1}
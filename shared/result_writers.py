@@ -0,0 +1,421 @@
+"""
+Result writers shared by compute_statistics, convert_numbers and count_words.
+
+Besides the aligned text report each tool writes, results can be written in
+formats that loaders read without re-parsing padded columns:
+
+- csv: a header row with the column names, then one row per result.
+- jsonl: one JSON object per result row.
+- columnar: a compact binary file holding each column in row groups, with
+  a type per column fixed when the writer opens.
+
+Files are opened with a large buffer and rows are formatted in batches, so
+they reach the file in bulk writes instead of one write per row. The
+output path '-' (STDOUT) makes the tools write results to standard output.
+
+Column types are "int" (exact integers), "float" (float64) and "string".
+None is null in every column; in int and float columns so is "nan", which
+the tools write for values they could not compute. Any other value that is
+not of its column's type is an error rather than a silent conversion.
+
+Columnar file layout, integers little-endian:
+
+    b"TCCOL02\\n"
+    row groups: per column, a validity bitmap (bit set = not null) if the
+        chunk has nulls, then int64 or float64 values, or uint64 offsets
+        (rows + 1) followed by UTF-8 bytes for strings and for int chunks
+        holding values past int64, stored as decimal digits
+    footer: JSON with columns, types, meta, rows and the encoding, nulls
+        flag, offset and length of every column chunk of every row group
+    uint32 footer length, b"TCCOL02\\n"
+"""
+
+import abc
+import contextlib
+import csv
+import io
+import itertools
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+
+STDOUT = "-"
+FORMATS = ("text", "csv", "jsonl", "columnar")
+EXTENSIONS = {"text": ".txt", "csv": ".csv", "jsonl": ".jsonl", "columnar": ".col"}
+BUFFER_SIZE = 1 << 20
+BATCH_ROWS = 1 << 12
+ROW_GROUP_ROWS = 1 << 16
+COLUMNAR_MAGIC = b"TCCOL02\n"
+COLUMN_TYPES = ("int", "float", "string")
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+
+def output_path(default: str, fmt: str) -> str:
+    """
+    Returns the default results file of a tool for a format.
+
+    :param default: results file of the text format, e.g. WordCountResults.txt
+    :type default: str
+    :param fmt: one of FORMATS
+    :type fmt: str
+    :return: default with the extension of fmt
+    :rtype: str
+    """
+    return os.path.splitext(default)[0] + EXTENSIONS[fmt]
+
+
+def open_result(target, binary: bool = False, newline: str = None):
+    """
+    Opens where results go: a file path with a large buffer, or a stream
+    left open.
+
+    A binary target that is a text stream, such as sys.stdout, is written
+    through its underlying buffer.
+
+    :param target: file path or writable stream
+    :param binary: whether bytes are written
+    :type binary: bool
+    :param newline: newline translation of text files, see open()
+    :type newline: str
+    :return: context manager giving a writable stream
+    """
+    if isinstance(target, (str, os.PathLike)):
+        if binary:
+            return open(target, "wb", buffering=BUFFER_SIZE)
+        return open(target, "w", encoding="utf-8", buffering=BUFFER_SIZE, newline=newline)
+
+    if binary and isinstance(target, io.TextIOBase):
+        target.flush()
+        target = target.buffer
+    return contextlib.nullcontext(target)
+
+
+@contextlib.contextmanager
+def redirect_to_stdout():
+    """
+    Gives sys.stdout for results and sends console output to stderr.
+
+    A reader closing the pipe early, like head, ends the run with status 1
+    instead of a traceback.
+
+    :return: context manager giving the original sys.stdout
+    """
+    stdout = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield stdout
+            stdout.flush()
+    except BrokenPipeError:
+        # Python flushes stdout again at exit; point it at /dev/null first.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, stdout.fileno())
+        sys.exit(1)
+
+
+def write_lines(f, lines):
+    """
+    Writes lines to f, BATCH_ROWS at a time.
+
+    :param f: writable text stream
+    :param lines: iterable of strings, each ending with a newline
+    """
+    for batch in itertools.batched(lines, BATCH_ROWS):
+        f.write("".join(batch))
+
+
+def _json_value(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+class ResultWriter(abc.ABC):
+    """
+    Writes rows of named columns. Used as a context manager.
+
+    Subclasses implement write_rows for their format.
+    """
+
+    binary = False
+    newline = None
+
+    def __init__(self, f, columns: tuple, meta: dict = None, types: tuple = None):
+        self.f = f
+        self.columns = tuple(columns)
+        self.meta = meta or {}
+        self.types = tuple(types) if types else None
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @abc.abstractmethod
+    def write_rows(self, rows):
+        """
+        Writes rows, each a sequence with one value per column.
+
+        :param rows: iterable of rows
+        """
+
+    def close(self):
+        """
+        Finishes the output. The stream itself is left open.
+        """
+        self.f.flush()
+
+
+class CsvWriter(ResultWriter):
+    """
+    Writes a CSV header and rows. Lists are written as their repr.
+    """
+
+    newline = ""
+
+    def __init__(self, f, columns: tuple, meta: dict = None, types: tuple = None):
+        super().__init__(f, columns, meta, types)
+        self.writer = csv.writer(f, lineterminator="\n")
+        self.writer.writerow(self.columns)
+
+    def write_rows(self, rows):
+        for batch in itertools.batched(rows, BATCH_ROWS):
+            self.writer.writerows(batch)
+            self.rows += len(batch)
+
+
+class JsonLinesWriter(ResultWriter):
+    """
+    Writes one JSON object per row. NaN and infinities become null.
+    """
+
+    def write_rows(self, rows):
+        for batch in itertools.batched(rows, BATCH_ROWS):
+            self.f.write("".join(
+                json.dumps(dict(zip(self.columns, map(_json_value, row)))) + "\n"
+                for row in batch
+            ))
+            self.rows += len(batch)
+
+
+def _column_value(kind: str, value):
+    """
+    Checks a value against its column type, returning it as stored or None
+    for null.
+
+    :raises TypeError: if value is not of the column's type
+    """
+    if value is None:
+        return None
+    if kind == "string":
+        return value if isinstance(value, str) else str(value)
+    if isinstance(value, str) and value == "nan":
+        return None
+
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"{kind} column got {value!r}")
+    if kind == "float":
+        return float(value)
+    if not isinstance(value, int):
+        raise TypeError(f"int column got {value!r}")
+    return value
+
+
+def _little_endian(packed: array) -> bytes:
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _encode_strings(values) -> bytes:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = array("Q", itertools.accumulate(map(len, encoded), initial=0))
+    return _little_endian(offsets) + b"".join(encoded)
+
+
+def _encode_column(kind: str, values: list) -> tuple[dict, bytes]:
+    """
+    Encodes a column chunk of a given type. Nulls are kept in a validity
+    bitmap and stored as 0 or "" in the values. An int chunk with a value
+    past int64 is stored as decimal strings, so integers stay exact.
+
+    :return: (chunk description, data)
+    :rtype: tuple[dict, bytes]
+    """
+    values = [_column_value(kind, v) for v in values]
+    bitmap = b""
+    if None in values:
+        valid = bytearray((len(values) + 7) // 8)
+        for i, value in enumerate(values):
+            if value is not None:
+                valid[i >> 3] |= 1 << (i & 7)
+        bitmap = bytes(valid)
+        values = [("" if kind == "string" else 0) if v is None else v for v in values]
+
+    if kind == "float":
+        encoding, data = "float64", _little_endian(array("d", values))
+    elif kind == "int" and all(INT64_MIN <= v <= INT64_MAX for v in values):
+        encoding, data = "int64", _little_endian(array("q", values))
+    elif kind == "int":
+        encoding, data = "decimal", _encode_strings(map(str, values))
+    else:
+        encoding, data = "utf8", _encode_strings(values)
+
+    return {"encoding": encoding, "nulls": bool(bitmap)}, bitmap + data
+
+
+def _decode_column(chunk: dict, data: bytes, rows: int) -> list:
+    valid = None
+    if chunk["nulls"]:
+        valid, data = data[:(rows + 7) // 8], data[(rows + 7) // 8:]
+
+    if chunk["encoding"] in ("int64", "float64"):
+        values = array("q" if chunk["encoding"] == "int64" else "d")
+        values.frombytes(data)
+        if sys.byteorder == "big":
+            values.byteswap()
+        values = values.tolist()
+    else:
+        offsets = array("Q")
+        offsets.frombytes(data[:8 * (rows + 1)])
+        if sys.byteorder == "big":
+            offsets.byteswap()
+        blob = memoryview(data)[8 * (rows + 1):]
+        values = [str(blob[a:b], "utf-8") for a, b in itertools.pairwise(offsets)]
+        if chunk["encoding"] == "decimal":
+            values = [int(v) if v else 0 for v in values]
+
+    if valid is not None:
+        values = [v if valid[i >> 3] >> (i & 7) & 1 else None for i, v in enumerate(values)]
+    return values
+
+
+class ColumnarWriter(ResultWriter):
+    """
+    Writes the binary columnar format described in the module docstring.
+
+    Rows are buffered per column and flushed every ROW_GROUP_ROWS rows, so
+    memory stays bounded however many rows are written. Every row group
+    uses the column types given here.
+
+    :raises ValueError: if types does not give one of COLUMN_TYPES per column
+    """
+
+    binary = True
+
+    def __init__(self, f, columns: tuple, meta: dict = None, types: tuple = None):
+        super().__init__(f, columns, meta, types)
+        if (not self.types or len(self.types) != len(self.columns)
+                or not set(self.types) <= set(COLUMN_TYPES)):
+            raise ValueError(f"columnar output needs one of {', '.join(COLUMN_TYPES)} "
+                             f"per column")
+        self.groups = []
+        self.pending = []
+        self.offset = len(COLUMNAR_MAGIC)
+        f.write(COLUMNAR_MAGIC)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.pending.append(row)
+            if len(self.pending) >= ROW_GROUP_ROWS:
+                self._flush_group()
+
+    def _flush_group(self):
+        chunks = []
+        for kind, values in zip(self.types, zip(*self.pending)):
+            chunk, data = _encode_column(kind, list(values))
+            self.f.write(data)
+            chunks.append({**chunk, "offset": self.offset, "length": len(data)})
+            self.offset += len(data)
+
+        self.groups.append({"rows": len(self.pending), "chunks": chunks})
+        self.rows += len(self.pending)
+        self.pending = []
+
+    def close(self):
+        if self.pending:
+            self._flush_group()
+
+        footer = json.dumps({
+            "columns": list(self.columns),
+            "types": list(self.types),
+            "meta": self.meta,
+            "rows": self.rows,
+            "groups": self.groups,
+        }).encode("utf-8")
+        self.f.write(footer + struct.pack("<I", len(footer)) + COLUMNAR_MAGIC)
+        super().close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonLinesWriter, "columnar": ColumnarWriter}
+
+
+@contextlib.contextmanager
+def open_writer(fmt: str, target, columns: tuple, meta: dict = None, types: tuple = None):
+    """
+    Opens a writer of rows in a machine-readable format.
+
+    The text format is laid out by each tool, so it is not handled here.
+
+    :param fmt: 'csv', 'jsonl' or 'columnar'
+    :type fmt: str
+    :param target: file path or writable stream
+    :param columns: column names
+    :type columns: tuple
+    :param meta: run details kept in the columnar footer, e.g. execution time
+    :type meta: dict
+    :param types: one of COLUMN_TYPES per column, required by columnar
+    :type types: tuple
+    :return: context manager giving a ResultWriter
+    :raises ValueError: if fmt is not a machine-readable format
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"format must be one of {', '.join(WRITERS)}")
+
+    writer_class = WRITERS[fmt]
+    with open_result(target, writer_class.binary, writer_class.newline) as f:
+        with writer_class(f, columns, meta, types) as writer:
+            yield writer
+
+
+def read_columnar(source) -> tuple[list, dict, dict]:
+    """
+    Reads a file written by ColumnarWriter.
+
+    :param source: file path or seekable binary stream
+    :return: (columns, meta, data) where data maps each column to its values,
+        None for nulls
+    :rtype: tuple[list, dict, dict]
+    :raises ValueError: if source is not a columnar file
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return read_columnar(f)
+
+    tail = len(COLUMNAR_MAGIC) + 4
+    head = source.read(len(COLUMNAR_MAGIC))
+    if head != COLUMNAR_MAGIC or source.seek(0, os.SEEK_END) < 2 * tail:
+        raise ValueError("not a columnar results file")
+
+    source.seek(-tail, os.SEEK_END)
+    length, magic = struct.unpack("<I", source.read(4))[0], source.read()
+    if magic != COLUMNAR_MAGIC:
+        raise ValueError("not a columnar results file")
+
+    source.seek(-tail - length, os.SEEK_END)
+    footer = json.loads(source.read(length))
+    data = {column: [] for column in footer["columns"]}
+
+    for group in footer["groups"]:
+        for column, chunk in zip(footer["columns"], group["chunks"]):
+            source.seek(chunk["offset"])
+            raw = source.read(chunk["length"])
+            data[column].extend(_decode_column(chunk, raw, group["rows"]))
+
+    return footer["columns"], footer["meta"], data
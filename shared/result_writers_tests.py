@@ -0,0 +1,149 @@
+"""
+Tests for result_writers.py
+"""
+
+import csv
+import io
+import json
+import math
+import struct
+
+import pytest
+
+import result_writers
+from result_writers import open_result, open_writer, output_path, read_columnar, write_lines
+
+ROWS = [(1, "a,b", 0.5), (-2, "ñ", float("nan")), (3, "c", 2)]
+
+
+def test_output_path_follows_format():
+    """
+    Verifies the default results file takes the extension of the format.
+    """
+    assert output_path("WordCountResults.txt", "text") == "WordCountResults.txt"
+    assert output_path("WordCountResults.txt", "columnar") == "WordCountResults.col"
+
+
+def test_write_lines_batches_writes(monkeypatch):
+    """
+    Verifies lines reach the stream in batches, not one write per line.
+    """
+    monkeypatch.setattr(result_writers, "BATCH_ROWS", 2)
+    writes = []
+    stream = io.StringIO()
+    stream.write = writes.append
+
+    write_lines(stream, (f"{i}\n" for i in range(5)))
+
+    assert writes == ["0\n1\n", "2\n3\n", "4\n"]
+
+
+def test_csv_and_jsonl_rows(tmp_path):
+    """
+    Verifies CSV has a header row and JSON Lines one object per row.
+    """
+    with open_writer("csv", tmp_path / "r.csv", ("n", "s", "x")) as writer:
+        writer.write_rows(ROWS)
+    with open_writer("jsonl", tmp_path / "r.jsonl", ("n", "s", "x")) as writer:
+        writer.write_rows(ROWS)
+
+    with open(tmp_path / "r.csv", newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f))[:2] == [["n", "s", "x"], ["1", "a,b", "0.5"]]
+
+    lines = (tmp_path / "r.jsonl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines][1] == {"n": -2, "s": "ñ", "x": None}
+
+
+def test_columnar_round_trip_across_row_groups(tmp_path, monkeypatch):
+    """
+    Verifies columns, types and metadata survive several row groups.
+    """
+    monkeypatch.setattr(result_writers, "ROW_GROUP_ROWS", 3)
+    path = tmp_path / "r.col"
+
+    with open_writer("columnar", path, ("n", "s", "x"), {"execution_time": 0.25},
+                     ("int", "string", "float")) as writer:
+        writer.write_rows(ROWS)
+        writer.write_rows([(2**70, [1.0], 1.5), (None, None, "nan")])
+
+    columns, meta, data = read_columnar(str(path))
+
+    assert columns == ["n", "s", "x"]
+    assert meta == {"execution_time": 0.25}
+    assert data["n"] == [1, -2, 3, 2**70, None]
+    assert data["s"] == ["a,b", "ñ", "c", "[1.0]", None]
+    assert data["x"][0] == 0.5 and math.isnan(data["x"][1])
+    assert data["x"][2:] == [2.0, 1.5, None]
+
+
+def test_columnar_types_do_not_depend_on_row_groups(tmp_path, monkeypatch):
+    """
+    Verifies an invalid value in one row group does not change the type of
+    its column: it is null, and the other groups keep exact integers.
+    """
+    monkeypatch.setattr(result_writers, "ROW_GROUP_ROWS", 4)
+    path = tmp_path / "r.col"
+    numbers = ["nan", 2**53 + 1, 3, 4, 5, 6]
+
+    with open_writer("columnar", path, ("number",), types=("int",)) as writer:
+        writer.write_rows((n,) for n in numbers)
+
+    assert read_columnar(path)[2]["number"] == [None, 2**53 + 1, 3, 4, 5, 6]
+
+    raw = path.read_bytes()
+    (length,) = struct.unpack("<I", raw[-12:-8])
+    footer = json.loads(raw[-12 - length:-12])
+    assert footer["types"] == ["int"]
+    assert [group["chunks"][0]["encoding"] for group in footer["groups"]] == ["int64", "int64"]
+    assert [group["chunks"][0]["nulls"] for group in footer["groups"]] == [True, False]
+
+
+def test_columnar_rejects_values_of_the_wrong_type(tmp_path):
+    """
+    Verifies mismatched values raise instead of being silently converted.
+    """
+    with pytest.raises(ValueError):
+        with open_writer("columnar", tmp_path / "a.col", ("n",)):
+            pass
+
+    for kind, value in [("int", 1.5), ("int", "12"), ("float", True)]:
+        with pytest.raises(TypeError):
+            with open_writer("columnar", tmp_path / "b.col", ("n",), types=(kind,)) as writer:
+                writer.write_rows([(value,)])
+
+
+def test_columnar_goes_through_buffer_of_text_streams():
+    """
+    Verifies binary output to a text stream like stdout uses its buffer.
+    """
+    raw = io.BytesIO()
+    stream = io.TextIOWrapper(raw, encoding="utf-8")
+
+    with open_writer("columnar", stream, ("word", "count"), types=("string", "int")) as writer:
+        writer.write_rows([("dog", 2)])
+
+    assert read_columnar(io.BytesIO(raw.getvalue()))[2] == {"word": ["dog"], "count": [2]}
+
+
+def test_result_writer_requires_write_rows():
+    """
+    Verifies every writer implements write_rows, the one abstract method.
+    """
+    assert result_writers.ResultWriter.__abstractmethods__ == {"write_rows"}
+    for fmt in ("csv", "jsonl", "columnar"):
+        assert not result_writers.WRITERS[fmt].__abstractmethods__
+
+
+def test_rejects_unknown_formats_and_files(tmp_path):
+    """
+    Verifies text is left to the tools and other files are not read.
+    """
+    with pytest.raises(ValueError):
+        with open_writer("text", io.StringIO(), ("a",)):
+            pass
+
+    path = tmp_path / "r.txt"
+    with open_result(path) as f:
+        f.write("Execution time: 0.1 seconds\n")
+    with pytest.raises(ValueError):
+        read_columnar(path)
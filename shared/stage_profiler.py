@@ -0,0 +1,104 @@
+"""
+Per-stage profiling with structured JSON output.
+
+Stages are timed with perf_counter_ns. When profiling is enabled the run
+also records the tracemalloc peak and, optionally, a cProfile dump; the
+report is emitted as a single JSON document.
+"""
+
+import contextlib
+import cProfile
+import json
+import sys
+import time
+import tracemalloc
+
+
+class StageProfiler:
+    """
+    Times named stages of a run.
+
+    Timing is always on since it is cheap; tracemalloc and cProfile only
+    run when enabled, as they slow the program down.
+    """
+
+    def __init__(self, tool: str, enabled: bool = False, cprofile_path: str = None):
+        self.tool = tool
+        self.enabled = enabled
+        self.cprofile_path = cprofile_path
+        self.stages = {}
+        self._profile = None
+        self._start_ns = time.perf_counter_ns()
+
+        if enabled:
+            tracemalloc.start()
+        if cprofile_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """
+        Context manager adding the time spent in its block to stage name.
+
+        :param name: stage name
+        :type name: str
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0) + time.perf_counter_ns() - start
+
+    def finish(self, rows: int, **extra) -> dict:
+        """
+        Stops profiling and returns the report.
+
+        :param rows: rows (or tokens) processed, for the throughput
+        :type rows: int
+        :return: report with stage times, memory peak and rows/sec
+        :rtype: dict
+        """
+        total_ns = time.perf_counter_ns() - self._start_ns
+
+        peak = None
+        if self.enabled and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_path)
+            self._profile = None
+
+        report = {
+            "tool": self.tool,
+            "rows": rows,
+            "total_ns": total_ns,
+            "stages_ns": dict(self.stages),
+            "rows_per_sec": rows / (total_ns / 1e9) if total_ns else None,
+            "tracemalloc_peak_bytes": peak,
+            "cprofile": self.cprofile_path,
+        }
+        report.update(extra)
+        return report
+
+
+def write_report(report: dict, destination: str = None):
+    """
+    Writes a profile report as JSON to destination, or to stderr if None.
+
+    stderr keeps the report apart from the results printed on stdout.
+
+    :param report: report from StageProfiler.finish
+    :type report: dict
+    :param destination: output file, None for stderr
+    :type destination: str
+    """
+    text = json.dumps(report, sort_keys=True)
+    if destination is None:
+        print(text, file=sys.stderr)
+        return
+
+    with open(destination, "w", encoding="utf-8") as f:
+        f.write(text + "\n")